@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Conversion throughput benchmarks.
+
+Builds a synthetic corpus with ffmpeg test sources, ImageMagick built-in
+patterns and Ghostscript-generated PDFs, then runs every preset in
+src/resources/presets.json over it. Each conversion runs in its own child
+process so wall time, CPU time and peak RSS can be measured per job.
+
+Usage:
+    python benchmarks/run_benchmarks.py -o results.json
+    python benchmarks/run_benchmarks.py --filter 720p --repeat 5 -o after.json
+    python benchmarks/run_benchmarks.py --compare before.json after.json
+"""
+import sys
+import os
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+# Ensure project root is in sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from src.core.file_detector import FileDetector, FileType
+from src.core.preset_manager import PresetManager
+
+DEFAULT_CORPUS = os.path.join(current_dir, ".corpus")
+
+# name -> command producing it (output path is appended). Everything is deterministic.
+VIDEO_SOURCES = {
+    "video_720p.mp4": ["ffmpeg", "-y", "-v", "error",
+                       "-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30:duration=10",
+                       "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000:duration=10",
+                       "-c:v", "libx264", "-preset", "medium", "-c:a", "aac", "-shortest"],
+    "video_1080p.mkv": ["ffmpeg", "-y", "-v", "error",
+                        "-f", "lavfi", "-i", "testsrc2=size=1920x1080:rate=30:duration=10",
+                        "-f", "lavfi", "-i", "sine=frequency=660:sample_rate=48000:duration=10",
+                        "-c:v", "libx264", "-preset", "medium", "-c:a", "aac", "-shortest"],
+    "video_480p.webm": ["ffmpeg", "-y", "-v", "error",
+                        "-f", "lavfi", "-i", "smptebars=size=854x480:rate=25:duration=10",
+                        "-f", "lavfi", "-i", "sine=frequency=220:sample_rate=48000:duration=10",
+                        "-c:v", "libvpx-vp9", "-b:v", "1M", "-c:a", "libopus", "-shortest"],
+}
+
+AUDIO_SOURCES = {
+    "audio_60s.wav": ["ffmpeg", "-y", "-v", "error",
+                      "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100:duration=60", "-ac", "2"],
+    "audio_60s.mp3": ["ffmpeg", "-y", "-v", "error",
+                      "-f", "lavfi", "-i", "anoisesrc=color=pink:seed=1:sample_rate=44100:duration=60",
+                      "-c:a", "libmp3lame", "-b:a", "192k"],
+}
+
+IMAGE_SOURCES = {
+    "image_640x480.png": ["convert", "-size", "640x480", "pattern:checkerboard"],
+    "image_1920x1080.jpg": ["convert", "-seed", "1", "-size", "1920x1080", "plasma:fractal"],
+    "image_4000x3000.jpg": ["convert", "-seed", "2", "-size", "4000x3000", "plasma:fractal"],
+    "image_2048x2048.webp": ["convert", "-size", "2048x2048", "gradient:blue-yellow"],
+}
+
+PDF_PAGES = {
+    "document_20p.pdf": 20,
+    "document_200p.pdf": 200,
+}
+
+def pdf_program(pages: int) -> str:
+    """
+    PostScript drawing text, vector shapes and a gradient-like raster on every page.
+    """
+    return f"""%!PS
+/Helvetica findfont 14 scalefont setfont
+1 1 {pages} {{
+    /p exch def
+    72 720 moveto (Benchmark page ) show p 10 string cvs show
+    0 1 40 {{
+        /i exch def
+        72 700 i 14 mul sub moveto
+        (The quick brown fox jumps over the lazy dog. Line ) show i 10 string cvs show
+    }} for
+    /data 4096 string def
+    0 1 4095 {{ /k exch def data k k p add 256 mod put }} for
+    gsave 300 80 translate 128 128 scale
+    64 64 8 [64 0 0 64 0 0] {{ data }} image
+    grestore
+    newpath 72 72 moveto 540 72 lineto 540 120 lineto closepath stroke
+    showpage
+}} for
+"""
+
+def run_quiet(cmd):
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} failed: {result.stderr.strip()}")
+    return result
+
+def build_corpus(corpus_dir: str) -> dict:
+    """
+    Generates any missing corpus files. Returns { FileType: [paths] }.
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    corpus = {FileType.VIDEO: [], FileType.AUDIO: [], FileType.IMAGE: [], FileType.PDF: []}
+
+    for sources in (VIDEO_SOURCES, AUDIO_SOURCES, IMAGE_SOURCES):
+        for name, cmd in sources.items():
+            path = os.path.join(corpus_dir, name)
+            if not os.path.exists(path):
+                print(f"Generating {name}...")
+                run_quiet(cmd + [path])
+            corpus[FileDetector.detect(path)].append(path)
+
+    for name, pages in PDF_PAGES.items():
+        path = os.path.join(corpus_dir, name)
+        if not os.path.exists(path):
+            print(f"Generating {name}...")
+            ps_path = path + ".ps"
+            with open(ps_path, "w") as f:
+                f.write(pdf_program(pages))
+            try:
+                run_quiet(["gs", "-q", "-dNOPAUSE", "-dBATCH", "-sDEVICE=pdfwrite",
+                           f"-sOutputFile={path}", ps_path])
+            finally:
+                os.remove(ps_path)
+        corpus[FileType.PDF].append(path)
+
+    return corpus
+
+def tool_versions() -> dict:
+    versions = {}
+    for tool, cmd in (("ffmpeg", ["ffmpeg", "-version"]), ("imagemagick", ["convert", "-version"]),
+                      ("ghostscript", ["gs", "--version"])):
+        try:
+            versions[tool] = subprocess.run(cmd, capture_output=True, text=True).stdout.splitlines()[0]
+        except Exception:
+            versions[tool] = None
+    return versions
+
+def output_path_for(input_path: str, preset: dict, out_dir: str, preset_name: str) -> str:
+    name, ext = os.path.splitext(os.path.basename(input_path))
+    if "format" in preset:
+        ext = "." + preset["format"]
+    safe_preset = "".join(c if c.isalnum() else "_" for c in preset_name)
+    return os.path.join(out_dir, f"{name}__{safe_preset}{ext}")
+
+def run_one(type_name: str, preset_name: str, input_path: str, output_path: str) -> int:
+    """
+    Child process entry point: performs exactly one conversion.
+    """
+    from src.core.scheduler import JobScheduler
+
+    file_type = FileType[type_name]
+    preset = PresetManager.get_presets(file_type)[preset_name]
+    job = {'path': input_path, 'output_path': output_path, 'file_type': file_type, 'preset': preset}
+    success, error_msg = JobScheduler.convert_job(job, [None])
+    if not success:
+        print(error_msg, file=sys.stderr)
+    return 0 if success else 1
+
+def measure(type_name: str, preset_name: str, input_path: str, output_path: str) -> dict:
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-one", type_name, preset_name, input_path, output_path]
+    # Every run starts cold and leaves the user's cache, journal and media index alone
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, XDG_CACHE_HOME=cache_dir, FILECONVERTER_JOURNAL="0", FILECONVERTER_MEDIA_INDEX="0")
+        start = time.perf_counter()
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
+        # wait4 reports usage of the child plus every tool process it waited for
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    return {
+        "success": process.returncode == 0,
+        "wall_s": wall,
+        "cpu_user_s": usage.ru_utime,
+        "cpu_sys_s": usage.ru_stime,
+        "peak_rss_kb": usage.ru_maxrss,
+        "output_bytes": os.path.getsize(output_path) if os.path.exists(output_path) else 0,
+    }
+
+def run_suite(corpus: dict, out_dir: str, repeat: int, name_filter: str = None) -> list:
+    results = []
+    os.makedirs(out_dir, exist_ok=True)
+    PresetManager.load_presets()
+
+    for type_name, presets in PresetManager._presets.items():
+        file_type = FileType[type_name]
+        for preset_name, preset in presets.items():
+            if preset.get("action") == "custom":
+                continue
+            if name_filter and name_filter.lower() not in preset_name.lower():
+                continue
+            # PDF "To PDF" has no engine behind it
+            if file_type == FileType.PDF and preset.get("action") != "compress":
+                continue
+
+            for input_path in corpus.get(file_type, []):
+                output_path = output_path_for(input_path, preset, out_dir, preset_name)
+                runs = [measure(type_name, preset_name, input_path, output_path) for _ in range(repeat)]
+
+                result = {
+                    "category": type_name,
+                    "preset": preset_name,
+                    "input": os.path.basename(input_path),
+                    "input_bytes": os.path.getsize(input_path),
+                    "runs": repeat,
+                    "success": all(run["success"] for run in runs),
+                }
+                # Medians are less sensitive to one noisy run than means
+                for key in ("wall_s", "cpu_user_s", "cpu_sys_s", "peak_rss_kb", "output_bytes"):
+                    result[key] = statistics.median(run[key] for run in runs)
+                results.append(result)
+
+                status = "ok" if result["success"] else "FAILED"
+                print(f"{type_name:<6} {preset_name:<24} {result['input']:<24} "
+                      f"{result['wall_s']:8.3f}s  cpu {result['cpu_user_s'] + result['cpu_sys_s']:8.3f}s  "
+                      f"rss {result['peak_rss_kb'] / 1024:7.1f} MB  {status}")
+    return results
+
+def compare(old_path: str, new_path: str) -> int:
+    with open(old_path) as f:
+        old = {(r["category"], r["preset"], r["input"]): r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = {(r["category"], r["preset"], r["input"]): r for r in json.load(f)["results"]}
+
+    def delta(a, b):
+        return f"{(b - a) / a * 100:+7.1f}%" if a else "    n/a"
+
+    print(f"{'preset':<24} {'input':<24} {'wall':>8} {'cpu':>8} {'rss':>8} {'size':>8}")
+    for key in sorted(old.keys() & new.keys()):
+        a, b = old[key], new[key]
+        cpu_a = a["cpu_user_s"] + a["cpu_sys_s"]
+        cpu_b = b["cpu_user_s"] + b["cpu_sys_s"]
+        print(f"{key[1]:<24} {key[2]:<24} {delta(a['wall_s'], b['wall_s']):>8} {delta(cpu_a, cpu_b):>8} "
+              f"{delta(a['peak_rss_kb'], b['peak_rss_kb']):>8} {delta(a['output_bytes'], b['output_bytes']):>8}")
+
+    for key in sorted(old.keys() - new.keys()):
+        print(f"only in {old_path}: {' / '.join(key)}")
+    for key in sorted(new.keys() - old.keys()):
+        print(f"only in {new_path}: {' / '.join(key)}")
+    return 0
+
+def main():
+    if len(sys.argv) == 6 and sys.argv[1] == "--run-one":
+        return run_one(*sys.argv[2:])
+
+    parser = argparse.ArgumentParser(description="FileConverter benchmark suite")
+    parser.add_argument("-o", "--output", type=str, help="Write JSON results to this file")
+    parser.add_argument("--corpus", type=str, default=DEFAULT_CORPUS, help="Directory for the generated corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per preset/input; the median is recorded")
+    parser.add_argument("--filter", type=str, help="Only run presets whose name contains this text")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two JSON result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+
+    missing = [tool for tool in ("ffmpeg", "convert", "gs") if not shutil.which(tool)]
+    if missing:
+        print(f"Error: missing tools: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    corpus = build_corpus(args.corpus)
+    out_dir = os.path.join(args.corpus, "out")
+    try:
+        results = run_suite(corpus, out_dir, max(1, args.repeat), args.filter)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "host": platform.node(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "tools": tool_versions(),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    return 0 if all(r["success"] for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Startup budget check for the CLI paths of src/main.py.
+
+Runs each scripted call several times and fails (exit code 1) if the median
+wall time exceeds its budget or if PySide6 gets imported on the way.
+Meant to be run in CI next to the benchmark suite:
+
+    python benchmarks/startup_budget.py
+    python benchmarks/startup_budget.py --scale 2   # slower CI machines
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+MAIN_PY = os.path.join(project_root, "src", "main.py")
+
+# Median wall time allowed per call, in milliseconds, including interpreter startup
+BUDGETS_MS = {
+    "list-presets": 150,
+    "single-file": 400,
+}
+
+QT_MODULES = ("PySide6", "shiboken6")
+
+def qt_imports(args: list) -> list:
+    """
+    Returns the names of the Qt modules one call imports, read from -X importtime.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", MAIN_PY] + args,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    qt_imported = set()
+    # -X importtime lines look like "import time:   123 |   456 |   PySide6.QtCore"
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:"):
+            module = line.rsplit("|", 1)[-1].strip()
+            if module.split(".")[0] in QT_MODULES:
+                qt_imported.add(module)
+    return sorted(qt_imported)
+
+def measure(args: list, runs: int):
+    """
+    Returns (median wall time in ms, names of Qt modules imported, return code of the last run).
+    The timed runs go without -X importtime, which slows every import down.
+    """
+    times = []
+    returncode = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, MAIN_PY] + args,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+        returncode = result.returncode
+    return statistics.median(times), qt_imports(args), returncode
+
+def main():
+    parser = argparse.ArgumentParser(description="Enforce the CLI startup budget")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per case; the median is compared")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (for slow machines)")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cases = [("list-presets", ["--list-presets"])]
+
+        if shutil.which("convert"):
+            image_path = os.path.join(tmp_dir, "pixel.png")
+            subprocess.run(["convert", "-size", "16x16", "xc:white", image_path], check=True)
+            cases.append(("single-file", ["--preset", "To JPG", image_path]))
+        else:
+            print("single-file: skipped (ImageMagick 'convert' not found)")
+
+        # Keep the user's cache and media index out of the measurement
+        os.environ["XDG_CACHE_HOME"] = tmp_dir
+
+        for name, case_args in cases:
+            budget = BUDGETS_MS[name] * args.scale
+            median_ms, qt_modules, returncode = measure(case_args, max(1, args.runs))
+
+            problems = []
+            if returncode != 0:
+                problems.append(f"exit code {returncode}")
+            if median_ms > budget:
+                problems.append(f"over budget ({budget:.0f} ms)")
+            if qt_modules:
+                problems.append(f"imported Qt: {', '.join(qt_modules)}")
+
+            status = "FAIL: " + "; ".join(problems) if problems else "ok"
+            print(f"{name:<14} {median_ms:8.1f} ms  {status}")
+            failed = failed or bool(problems)
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,9 @@
 import sys
 import os
 import argparse
+import shutil
+import threading
+import time
 
 # Ensure project root is in sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,44 +13,95 @@ sys.path.insert(0, project_root)
 
 from src.core.file_detector import FileDetector, FileType
 from src.core.preset_manager import PresetManager
-from src.core.image_engine import ImageEngine
-from src.core.video_engine import VideoEngine
-from src.core.audio_engine import AudioEngine
-from src.core.pdf_engine import PdfEngine
+from src.core.discovery import FileDiscovery
+from src.core.output_names import OutputNames
+from src.core.progress import ProgressThrottle
 from src.integration import main as install_scripts, remove_integration
 
-def get_output_path(input_path, preset_data):
-    input_dir = os.path.dirname(input_path)
-    filename = os.path.basename(input_path)
-    name, ext = os.path.splitext(filename)
-    
-    # Determine new extension if format change
-    if preset_data.get("action") == "convert" and "format" in preset_data:
-        new_ext = "." + preset_data["format"]
-    else:
-        new_ext = ext
-        
-    output_path = os.path.join(input_dir, f"{name}_converted{new_ext}")
-    
-    # Handle duplicates
-    counter = 1
-    base_output_path = output_path
-    while os.path.exists(output_path):
-        name_no_ext, ext_part = os.path.splitext(base_output_path)
-        output_path = f"{name_no_ext}({counter}){ext_part}"
-        counter += 1
-        
-    return output_path
-
 def main():
     parser = argparse.ArgumentParser(description="File Converter CLI")
-    parser.add_argument("files", nargs="*", help="Files to convert")
-    parser.add_argument("--preset", type=str, help="Preset name to use (e.g. 'To PNG')")
+    parser.add_argument("files", nargs="*", help="Files, directories or glob patterns (e.g. 'photos/**/*.png') to convert")
+    parser.add_argument("--preset", action="append", help="Preset name to use (e.g. 'To PNG'). Repeat to write several outputs per file; "
+                                                          "video/audio presets of one file then share a single decode")
     parser.add_argument("--list-presets", nargs="?", const="ALL", help="List available presets. Optionally provide a file path to filter by type.")
     parser.add_argument("--install-integration", action="store_true", help="Install context menu scripts for Nautilus/Nemo")
     parser.add_argument("--remove-integration", action="store_true", help="Remove context menu scripts for Nautilus/Nemo")
+    parser.add_argument("--recursive", "-r", action="store_true", help="Descend into subdirectories of directory arguments")
+    parser.add_argument("--include", action="append", metavar="PATTERN", help="Only convert discovered files matching this pattern (repeatable)")
+    parser.add_argument("--exclude", action="append", metavar="PATTERN", help="Skip discovered files and directories matching this pattern (repeatable)")
+    parser.add_argument("--include-converted", action="store_true",
+                        help="Also convert discovered files named like earlier outputs (*_converted, *_converted(n))")
+    parser.add_argument("--jobs", "-j", type=int, help="Number of files to convert at once (default: 1, or one per core with --serve)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the last interrupted batch: skip finished files, redo unfinished ones")
+    parser.add_argument("--dry-run", "-n", action="store_true",
+                        help="Print each conversion's command line, without converting (approximate: thread "
+                             "limits and stream-copy/segment choices made at run time are left out)")
+    parser.add_argument("--serve", nargs="?", const="127.0.0.1:8765", metavar="ADDRESS",
+                        help="Run a local HTTP conversion service on HOST:PORT (default: 127.0.0.1:8765) or a UNIX socket path")
+    parser.add_argument("--serve-root", action="append", metavar="DIR",
+                        help="Let --serve convert files in place (path=) below this directory (repeatable); "
+                             "callers need the token printed at startup. Without it only uploads are accepted")
+    parser.add_argument("--queue-size", type=int, metavar="N",
+                        help="Jobs the service queues beyond --jobs before answering 503 (default: 64)")
+    parser.add_argument("--cache", action="store_true", help="Reuse earlier outputs for identical input and preset instead of re-encoding")
+    parser.add_argument("--cache-link", action="store_true",
+                        help="Hard-link outputs into and out of the cache instead of copying them; saves space, but "
+                             "outputs served from one entry share a file, so editing one in place changes them all")
+    parser.add_argument("--cache-dir", type=str, help="Conversion cache directory (default: ~/.cache/fileconverter/conversions)")
+    parser.add_argument("--cache-max-size", type=str, help="Evict least recently used cache entries above this size (e.g. 500M, 5G)")
+    parser.add_argument("--cache-info", action="store_true", help="Show conversion cache usage")
+    parser.add_argument("--cache-purge", action="store_true", help="Delete every conversion cache entry")
+    parser.add_argument("--pdf-parallel", action="store_true",
+                        help="Compress PDFs of 100+ pages as page ranges in parallel (needs pypdf)")
+    parser.add_argument("--video-segments", action="store_true",
+                        help="Encode videos of 10+ minutes as keyframe-aligned segments in parallel")
+    parser.add_argument("--qt-images", action="store_true",
+                        help="Convert small JPG/PNG/WEBP images in-process with Qt instead of starting ImageMagick per file")
+    parser.add_argument("--progress-interval", type=int, metavar="MS",
+                        help=f"Minimum time between progress updates per file (default: {ProgressThrottle.DEFAULT_INTERVAL_MS}, 0 = every update)")
+    parser.add_argument("--sniff", action="store_true", help="Detect file types from their content (magic bytes) instead of the extension")
+    parser.add_argument("--index-scan", action="store_true", help="Add the given files/directories to the media info index")
+    parser.add_argument("--index-query", action="store_true", help="List indexed media matching --kind/--min-height/--under, with totals")
+    parser.add_argument("--index-prune", action="store_true", help="Drop index entries for files that no longer exist")
+    parser.add_argument("--kind", choices=["video", "audio", "image"], help="Index query: only this kind of media")
+    parser.add_argument("--min-height", type=int, help="Index query: minimum video height (e.g. 1080)")
+    parser.add_argument("--under", type=str, help="Index query: only files below this directory")
 
     args = parser.parse_args()
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.queue_size is not None and args.queue_size < 0:
+        parser.error("--queue-size must not be negative")
+    if args.serve:
+        if args.files:
+            parser.error("--serve takes its files over HTTP; don't pass any")
+        args.jobs = args.jobs or os.cpu_count() or 1
+    else:
+        if args.serve_root:
+            parser.error("--serve-root only applies to --serve")
+        args.jobs = args.jobs or 1
+
+    if args.sniff:
+        FileDetector.sniff_content = True
+
+    if args.pdf_parallel:
+        from src.core.pdf_engine import PdfEngine
+        PdfEngine.parallel_pages = True
+
+    if args.video_segments:
+        from src.core.video_engine import VideoEngine
+        VideoEngine.segment_parallel = True
+
+    if args.qt_images:
+        from src.core.qt_image_engine import QtImageEngine
+        QtImageEngine.enabled = True
+
+    if args.progress_interval is not None:
+        if args.progress_interval < 0:
+            parser.error("--progress-interval must not be negative")
+        ProgressThrottle.interval_ms = args.progress_interval
     
     # Handle Integration Installation
     if args.install_integration:
@@ -64,12 +118,31 @@ def main():
                 print("Integration installation failed (check errors above).")
         except Exception as e:
             print(f"Failed to install integration: {e}")
-        return
+        return 0
     
     # Handle Integration Removal
     if args.remove_integration:
         remove_integration()
-        return
+        return 0
+
+    # Handle Cache Maintenance
+    if args.cache_info or args.cache_purge:
+        cache = open_cache(args)
+        if args.cache_purge:
+            cache.purge()
+            print("Conversion cache purged.")
+        stats = cache.stats()
+        print(f"Cache directory: {stats['dir']}")
+        print(f"Entries: {stats['entries']}")
+        print(f"Size: {stats['size_bytes'] / 1024 ** 2:.1f} MB of {stats['max_size_bytes'] / 1024 ** 2:.1f} MB")
+        return 0
+
+    # Handle Media Index
+    if args.index_scan or args.index_query or args.index_prune:
+        return run_index_command(args)
+
+    if args.serve:
+        return run_server(args)
 
     # Handle List Presets
     if args.list_presets:
@@ -90,75 +163,474 @@ def main():
                 print(f"\n{type_key}:")
                 for name in presets:
                     print(f"  - {name}")
-        return
+        return 0
+
+    journal = None
+    batch_id = None
+    resumed = None
+    if args.resume:
+        from src.core.job_journal import JobJournal
+
+        if args.files:
+            parser.error("--resume continues the interrupted batch's own files; don't pass any")
+        journal = JobJournal.shared()
+        batch = journal.interrupted_batch("cli") if journal else None
+        if batch is None:
+            print("No interrupted batch to resume.")
+            return 0
+
+        # Same inputs and presets as the interrupted run; -j and other options are taken from this call
+        saved = batch['args']
+        args.files, args.preset = saved['files'], saved['presets']
+        args.recursive, args.include, args.exclude = saved['recursive'], saved['include'], saved['exclude']
+        args.include_converted = saved.get('include_converted', False)
+        batch_id = batch['id']
+        resumed = {(row['path'], row['preset_name']): row for row in journal.resume_batch(batch_id)}
+        print(f"Resuming batch {batch_id}: {batch['remaining']} unfinished job(s)")
 
     if not args.files:
         parser.print_help()
-        return
+        return 0
+
+    presets = args.preset or [None]
+    if args.dry_run:
+        return run_dry(FileDiscovery.iter_files(args.files, args.recursive, args.include, args.exclude,
+                                                with_types=True, skip_converted=not args.include_converted), presets)
+
+    # Engines, the scheduler and the cache are imported only when converting,
+    # which keeps quick calls like --list-presets within the startup budget
+    from src.core.conversion_cache import ConversionCache
+
+    cache = open_cache(args) if args.cache else ConversionCache.from_env()
+
+    # Batches (several files, a directory or glob, several presets, --jobs) are journaled so an
+    # interrupted one can be continued with --resume; a single file isn't worth the database write
+    is_batch = args.jobs > 1 or len(presets) > 1 or len(args.files) > 1 or not os.path.isfile(args.files[0])
+    if journal is None and is_batch:
+        from src.core.job_journal import JobJournal
+
+        journal = JobJournal.shared()
+        if journal is not None:
+            batch_id = journal.start_batch("cli", {
+                'files': [os.path.abspath(path) for path in args.files], 'presets': presets,
+                'recursive': args.recursive, 'include': args.include, 'exclude': args.exclude,
+                'include_converted': args.include_converted,
+            })
+    names = OutputNames()
+    # Discovery is a generator: the first files convert while the rest of the tree is still being walked,
+    # so outputs already written into directories it has yet to list are skipped
+    files = FileDiscovery.iter_files(args.files, args.recursive, args.include, args.exclude, skip=names.issued,
+                                     with_types=True, skip_converted=not args.include_converted)
+    jobs = iter_jobs(files, presets, names, journal, batch_id, resumed)
+
+    if args.jobs > 1 or len(presets) > 1:
+        return run_parallel(jobs, args.jobs, names, cache, journal)
+
+    try:
+        return run_serial(jobs, presets[0], names, cache, journal)
+    finally:
+        names.discard_unused()
 
-    for file_path in args.files:
-        if not os.path.isfile(file_path):
-            print(f"Error: File not found: {file_path}")
+def run_serial(jobs, preset_name, names, cache=None, journal=None):
+    """
+    Converts one file at a time, printing each step.
+    Returns the process exit code.
+    """
+    from src.core.scheduler import JobScheduler
+
+    failures = []
+    throttle = ProgressThrottle(lambda job, p: print(f"  Progress: {p}".ljust(60), end='\r', flush=True))
+    try:
+        for file_path, job, error_msg in jobs:
+            print(f"Processing: {file_path}")
+
+            if not job:
+                print(f"  Error: {error_msg}")
+                failures.append((file_path, error_msg))
+                continue
+
+            if not preset_name:
+                print(f"  Using default preset: {job['plan'].name}")
+            print(f"  Output: {job['output_path']}")
+
+            # One file at a time: the tool gets every core
+            job['threads'] = os.cpu_count() or 1
+            print(f"  Threads: {job['threads']}")
+
+            if journal is not None:
+                journal.mark_running(job)
+
+            if cache is not None and cache.fetch(job):
+                print(f"  Success! (cached)")
+                names.written(job['output_path'])
+                if journal is not None:
+                    journal.mark_finished(job, True)
+                continue
+
+            # Holder for process (not strictly needed for CLI but Engine expects it)
+            process_holder = [None]
+
+            # Basic progress callback
+            def progress_cb(p, job=job):
+                throttle.progress(job, p)
+
+            reports_progress = job['file_type'] in (FileType.VIDEO, FileType.AUDIO)
+            success, error_msg = JobScheduler.convert_job(job, process_holder, progress_cb)
+            throttle.finished(job, success, error_msg) # Drop a pending update before the newline
+            if reports_progress:
+                print() # Newline after progress
+            if journal is not None:
+                journal.mark_finished(job, success, error_msg)
+
+            if success:
+                names.written(job['output_path'])
+                print(f"  Success!")
+                if cache is not None:
+                    cache.store(job)
+            else:
+                print(f"  Failed! {error_msg}")
+                names.release(job['output_path'])
+                failures.append((file_path, error_msg))
+    finally:
+        throttle.close()
+    return print_failures(failures)
+
+def iter_jobs(files, preset_names, names, journal=None, batch_id=None, resumed=None):
+    """
+    Resolves every file with every preset, yielding (file_path, job, error_msg); job is None on error.
+    files: (file_path, FileType or None) pairs from FileDiscovery.iter_files(with_types=True).
+    names: OutputNames reserving each job's output name.
+    New jobs are recorded as queued in the journal batch when one is given.
+    resumed: Optional { (absolute path, preset name): row } built from JobJournal.resume_batch.
+             Finished jobs are skipped; unfinished ones keep their journal entry and output name.
+    """
+    from src.core.job_journal import JobJournal
+
+    seen = set() # Journal ids of resumed jobs found again
+    # Outputs the interrupted run already wrote sit next to its inputs; they are not new inputs
+    batch_outputs = {row['output_path'] for row in resumed.values()} if resumed else set()
+    for file_path, file_type in files:
+        if batch_outputs and os.path.abspath(file_path) in batch_outputs:
             continue
-            
-        print(f"Processing: {file_path}")
-        
+        for preset_name in preset_names:
+            job, error_msg = resolve_job(file_path, preset_name, file_type=file_type)
+            if not job:
+                yield file_path, job, error_msg
+                continue
+
+            row = resumed.get((os.path.abspath(file_path), job['plan'].name)) if resumed else None
+            if row is None:
+                job['output_path'] = job['plan'].output_path(file_path, names)
+                if journal is not None:
+                    journal.add(batch_id, [job])
+            elif row['state'] in (JobJournal.DONE, JobJournal.FAILED):
+                continue
+            else:
+                seen.add(row['id'])
+                job['journal_id'] = row['id']
+                # The resume removed the partial output or placeholder, so the journaled name is normally free again
+                if row['output_path'] and names.claim(row['output_path']):
+                    job['output_path'] = row['output_path']
+                else:
+                    job['output_path'] = job['plan'].output_path(file_path, names)
+                    journal.set_output(job)
+            yield file_path, job, error_msg
+
+    # Inputs that are gone would keep the batch unfinished forever
+    if resumed:
+        for row in resumed.values():
+            if row['state'] == JobJournal.QUEUED and row['id'] not in seen:
+                journal.mark_finished({'journal_id': row['id']}, False, "File not found")
+
+def resolve_job(file_path, preset_name, verbose=False, names=None, exists=None, file_type=None):
+    """
+    Resolves a file and preset name into a scheduler job dict.
+    names: OutputNames reserving the output name; without it 'output_path' is left None for the caller.
+    exists: Optional replacement for the input file check (e.g. OutputNames.exists).
+    file_type: The type discovery already detected; the file is then known to exist and isn't checked again.
+    Returns (job, error_msg); job is None when the file cannot be converted.
+    """
+    if file_type is None:
+        if not (exists or os.path.isfile)(file_path):
+            return None, f"File not found: {file_path}"
         file_type = FileDetector.detect(file_path)
-        if file_type == FileType.UNKNOWN:
-            print(f"  Error: Unknown file type for {file_path}")
-            continue
-            
-        presets = PresetManager.get_presets(file_type)
-        preset_name = args.preset
-        
+    if file_type == FileType.UNKNOWN:
+        return None, f"Unknown file type for {file_path}"
+
+    plans = PresetManager.get_plans(file_type)
+
+    if not preset_name:
+        # Default to the first usable preset
+        preset_name = next((name for name, plan in plans.items() if not plan.error), None)
         if not preset_name:
-            if not presets:
-                print("  Error: No presets available for this file type")
-                continue
-            # Default to first available
-            preset_name = list(presets.keys())[0]
+            return None, "No presets available for this file type"
+        if verbose:
             print(f"  Using default preset: {preset_name}")
-            
-        preset_data = presets.get(preset_name)
-        if not preset_data:
-            print(f"  Error: Preset '{preset_name}' not found for type {file_type.name}")
-            continue
-            
-        output_path = get_output_path(file_path, preset_data)
-        print(f"  Output: {output_path}")
-        
-        success = False
-        error_msg = ""
-        
-        # Holder for process (not strictly needed for CLI but Engine expects it)
-        process_holder = [None]
-        
-        if file_type == FileType.IMAGE:
-            success = ImageEngine.convert(file_path, output_path, preset_data, process_holder)
-        elif file_type == FileType.VIDEO:
-             # Basic progress callback
-            def progress_cb(p):
-                print(f"  Progress: {p}%", end='\r', flush=True)
-            success = VideoEngine.convert(file_path, output_path, preset_data, process_holder, progress_cb)
-            print() # Newline after progress
-        elif file_type == FileType.AUDIO:
-             # Basic progress callback
-            def progress_cb(p):
-                print(f"  Progress: {p}%", end='\r', flush=True)
-            success = AudioEngine.convert(file_path, output_path, preset_data, process_holder, progress_cb)
-            print() # Newline after progress
-        elif file_type == FileType.PDF:
-            if preset_data.get("action") == "compress":
-                 success = PdfEngine.compress(file_path, output_path, preset_data, process_holder)
+
+    plan = plans.get(preset_name)
+    if plan is None:
+        return None, f"Preset '{preset_name}' not found for type {file_type.name}"
+    if plan.error:
+        return None, plan.error
+
+    job = {
+        'path': file_path,
+        'output_path': plan.output_path(file_path, names) if names is not None else None,
+        'file_type': file_type,
+        'preset': plan.preset,
+        'plan': plan
+    }
+    return job, ""
+
+def run_dry(files, preset_names):
+    """
+    Prints the command line of every job, one per line, without converting anything.
+    files: (file_path, FileType or None) pairs from FileDiscovery.iter_files(with_types=True).
+    The lines are the presets' plain command lines, so they are approximate: thread limits and
+    choices made while converting (stream copy, video segments, PDF page ranges, in-process
+    Qt images, stream I/O) are left out.
+    Returns the process exit code.
+    """
+    import shlex
+
+    # Names are only reserved in memory; the directory listings also answer whether named inputs exist
+    names = OutputNames(placeholders=False)
+
+    failures = []
+    lines = []
+    for file_path, file_type in files:
+        for preset_name in preset_names:
+            job, error_msg = resolve_job(file_path, preset_name, names=names, exists=names.exists, file_type=file_type)
+            if job:
+                lines.append(shlex.join(job['plan'].command(file_path, job['output_path'])))
             else:
-                 error_msg = "Action not supported for PDF"
-        else:
-            error_msg = "Engine not implemented"
-            
-        if success:
-            print(f"  Success!")
-        else:
-            print(f"  Failed! {error_msg}")
+                failures.append((file_path, error_msg))
+        if len(lines) >= 1000:
+            print("\n".join(lines), flush=True)
+            lines.clear()
+    if lines:
+        print("\n".join(lines), flush=True)
+    return print_failures(failures)
+
+def iter_media_files(paths):
+    def candidates():
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, names in os.walk(path):
+                    for name in names:
+                        yield os.path.join(root, name)
+            elif os.path.isfile(path):
+                yield path
+            else:
+                print(f"Error: File not found: {path}", file=sys.stderr)
+
+    for file_path, file_type in FileDetector.detect_many(candidates(), sniff=FileDetector.sniff_content):
+        if file_type in (FileType.VIDEO, FileType.AUDIO, FileType.IMAGE):
+            yield file_path
+
+def format_duration(seconds):
+    seconds = int(seconds or 0)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def run_index_command(args):
+    from concurrent.futures import ThreadPoolExecutor
+    from src.core.media_info import MediaInfoExtractor
+
+    index = MediaInfoExtractor.get_index()
+    if index is None:
+        print("Error: media index is disabled or unavailable", file=sys.stderr)
+        return 1
+
+    if args.index_prune:
+        print(f"Removed {index.prune()} stale entries.")
+
+    if args.index_scan:
+        errors = 0
+        scanned = 0
+        # ffprobe runs are independent, so probe several files at once
+        with ThreadPoolExecutor(max_workers=max(args.jobs, os.cpu_count() or 1)) as executor:
+            for file_path, info in executor.map(lambda p: (p, MediaInfoExtractor.get_info(p)), iter_media_files(args.files)):
+                scanned += 1
+                if "error" in info:
+                    errors += 1
+                    print(f"  Error: {file_path}: {info['error']}", file=sys.stderr)
+        print(f"Indexed {scanned - errors}/{scanned} file(s).")
+        if errors:
+            return 1
+
+    if args.index_query:
+        for path, kind, width, height, duration in index.query(args.kind, args.min_height, args.under):
+            resolution = f"{width}x{height}" if height else "-"
+            print(f"{kind}\t{resolution}\t{format_duration(duration)}\t{path}")
+        summary = index.summary(args.kind, args.min_height, args.under)
+        print(f"{summary['files']} file(s), total duration {format_duration(summary['duration'])}, "
+              f"{summary['size_bytes'] / 1024 ** 2:.1f} MB")
+    return 0
+
+def open_cache(args):
+    from src.core.conversion_cache import ConversionCache
+
+    max_size = ConversionCache.parse_size(args.cache_max_size) if args.cache_max_size else None
+    return ConversionCache(args.cache_dir, max_size, args.cache_link)
+
+def run_server(args):
+    """
+    Runs the HTTP conversion service until interrupted.
+    Returns the process exit code.
+    """
+    from src.core.conversion_cache import ConversionCache
+    import signal
+    from src.core.conversion_service import ConversionService
+
+    cache = open_cache(args) if args.cache else ConversionCache.from_env()
+    service = ConversionService(args.jobs, args.queue_size, cache, allowed_roots=args.serve_root,
+                                token=os.environ.get("FILECONVERTER_SERVE_TOKEN"))
+    try:
+        server = service.make_server(args.serve)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot listen on {args.serve}: {e}", file=sys.stderr)
+        service.close()
+        return 1
+
+    def stop_serving(signum, frame):
+        raise KeyboardInterrupt # Shut down cleanly (spooled uploads removed) on SIGTERM too
+
+    signal.signal(signal.SIGTERM, stop_serving)
+    print(f"Serving on {args.serve} ({args.jobs} job(s) at once, {service.queue_size} queued at most)", flush=True)
+    if service.allowed_roots:
+        print(f"path= jobs under {', '.join(service.allowed_roots)} need: Authorization: Bearer {service.token}",
+              flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+def run_parallel(resolved_jobs, max_jobs, names, cache=None, journal=None):
+    """
+    Converts up to max_jobs files at once and shows one combined progress line.
+    resolved_jobs: (file_path, job, error_msg) tuples from iter_jobs; jobs of one file come
+    back to back so the scheduler can write all their outputs from one ffmpeg run.
+    names: The OutputNames the jobs' output names came from; unused placeholders are removed.
+    journal: Optional JobJournal the jobs' states are recorded in.
+    Returns the process exit code.
+    """
+    from src.core.scheduler import JobScheduler
+
+    failures = []
+    progress = BatchProgress()
+
+    def jobs():
+        for file_path, job, error_msg in resolved_jobs:
+            if job:
+                progress.add()
+                yield job
+            else:
+                failures.append((file_path, error_msg))
+        progress.discovery_finished()
+
+    slots = {file_type: max_jobs for file_type in JobScheduler.default_slots()}
+    scheduler = JobScheduler(slots, max_jobs=max_jobs, cache=cache)
+    throttle = ProgressThrottle(progress.update, progress.finish)
+    progress_cb, finished_cb = throttle.progress, names.callbacks(throttle.finished)
+    if journal is not None:
+        # Recorded before throttling: the journal must see every start and finish as it happens
+        progress_cb, finished_cb = journal.callbacks(progress_cb, finished_cb)
+    try:
+        scheduler.run(jobs(), progress_cb, finished_cb)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    finally:
+        scheduler.shutdown()
+        throttle.close()
+        names.discard_unused()
+    progress.close()
+
+    failures.extend(progress.failures)
+    return print_failures(failures)
+
+def print_failures(failures):
+    if not failures:
+        return 0
+
+    print(f"\n{len(failures)} file(s) failed:", file=sys.stderr)
+    for file_path, error_msg in failures:
+        print(f"  {file_path}: {error_msg}", file=sys.stderr)
+    return 1
+
+class BatchProgress:
+    """
+    Aggregated progress display for parallel CLI runs.
+    On a terminal it redraws one status line; otherwise (e.g. cron) it prints one line per finished file.
+    """
+    def __init__(self, total=0):
+        self.total = total
+        self.discovering = True # More jobs may still be added
+        self.done = 0
+        self.failures = []
+        self.running = {} # id(job) -> (job, ConversionProgress); one input may have several jobs
+        self.start_time = time.monotonic()
+        self.interactive = sys.stdout.isatty()
+        self.last_render = 0.0
+        self._lock = threading.Lock()
+
+    def add(self):
+        with self._lock:
+            self.total += 1
+
+    def discovery_finished(self):
+        with self._lock:
+            self.discovering = False
+            self._render()
+
+    def update(self, job, progress):
+        with self._lock:
+            self.running[id(job)] = (job, progress)
+            # Several jobs report per refresh interval; redraw the shared line once per interval
+            if time.monotonic() - self.last_render >= ProgressThrottle.default_interval():
+                self._render()
+
+    def finish(self, job, success, message):
+        with self._lock:
+            self.running.pop(id(job), None)
+            self.done += 1
+            if not success:
+                self.failures.append((job['path'], message))
+
+            if not self.interactive:
+                status = "OK" if success else f"FAILED ({message})"
+                threads = f" [{job['threads']} threads]" if job.get('threads') else ""
+                print(f"[{self.done}/{self._total_str()}] {status} {job['path']} -> {job['output_path']}{threads}", flush=True)
+            self._render()
+
+    def close(self):
+        with self._lock:
+            if self.interactive:
+                print()
+            elapsed = time.monotonic() - self.start_time
+            print(f"Converted {self.done - len(self.failures)}/{self.total} file(s) in {elapsed:.1f}s")
+
+    def _total_str(self):
+        return f"{self.total}+" if self.discovering else str(self.total)
+
+    def _render(self):
+        if not self.interactive:
+            return
+
+        self.last_render = time.monotonic()
+        elapsed = self.last_render - self.start_time
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        line = f"[{self.done}/{self._total_str()} done, {len(self.failures)} failed, {rate:.2f} files/s]"
+        for job, progress in self.running.values():
+            percent = f"{progress.percent}%" if progress.percent is not None else "--%"
+            speed = f" {progress.speed:.1f}x" if progress.speed else ""
+            line += f" | {os.path.basename(job['output_path'])} {percent}{speed}"
+
+        width = shutil.get_terminal_size().columns - 1
+        print(f"\r{line[:width]:<{width}}", end='', flush=True)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import asyncio
+import signal
+import threading
+from collections import deque
+
+from src.core.stream_io import StreamIO
+
+class AsyncProcess:
+    """
+    Plumbing shared by the engines' asyncio API.
+
+    Tools run as asyncio subprocesses that are killed (and reaped) when the task awaiting
+    them is cancelled, so cancelling a conversion task is all it takes to stop it.
+    The blocking engine functions run the same coroutines through run_sync().
+    """
+    KILLED = -getattr(signal, "SIGKILL", 9) # Return code reported for tools stopped by a cancel (no SIGKILL on Windows)
+
+    @staticmethod
+    async def start(cmd: list, stdin=None, stdout=None, stderr=asyncio.subprocess.PIPE, pass_fds=()):
+        return await asyncio.create_subprocess_exec(*cmd, stdin=stdin, stdout=stdout, stderr=stderr, pass_fds=pass_fds)
+
+    @staticmethod
+    async def reap(process):
+        """
+        Kills a process that is still running and waits for it. Called when its task is cancelled.
+        """
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+
+    @staticmethod
+    async def run(cmd: list, source=None, sink=None):
+        """
+        Runs a tool to completion. Returns (returncode, stderr_text).
+        source: Optional stream fed to the tool's stdin; sink: optional stream receiving its stdout
+        (anything StreamIO accepts).
+        """
+        stdin, stdout = StreamIO.stdio(source, sink)
+        process = await AsyncProcess.start(cmd, stdin, stdout)
+        transfers = StreamIO.transfers(process, source, sink)
+        try:
+            stderr = await process.stderr.read()
+            await asyncio.gather(*transfers)
+            await process.wait()
+        except BaseException:
+            for task in transfers:
+                task.cancel()
+            await AsyncProcess.reap(process)
+            raise
+        return process.returncode, stderr.decode("utf-8", "replace")
+
+    @staticmethod
+    async def drain(stream, on_line=None, tail_lines: int = 20) -> deque:
+        """
+        Reads a stream to its end, handing each non-empty line to on_line.
+        Returns the last tail_lines lines.
+        """
+        tail = deque(maxlen=tail_lines)
+        async for raw in stream:
+            line = raw.decode("utf-8", "replace").strip()
+            if not line:
+                continue
+            if on_line:
+                on_line(line)
+            tail.append(line)
+        return tail
+
+    @staticmethod
+    def run_sync(coro, process_holder: list = None, cancelled=False):
+        """
+        Runs an engine coroutine to completion on an event loop of the calling thread.
+        process_holder: Optional one-slot list; holder[0] gets a handle whose kill() cancels
+        the coroutine from any thread (what JobScheduler.stop() calls).
+        cancelled: Returned when the coroutine was cancelled that way.
+        """
+        async def main():
+            task = asyncio.current_task()
+            handle = _TaskHandle(asyncio.get_running_loop(), task)
+            if process_holder is not None:
+                process_holder[0] = handle
+            try:
+                return await coro
+            finally:
+                handle.finish()
+
+        try:
+            return asyncio.run(main())
+        except asyncio.CancelledError:
+            return cancelled
+
+class _TaskHandle:
+    """
+    Stands in for a Popen in a process holder: kill() cancels the task running the tool.
+    """
+    def __init__(self, loop, task):
+        self._loop = loop
+        self._task = task
+        self._lock = threading.Lock()
+        self._done = False
+
+    def finish(self):
+        with self._lock:
+            self._done = True
+
+    def kill(self):
+        with self._lock:
+            # Once finished, the loop may already be closed
+            if not self._done:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+
+    def poll(self):
+        with self._lock:
+            return 0 if self._done else None
@@ -0,0 +1,178 @@
+import asyncio
+
+from src.core.file_detector import FileType
+from src.core.image_engine import ImageEngine
+from src.core.qt_image_engine import QtImageEngine
+from src.core.video_engine import VideoEngine
+from src.core.audio_engine import AudioEngine
+from src.core.pdf_engine import PdfEngine
+from src.core.progress import ConversionProgress
+from src.core.scheduler import JobScheduler
+from src.core.thread_budget import ThreadBudget
+
+class AsyncJobScheduler:
+    """
+    asyncio counterpart of JobScheduler for running conversions inside an event loop:
+    a running job costs its tool's process and nothing else, no thread.
+
+    Jobs are the same dicts as JobScheduler's. At most slots[file_type] jobs of each
+    engine (and max_jobs overall) run at once; the rest wait their turn. Every running
+    job gets a share of a ThreadBudget as job['threads']. Cancelling the task awaiting
+    a job kills its tool and frees its slot.
+
+        scheduler = AsyncJobScheduler(max_jobs=4)
+        task = scheduler.start(job)
+        async for progress in task:
+            print(progress)
+        success, message = await task
+    """
+
+    def __init__(self, slots: dict = None, max_jobs: int = None, cache=None):
+        """
+        slots: Optional { FileType: int } overriding the default concurrency per engine.
+        max_jobs: Optional cap on the number of jobs running at once across all engines.
+        cache: Optional ConversionCache consulted before and filled after each conversion.
+        """
+        self.slots = JobScheduler.default_slots()
+        if slots:
+            self.slots.update(slots)
+
+        self.cache = cache
+        self.max_jobs = max_jobs
+        self._job_limit = asyncio.Semaphore(max_jobs) if max_jobs else None
+        self._engine_limits = {file_type: asyncio.Semaphore(max(1, count)) for file_type, count in self.slots.items()}
+        self._budget = ThreadBudget()
+        self._outstanding = {file_type: 0 for file_type in self.slots} # Jobs waiting or running per engine
+
+    @staticmethod
+    async def convert_job(job: dict, progress_cb=None):
+        """
+        Dispatches a single job to its engine's async API, without any limits.
+        Returns (success, error_msg).
+        """
+        input_path = job['path']
+        output_path = job['output_path']
+        preset_data = job['preset']
+        file_type = job['file_type']
+        threads = job.get('threads')
+
+        if file_type == FileType.IMAGE:
+            # The in-process Qt path releases the GIL while it works, so a worker thread does it
+            if QtImageEngine.can_handle(job) and await asyncio.to_thread(QtImageEngine.convert, input_path, output_path,
+                                                                         preset_data):
+                job['engine'] = QtImageEngine.ENGINE # The cache keys the output on the engine that made it
+                return True, ""
+            job['engine'] = ImageEngine.ENGINE
+            success = await ImageEngine.convert_async(input_path, output_path, preset_data, threads)
+            return success, "" if success else "ImageMagick failed"
+        elif file_type == FileType.VIDEO:
+            success = await VideoEngine.convert_async(input_path, output_path, preset_data, progress_cb, threads)
+            return success, "" if success else "FFmpeg failed"
+        elif file_type == FileType.AUDIO:
+            success = await AudioEngine.convert_async(input_path, output_path, preset_data, progress_cb, threads)
+            return success, "" if success else "FFmpeg Audio failed"
+        elif file_type == FileType.PDF:
+            if preset_data.get("action") == "compress":
+                success = await PdfEngine.compress_async(input_path, output_path, preset_data, threads)
+                return success, "" if success else "Ghostscript compression failed"
+            return False, "Action not supported for PDF"
+
+        return True, "Not implemented yet"
+
+    async def convert(self, job: dict, progress_cb=None):
+        """
+        Runs a job once its engine has a free slot. Returns (success, message).
+        progress_cb: Optional callback(job, ConversionProgress), called on the event loop.
+        """
+        file_type = job['file_type'] if job['file_type'] in self._engine_limits else FileType.IMAGE
+        self._outstanding[file_type] += 1
+        try:
+            async with self._engine_limits[file_type]:
+                if self._job_limit is None:
+                    return await self._execute(job, progress_cb)
+                async with self._job_limit:
+                    return await self._execute(job, progress_cb)
+        finally:
+            self._outstanding[file_type] -= 1
+
+    def start(self, job: dict) -> "ConversionTask":
+        """
+        Schedules a job as a task; iterate the returned ConversionTask for progress, await it for the result.
+        """
+        return ConversionTask(self, job)
+
+    def _thread_share(self) -> int:
+        concurrent = sum(min(count, max(1, self.slots[file_type])) for file_type, count in self._outstanding.items())
+        if self.max_jobs:
+            concurrent = min(concurrent, self.max_jobs)
+        return -(-self._budget.total // max(1, concurrent))
+
+    async def _execute(self, job, progress_cb):
+        qt_image = job['file_type'] == FileType.IMAGE and QtImageEngine.can_handle(job)
+        threads = self._budget.acquire(1 if qt_image else self._thread_share())
+        job['threads'] = threads
+
+        job_progress_cb = None
+        if progress_cb:
+            job_progress_cb = lambda p: progress_cb(job, p)
+            progress_cb(job, ConversionProgress(percent=0))
+
+        try:
+            # Cache lookups hash whole files; keep them off the event loop
+            if self.cache is not None and await asyncio.to_thread(self.cache.fetch, job):
+                success, message = True, "Completed (cached)"
+            else:
+                success, message = await AsyncJobScheduler.convert_job(job, job_progress_cb)
+                if success:
+                    message = "Completed"
+                    if self.cache is not None:
+                        await asyncio.to_thread(self.cache.store, job)
+        except Exception as e:
+            success, message = False, str(e)
+        finally:
+            self._budget.release(threads)
+
+        if success and progress_cb:
+            progress_cb(job, ConversionProgress(percent=100, done=True))
+        return success, message
+
+class ConversionTask:
+    """
+    A job running on an AsyncJobScheduler.
+    Iterating it yields ConversionProgress until the job ends; a consumer slower than the
+    tool gets the latest progress each time rather than a backlog. Awaiting it returns
+    (success, message); cancel() stops the conversion.
+    """
+
+    def __init__(self, scheduler: AsyncJobScheduler, job: dict):
+        self.job = job
+        self._latest = None
+        self._changed = asyncio.Event()
+        self._task = asyncio.ensure_future(scheduler.convert(job, self._on_progress))
+        self._task.add_done_callback(lambda _: self._changed.set())
+
+    def _on_progress(self, job, progress):
+        self._latest = progress
+        self._changed.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ConversionProgress:
+        while True:
+            if self._latest is not None:
+                progress, self._latest = self._latest, None
+                return progress
+            if self._task.done():
+                raise StopAsyncIteration
+            self._changed.clear()
+            await self._changed.wait()
+
+    def __await__(self):
+        return self._task.__await__()
+
+    def cancel(self) -> bool:
+        return self._task.cancel()
+
+    def done(self) -> bool:
+        return self._task.done()
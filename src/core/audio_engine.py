@@ -1,75 +1,54 @@
-import subprocess
 import os
 
+from src.core.async_process import AsyncProcess
+from src.core.ffmpeg_runner import FFmpegRunner
+from src.core.stream_io import StreamIO
+
 class AudioEngine:
     @staticmethod
-    def convert(input_path: str, output_path: str, preset: dict, p_holder: list = None, progress_cb=None) -> bool:
+    def convert(input_path, output_path, preset: dict, p_holder: list = None, progress_cb=None,
+                threads: int = None) -> bool:
         """
-        Executes FFmpeg command for audio conversion.
-        p_holder: Optional list acting as a mutable pointer to store the Popen object.
-        progress_cb: Optional callback(int) for progress percentage.
+        Blocking form of convert_async().
+        p_holder: Optional list acting as a mutable pointer; holder[0].kill() stops ffmpeg.
         """
-        cmd = ["ffmpeg", "-y", "-i", input_path] 
-        cmd.extend(["-hide_banner"])
+        return AsyncProcess.run_sync(AudioEngine.convert_async(input_path, output_path, preset, progress_cb, threads),
+                                     p_holder)
+
+    @staticmethod
+    async def convert_async(input_path, output_path, preset: dict, progress_cb=None,
+                            threads: int = None) -> bool:
+        """
+        Executes FFmpeg command for audio conversion. Cancelling the awaiting task kills ffmpeg.
+        input_path, output_path: Paths, or streams (see StreamIO) read from stdin / written to stdout;
+        a stream output is written in the preset's format, else the input's.
+        progress_cb: Optional callback(ConversionProgress) fed from ffmpeg's -progress stream.
+        threads: Optional cap on ffmpeg's threads (default: ffmpeg's auto).
+        """
+        source = None if StreamIO.is_path(input_path) else input_path
+        fmt = StreamIO.output_format(input_path, output_path, preset)
+        if not fmt and not StreamIO.is_path(output_path):
+            print("FFmpeg Audio Error: a stream output needs a preset with a format")
+            return False
+
+        args = FFmpegRunner.thread_args(threads) + ["-i", "pipe:0" if source is not None else input_path]
 
         action = preset.get("action")
         # Audio specific preset options could go here (bitrate, etc.)
         # For now, we rely on the output extension or codec logic if needed.
         
-        cmd.append(output_path)
+        args.extend(FFmpegRunner.thread_args(threads))
         
         try:
             # Check if output directory exists, create if not
-            out_dir = os.path.dirname(output_path)
+            out_dir = os.path.dirname(output_path) if StreamIO.is_path(output_path) else None
             if out_dir and not os.path.exists(out_dir):
                 os.makedirs(out_dir)
 
-            process = subprocess.Popen(cmd, stderr=subprocess.PIPE, universal_newlines=True)
-
-            if p_holder is not None:
-                p_holder[0] = process
+            returncode, stderr = await FFmpegRunner.run_to(args, output_path, fmt, progress_cb, source)
 
-            total_duration = None
-            
-            # Read stderr line by line for progress
-            while True:
-                line = process.stderr.readline()
-                if not line:
-                    break
-                    
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Parse Duration: 00:00:00.00
-                if "Duration:" in line and total_duration is None:
-                    try:
-                        time_str = line.split("Duration:")[1].split(",")[0].strip()
-                        h, m, s = time_str.split(':')
-                        total_duration = float(h) * 3600 + float(m) * 60 + float(s)
-                    except:
-                        pass
-                
-                # Parse time=00:00:00.00
-                if "time=" in line and total_duration:
-                    try:
-                        parts = line.split()
-                        for p in parts:
-                            if p.startswith("time="):
-                                t_str = p.split("=")[1]
-                                h, m, s = t_str.split(':')
-                                current_time = float(h) * 3600 + float(m) * 60 + float(s)
-                                percent = int((current_time / total_duration) * 100)
-                                if progress_cb:
-                                    progress_cb(percent)
-                                break
-                    except:
-                        pass
-
-            process.wait()
-            
-            if process.returncode != 0:
-                print(f"FFmpeg Audio Error: Return code {process.returncode}")
+            if returncode != 0:
+                print(f"FFmpeg Audio Error: Return code {returncode}\n{stderr}")
                 return False
                 
             return True
@@ -77,3 +56,50 @@ class AudioEngine:
         except Exception as e:
             print(f"Exception during audio conversion: {e}")
             return False
+
+    @staticmethod
+    def convert_multi(input_path: str, outputs: list, p_holder: list = None, progress_cb=None, threads: int = None) -> list:
+        """
+        Blocking form of convert_multi_async().
+        p_holder: Optional list acting as a mutable pointer; holder[0].kill() stops ffmpeg.
+        """
+        return AsyncProcess.run_sync(AudioEngine.convert_multi_async(input_path, outputs, progress_cb, threads),
+                                     p_holder, [False] * len(outputs))
+
+    @staticmethod
+    async def convert_multi_async(input_path: str, outputs: list, progress_cb=None, threads: int = None) -> list:
+        """
+        Writes several outputs of one input from a single ffmpeg process (one read and decode).
+        outputs: [(output_path, preset)]. Returns one success flag per output.
+        Outputs the combined run did not write are retried on their own (unless the run was killed).
+        """
+        args = FFmpegRunner.thread_args(threads) + ["-i", input_path]
+        for output_path, _ in outputs:
+            out_dir = os.path.dirname(output_path)
+            if out_dir and not os.path.exists(out_dir):
+                os.makedirs(out_dir)
+            args.extend(FFmpegRunner.thread_args(max(1, threads // len(outputs)) if threads else None))
+            args.append(output_path)
+
+        try:
+            returncode, stderr = await FFmpegRunner.run_async(args, progress_cb)
+        except Exception as e:
+            print(f"Exception during audio conversion: {e}")
+            returncode, stderr = 1, ""
+
+        if returncode < 0:
+            return [False] * len(outputs) # Killed (cancelled); don't start the retries
+        if returncode != 0:
+            print(f"FFmpeg Audio Error: Return code {returncode}, retrying each output\n{stderr}")
+
+        # Outputs the combined run did not write are retried on their own
+        return [(returncode == 0 and AudioEngine._has_output(output_path))
+                or await AudioEngine.convert_async(input_path, output_path, preset, progress_cb, threads)
+                for output_path, preset in outputs]
+
+    @staticmethod
+    def _has_output(output_path: str) -> bool:
+        try:
+            return os.path.getsize(output_path) > 0
+        except OSError:
+            return False
@@ -0,0 +1,268 @@
+import os
+import json
+import shutil
+import sqlite3
+import hashlib
+import subprocess
+import threading
+import time
+
+from src.core.file_detector import FileType
+from src.core.qt_image_engine import QtImageEngine
+
+class ConversionCache:
+    """
+    Opt-in, content-addressed store of finished conversions.
+
+    Entries are keyed on the input's content hash, the preset's effective
+    parameters, the converting tool and its version, and the output extension.
+    Images may be converted by Qt or ImageMagick, which don't produce identical files.
+    A hit materialises the stored output at the job's output path by copy (a reflink
+    where the filesystem supports one) instead of running the engine again.
+    Hard links are opt-in: they save the space of the copies, but every output served
+    from an entry then shares its inode, so editing one output in place changes the
+    cache entry and all the others with it.
+    Least recently used entries are evicted once the cache outgrows max_size.
+    """
+    DEFAULT_MAX_SIZE = 2 * 1024 ** 3 # 2 GB
+    FICLONE = 0x40049409 # Linux ioctl cloning a whole file
+
+    # Command used to fingerprint the tool behind each engine
+    VERSION_COMMANDS = {
+        FileType.IMAGE: ["convert", "-version"],
+        FileType.VIDEO: ["ffmpeg", "-version"],
+        FileType.AUDIO: ["ffmpeg", "-version"],
+        FileType.PDF: ["gs", "--version"],
+    }
+
+    _versions = {}
+    _versions_lock = threading.Lock()
+
+    def __init__(self, cache_dir: str = None, max_size: int = None, link: bool = False):
+        """
+        cache_dir: Where entries live (defaults to $XDG_CACHE_HOME/fileconverter/conversions).
+        max_size: Total size in bytes kept before evicting least recently used entries.
+        link: Store outputs and materialise hits with hard links when possible, instead of copies.
+        """
+        self.cache_dir = cache_dir or ConversionCache.default_dir()
+        self.max_size = max_size or ConversionCache.DEFAULT_MAX_SIZE
+        self.link = link
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._digests = {} # (path, size, mtime_ns, inode) -> content hash
+        self._db = sqlite3.connect(os.path.join(self.cache_dir, "index.sqlite"), check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, file TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def default_dir() -> str:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        return os.path.join(base, "fileconverter", "conversions")
+
+    @staticmethod
+    def from_env():
+        """
+        Returns a cache when FILECONVERTER_CACHE=1 is set, otherwise None.
+        FILECONVERTER_CACHE_DIR and FILECONVERTER_CACHE_MAX_SIZE (e.g. "5G") override the defaults;
+        FILECONVERTER_CACHE_LINK=1 turns on hard links.
+        """
+        if os.environ.get("FILECONVERTER_CACHE", "") not in ("1", "true", "yes"):
+            return None
+        max_size = os.environ.get("FILECONVERTER_CACHE_MAX_SIZE")
+        return ConversionCache(os.environ.get("FILECONVERTER_CACHE_DIR"),
+                               ConversionCache.parse_size(max_size) if max_size else None,
+                               os.environ.get("FILECONVERTER_CACHE_LINK", "") in ("1", "true", "yes"))
+
+    @staticmethod
+    def parse_size(text: str) -> int:
+        """
+        Parses sizes like "500M", "2G" or "1048576" into bytes.
+        """
+        text = text.strip().upper().rstrip("B")
+        units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+
+    @classmethod
+    def engine_version(cls, file_type: FileType) -> str:
+        with cls._versions_lock:
+            if file_type in cls._versions:
+                return cls._versions[file_type]
+
+        version = "unknown"
+        cmd = cls.VERSION_COMMANDS.get(file_type)
+        if cmd:
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True)
+                lines = result.stdout.strip().splitlines()
+                if lines:
+                    version = lines[0]
+            except Exception:
+                pass
+
+        with cls._versions_lock:
+            cls._versions[file_type] = version
+        return version
+
+    @staticmethod
+    def _engine_for(job: dict) -> str:
+        """
+        The tool version behind a job's output: the engine that ran (job['engine'], set by
+        the scheduler), or before running, the one that will be tried.
+        """
+        if job['file_type'] == FileType.IMAGE:
+            engine = job.get('engine') or (QtImageEngine.ENGINE if QtImageEngine.can_handle(job) else None)
+            if engine == QtImageEngine.ENGINE:
+                return QtImageEngine.version()
+        return ConversionCache.engine_version(job['file_type'])
+
+    def _content_hash(self, path: str) -> str:
+        st = os.stat(path)
+        stat_key = (path, st.st_size, st.st_mtime_ns, st.st_ino)
+        with self._lock:
+            digest = self._digests.get(stat_key)
+        if digest:
+            return digest
+
+        h = hashlib.blake2b(digest_size=32)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(block)
+        digest = h.hexdigest()
+
+        with self._lock:
+            self._digests[stat_key] = digest
+        return digest
+
+    def key_for(self, job: dict) -> str:
+        parts = {
+            "input": self._content_hash(job['path']),
+            "preset": job['preset'],
+            "engine": ConversionCache._engine_for(job),
+            "ext": os.path.splitext(job['output_path'])[1].lower(),
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def _entry_path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ext)
+
+    def fetch(self, job: dict) -> bool:
+        """
+        Materialises a cached result at job['output_path']. Returns True on a hit.
+        """
+        try:
+            key = self.key_for(job)
+        except OSError:
+            return False
+
+        with self._lock:
+            row = self._db.execute("SELECT file FROM entries WHERE key = ?", (key,)).fetchone()
+        if not row or not os.path.exists(row[0]):
+            return False
+
+        try:
+            ConversionCache._place(row[0], job['output_path'], self.link)
+        except OSError as e:
+            print(f"Cache Error: {e}")
+            return False
+
+        with self._lock, self._db:
+            self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return True
+
+    def store(self, job: dict):
+        """
+        Adds a finished job's output to the cache, then evicts down to max_size.
+        """
+        output_path = job['output_path']
+        try:
+            key = self.key_for(job)
+            entry_path = self._entry_path(key, os.path.splitext(output_path)[1].lower())
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            ConversionCache._place(output_path, entry_path, self.link)
+            size = os.path.getsize(entry_path)
+        except OSError as e:
+            print(f"Cache Error: {e}")
+            return
+
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                             (key, entry_path, size, time.time()))
+        self.evict()
+
+    @staticmethod
+    def _place(src: str, dst: str, link: bool):
+        # Write under a temporary name first so readers never see a partial file
+        out_dir = os.path.dirname(dst)
+        if out_dir and not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+
+        tmp_path = f"{dst}.part{os.getpid()}-{threading.get_ident()}"
+        try:
+            if link:
+                try:
+                    os.link(src, tmp_path)
+                except OSError:
+                    ConversionCache._copy(src, tmp_path)
+            else:
+                ConversionCache._copy(src, tmp_path)
+            os.replace(tmp_path, dst)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _copy(src: str, dst: str):
+        # A reflink (Btrfs, XFS, ...) shares blocks copy-on-write: as cheap as a link, but independent files
+        try:
+            import fcntl
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), ConversionCache.FICLONE, fsrc.fileno())
+            return
+        except (ImportError, OSError):
+            pass
+        shutil.copyfile(src, dst)
+
+    def evict(self, max_size: int = None):
+        """
+        Removes least recently used entries until the cache fits in max_size bytes.
+        """
+        limit = self.max_size if max_size is None else max_size
+        with self._lock, self._db:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= limit:
+                return
+            rows = self._db.execute("SELECT key, file, size FROM entries ORDER BY last_used").fetchall()
+            for key, path, size in rows:
+                if total <= limit:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Cache Error: {e}")
+                    continue
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+
+    def purge(self):
+        self.evict(0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total, oldest = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(last_used) FROM entries"
+            ).fetchone()
+        return {
+            "dir": self.cache_dir,
+            "entries": count,
+            "size_bytes": total,
+            "max_size_bytes": self.max_size,
+            "oldest_use": oldest,
+        }
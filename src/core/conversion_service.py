@@ -0,0 +1,447 @@
+import os
+import hmac
+import json
+import time
+import uuid
+import secrets
+import shutil
+import socket
+import tempfile
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from src.core.file_detector import FileDetector, FileType
+from src.core.output_names import OutputNames
+from src.core.preset_manager import PresetManager
+from src.core.scheduler import JobScheduler
+
+class ConversionService:
+    """
+    Headless conversion server (cli.py --serve) so other local programs can convert
+    files without starting Python for every call. Jobs run on a JobScheduler; at most
+    max_jobs + queue_size are accepted at once and further submissions get 503.
+
+        POST   /jobs?filename=NAME[&preset=NAME]  Body is the input, streamed to disk (Content-Length or chunked)
+        POST   /jobs?path=PATH[&preset=NAME]      Converts a file on this machine; the output goes next to it.
+                                                  Only under allowed_roots, with "Authorization: Bearer TOKEN"
+        GET    /jobs/ID                           Status and progress (JSON)
+        GET    /jobs/ID/result                    The output file
+        DELETE /jobs/ID                           Cancels the job; an upload's files are deleted
+        GET    /presets[?type=IMAGE]              Preset names per file type
+
+    Without a preset the first usable preset of the file's type is used, as in the CLI.
+    Finished jobs are forgotten, and an upload's files deleted, after RESULT_TTL seconds.
+
+    Any local process (and any web page, through the browser) can reach a local port, so
+    converting files in place is off unless roots are given, and then needs the server's
+    token. Requests carrying an Origin header come from a browser and are refused.
+    """
+    CHUNK_SIZE = 1024 ** 2
+    RESULT_TTL = 3600 # seconds
+    DEFAULT_QUEUE_SIZE = 64
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, max_jobs: int, queue_size: int = None, cache=None, spool_dir: str = None,
+                 allowed_roots=None, token: str = None):
+        """
+        max_jobs: Jobs converting at once.
+        queue_size: Jobs waiting for a free slot beyond those (default: DEFAULT_QUEUE_SIZE).
+        cache: Optional ConversionCache.
+        spool_dir: Where uploads and their outputs are kept (default: a new temporary directory).
+        allowed_roots: Directories whose files path= jobs may convert; without any only uploads are accepted.
+        token: Secret path= jobs must present (default: a new random one, see self.token).
+        """
+        self.max_jobs = max_jobs
+        self.allowed_roots = [os.path.realpath(root) for root in allowed_roots or ()]
+        self.token = token or secrets.token_urlsafe(32)
+        self.queue_size = ConversionService.DEFAULT_QUEUE_SIZE if queue_size is None else queue_size
+        self.spool_dir = spool_dir or tempfile.mkdtemp(prefix="fileconverter-serve-")
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+        slots = {file_type: max_jobs for file_type in JobScheduler.default_slots()}
+        self.scheduler = JobScheduler(slots, max_jobs=max_jobs, cache=cache)
+        self._lock = threading.Lock()
+        self._jobs = {} # id -> job dict, plus 'state', 'progress', 'message', 'upload_dir', 'names' and 'finished_at'
+        self._accepted = 0 # Jobs queued or running
+
+    def has_room(self) -> bool:
+        with self._lock:
+            return self._accepted < self.max_jobs + self.queue_size
+
+    def reserve(self) -> bool:
+        """
+        Takes a place in the queue before a job's upload is read. Returns False when the queue is full.
+        """
+        with self._lock:
+            if self._accepted >= self.max_jobs + self.queue_size:
+                return False
+            self._accepted += 1
+            return True
+
+    def unreserve(self):
+        with self._lock:
+            self._accepted -= 1
+
+    def authorize_path(self, path: str, authorization: str):
+        """
+        Checks a path= job. Returns (real input path, "", 0), or (None, error, HTTP status).
+        """
+        if not self.allowed_roots:
+            return None, "path= is disabled; start the server with --serve-root or upload the file", 403
+        if not hmac.compare_digest((authorization or "").encode(), f"Bearer {self.token}".encode()):
+            return None, "path= needs the server's token (Authorization: Bearer TOKEN)", 401
+        # Symlinks are resolved, so a link inside a root can't reach a file outside it
+        real_path = os.path.realpath(path)
+        if not any(os.path.commonpath([real_path, root]) == root for root in self.allowed_roots):
+            return None, "Path is outside the allowed roots", 403
+        return real_path, "", 0
+
+    def new_upload_dir(self) -> str:
+        return tempfile.mkdtemp(dir=self.spool_dir)
+
+    def submit(self, input_path: str, preset_name: str = None, upload_dir: str = None):
+        """
+        Resolves and queues a job on a place taken with reserve().
+        upload_dir: The directory holding an uploaded input; the output is written there too.
+        Returns (job, error, status); job is None on error, and the place is given back.
+        """
+        job, error, status = ConversionService._resolve(input_path, preset_name)
+        if job is None:
+            self.unreserve()
+            return None, error, status
+
+        # A fresh index per request: a long-lived one would keep the listing of every directory ever
+        # written to, and go stale. Placeholders claimed on disk keep concurrent requests apart.
+        names = OutputNames()
+        job.update({
+            'id': uuid.uuid4().hex,
+            'output_path': job['plan'].output_path(input_path, names),
+            'state': ConversionService.QUEUED,
+            'progress': None,
+            'message': "",
+            'upload_dir': upload_dir,
+            'names': names,
+            'finished_at': None,
+        })
+
+        self._prune()
+        with self._lock:
+            self._jobs[job['id']] = job
+        self.scheduler.submit(job, self._on_progress, self._on_finished)
+        return job, "", 202
+
+    @staticmethod
+    def _resolve(input_path: str, preset_name: str = None):
+        if not os.path.isfile(input_path):
+            return None, f"File not found: {input_path}", 404
+
+        file_type = FileDetector.detect(input_path)
+        if file_type == FileType.UNKNOWN:
+            return None, f"Unknown file type for {os.path.basename(input_path)}", 415
+
+        plans = PresetManager.get_plans(file_type)
+        if not preset_name:
+            preset_name = next((name for name, plan in plans.items() if not plan.error), None)
+            if not preset_name:
+                return None, "No presets available for this file type", 400
+
+        plan = plans.get(preset_name)
+        if plan is None:
+            return None, f"Preset '{preset_name}' not found for type {file_type.name}", 400
+        if plan.error:
+            return None, plan.error, 400
+
+        return {'path': input_path, 'file_type': file_type, 'preset': plan.preset, 'plan': plan}, "", 202
+
+    def _on_progress(self, job, progress):
+        job['state'] = ConversionService.RUNNING
+        job['progress'] = progress
+
+    def _on_finished(self, job, success, message):
+        if success:
+            job['names'].written(job['output_path'])
+            job['state'] = ConversionService.DONE
+        else:
+            job['names'].release(job['output_path'])
+            job['state'] = ConversionService.CANCELLED if message == "Cancelled" else ConversionService.FAILED
+        job['message'] = message
+        job['finished_at'] = time.monotonic()
+        self.unreserve()
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancels a queued or running job and forgets it. Returns False for unknown ids.
+        """
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        if job['finished_at'] is None:
+            self.scheduler.cancel(job)
+        if job['upload_dir']:
+            # A cancelled tool may still be exiting; whatever it leaves goes with the directory
+            shutil.rmtree(job['upload_dir'], ignore_errors=True)
+        return True
+
+    def _prune(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job['finished_at'] is not None and now - job['finished_at'] > ConversionService.RESULT_TTL]
+            for job in expired:
+                del self._jobs[job['id']]
+        for job in expired:
+            if job['upload_dir']:
+                shutil.rmtree(job['upload_dir'], ignore_errors=True)
+
+    @staticmethod
+    def status(job: dict) -> dict:
+        progress = job['progress']
+        status = {
+            'id': job['id'],
+            'state': job['state'],
+            'preset': job['plan'].name,
+            'input': os.path.basename(job['path']) if job['upload_dir'] else job['path'],
+            'output': os.path.basename(job['output_path']) if job['upload_dir'] else job['output_path'],
+            'percent': progress.percent if progress else None,
+            'details': progress.details() if progress else "",
+            'message': job['message'],
+        }
+        if job['state'] == ConversionService.DONE:
+            status['result'] = f"/jobs/{job['id']}/result"
+        return status
+
+    def close(self):
+        self.scheduler.stop()
+        self.scheduler.shutdown()
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    @staticmethod
+    def parse_address(address: str):
+        """
+        "HOST:PORT", "PORT" or a UNIX socket path ("unix:PATH", or anything with a "/").
+        Returns (socket family, address).
+        """
+        if address.startswith("unix:") or "/" in address:
+            if not hasattr(socket, "AF_UNIX"):
+                raise ValueError("UNIX sockets are not supported on this platform")
+            return socket.AF_UNIX, address[len("unix:"):] if address.startswith("unix:") else address
+        host, _, port = address.rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+    def make_server(self, address: str):
+        """
+        Creates the HTTP server for an address accepted by parse_address(). Call serve_forever() on it.
+        """
+        family, server_address = ConversionService.parse_address(address)
+        if family == getattr(socket, "AF_UNIX", None):
+            if os.path.exists(server_address):
+                os.remove(server_address) # Left behind by a server that didn't shut down cleanly
+            server = _UnixHTTPServer(server_address, _RequestHandler)
+        else:
+            server = ThreadingHTTPServer(server_address, _RequestHandler)
+        server.daemon_threads = True
+        server.service = self
+        return server
+
+class _UnixHTTPServer(ThreadingHTTPServer):
+    address_family = getattr(socket, "AF_UNIX", None) # Missing on Windows, where only TCP is served
+
+    def server_bind(self):
+        # HTTPServer.server_bind expects a (host, port) address
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, so callers can reuse a connection for many requests
+    server_version = "FileConverter"
+
+    def address_string(self):
+        # UNIX socket clients have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def log_request(self, code="-", size="-"):
+        pass # Errors are still logged; one line per request would flood a busy server's output
+
+    def handle_expect_100(self):
+        # Clients that wait for "100 Continue" learn that the queue is full before sending their upload
+        if self.command == "POST" and not self.server.service.has_room():
+            self._send_busy()
+            return False
+        return super().handle_expect_100()
+
+    def parse_request(self):
+        if not super().parse_request():
+            return False
+        # Browsers send Origin on cross-site requests, even "no-cors" ones; no legitimate caller here is a web page
+        if self.headers.get("Origin") is not None:
+            self.close_connection = True
+            self._send_json(403, {'error': "Requests from web pages are not accepted"})
+            return False
+        return True
+
+    def do_GET(self):
+        parts, query = self._route()
+        service = self.server.service
+        if parts == ["presets"]:
+            types = [query["type"].upper()] if "type" in query else [t.name for t in FileType if t != FileType.UNKNOWN]
+            presets = {}
+            for type_name in types:
+                if type_name in FileType.__members__:
+                    presets[type_name] = [name for name, plan in PresetManager.get_plans(FileType[type_name]).items()
+                                          if not plan.error]
+            return self._send_json(200, presets)
+
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = service.get(parts[1])
+            if job is None:
+                return self._send_json(404, {'error': "No such job"})
+            if len(parts) == 2:
+                return self._send_json(200, ConversionService.status(job))
+            if parts[2] == "result":
+                return self._send_result(job)
+        self._send_json(404, {'error': "Not found"})
+
+    def do_POST(self):
+        parts, query = self._route()
+        if parts != ["jobs"]:
+            self.close_connection = True # The body, if any, is not read
+            return self._send_json(404, {'error': "Not found"})
+
+        service = self.server.service
+        if "path" not in query and "filename" not in query:
+            self.close_connection = True
+            return self._send_json(400, {'error': "Give path= (a file on this machine) or filename= (uploaded as the body)"})
+        if "path" in query:
+            input_path, error, status = service.authorize_path(query["path"], self.headers.get("Authorization"))
+            if input_path is None:
+                self.close_connection = True
+                return self._send_json(status, {'error': error})
+        if not service.reserve():
+            return self._send_busy()
+
+        upload_dir = None
+        try:
+            if "path" in query:
+                self._discard_body()
+            else:
+                filename = os.path.basename(query["filename"])
+                if not filename or filename in (".", ".."):
+                    raise ValueError("Invalid filename")
+                upload_dir = service.new_upload_dir()
+                input_path = os.path.join(upload_dir, filename)
+                with open(input_path, "wb") as f:
+                    self._read_body(f)
+        except (ValueError, OSError) as e:
+            service.unreserve()
+            if upload_dir:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+            self.close_connection = True
+            return self._send_json(400, {'error': f"Upload failed: {e}"})
+
+        job, error, status = service.submit(input_path, query.get("preset"), upload_dir)
+        if job is None:
+            if upload_dir:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+            return self._send_json(status, {'error': error})
+        self._send_json(202, ConversionService.status(job), {'Location': f"/jobs/{job['id']}"})
+
+    def do_DELETE(self):
+        parts, _ = self._route()
+        if len(parts) == 2 and parts[0] == "jobs" and self.server.service.cancel(parts[1]):
+            return self._send_json(200, {'id': parts[1], 'state': ConversionService.CANCELLED})
+        self._send_json(404, {'error': "No such job"})
+
+    def _route(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return [part for part in url.path.split("/") if part], query
+
+    def _read_body(self, out):
+        """
+        Copies the request body to out a chunk at a time, from either framing.
+        """
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size_line = self.rfile.readline(1024)
+                try:
+                    size = int(size_line.split(b";", 1)[0].strip(), 16)
+                except ValueError:
+                    raise ValueError("Malformed chunked body")
+                if size == 0:
+                    while self.rfile.readline(1024) not in (b"\r\n", b"\n", b""):
+                        pass # Trailers
+                    return
+                self._copy_body(out, size)
+                self.rfile.readline(1024)
+        else:
+            length = self.headers.get("Content-Length")
+            if length is None:
+                raise ValueError("Content-Length or chunked transfer encoding required")
+            self._copy_body(out, int(length))
+
+    def _copy_body(self, out, remaining: int):
+        while remaining > 0:
+            chunk = self.rfile.read(min(ConversionService.CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ValueError("Upload ended early")
+            if out is not None:
+                out.write(chunk)
+            remaining -= len(chunk)
+
+    def _discard_body(self):
+        if self.headers.get("Transfer-Encoding") or int(self.headers.get("Content-Length") or 0):
+            self._read_body(None)
+
+    def _send_result(self, job):
+        if job['state'] != ConversionService.DONE:
+            return self._send_json(409, {'error': f"Job is {job['state']}", 'state': job['state']})
+        try:
+            f = open(job['output_path'], "rb")
+        except OSError as e:
+            return self._send_json(410, {'error': f"Output is gone: {e}"})
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            name = os.path.basename(job['output_path']).replace('"', "")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(size))
+            self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+            self.end_headers()
+            # Straight from the page cache to the socket
+            self.connection.sendfile(f)
+
+    def _send_busy(self):
+        self.close_connection = True # The upload was not read
+        self._send_json(503, {'error': "Queue is full"}, {'Retry-After': "1"})
+
+    def _send_json(self, code: int, data: dict, headers: dict = None):
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,99 @@
+import os
+import re
+import glob
+from fnmatch import fnmatch
+
+from src.core.file_detector import FileDetector, FileType
+from src.core.preset_plan import PresetPlan
+
+class FileDiscovery:
+    """
+    Expands files, directories and glob patterns into a lazy stream of file paths.
+    Directories are walked with os.scandir one level at a time, so conversion can
+    start on the first files while a large tree is still being walked and the
+    full listing is never held in memory.
+    """
+
+    GLOB_CHARS = set("*?[")
+    # Names PresetPlan gives outputs: "<name>_converted<ext>", "<name>_converted(2)<ext>", ...
+    CONVERTED_NAME = re.compile(re.escape(PresetPlan.OUTPUT_SUFFIX) + r"(\(\d+\))?$")
+
+    @staticmethod
+    def _matches(path: str, patterns) -> bool:
+        name = os.path.basename(path)
+        return any(fnmatch(name, p) or fnmatch(path, p) for p in patterns)
+
+    @staticmethod
+    def iter_files(inputs, recursive: bool = True, include=None, exclude=None, known_only: bool = True, skip=None,
+                   with_types: bool = False, skip_converted: bool = True):
+        """
+        Yields file paths from inputs (files, directories or glob patterns).
+        recursive: Descend into subdirectories of directory inputs.
+        include: Optional fnmatch patterns; discovered files must match one (name or path).
+        exclude: Optional fnmatch patterns; matching files and directories are skipped.
+        known_only: Skip discovered files whose type FileDetector does not recognise.
+        skip: Optional predicate for discovered files to pass over, e.g. OutputNames.issued so a run
+              walking the directories it writes into doesn't pick up its own outputs.
+        with_types: Yield (path, FileType) pairs so callers don't detect each file again. The type is
+                    None for explicitly named files, which are yielded unchecked.
+        skip_converted: Skip discovered files named like outputs of an earlier run ("x_converted.png",
+                        "x_converted(1).png"), so converting a directory again doesn't convert those too.
+        Explicitly named files are always yielded, even if they don't exist, so callers can report them.
+        """
+        include = list(include or [])
+        exclude = list(exclude or [])
+
+        def accept(path):
+            # The file's type if it is to be yielded, else None
+            if include and not FileDiscovery._matches(path, include):
+                return None
+            if exclude and FileDiscovery._matches(path, exclude):
+                return None
+            if skip is not None and skip(path):
+                return None
+            if skip_converted and FileDiscovery.CONVERTED_NAME.search(os.path.splitext(os.path.basename(path))[0]):
+                return None
+            if not (known_only or with_types):
+                return FileType.UNKNOWN # Nobody looks at the type; skip detecting it
+            file_type = FileDetector.detect(path)
+            return file_type if file_type != FileType.UNKNOWN or not known_only else None
+
+        def found(path, file_type):
+            return (path, file_type) if with_types else path
+
+        for item in inputs:
+            if os.path.isdir(item):
+                for path, file_type in FileDiscovery._walk(item, recursive, exclude, accept):
+                    yield found(path, file_type)
+            elif FileDiscovery.GLOB_CHARS & set(item) and not os.path.exists(item):
+                for match in glob.iglob(item, recursive=True):
+                    if os.path.isdir(match):
+                        for path, file_type in FileDiscovery._walk(match, recursive, exclude, accept):
+                            yield found(path, file_type)
+                    elif os.path.isfile(match):
+                        file_type = accept(match)
+                        if file_type is not None:
+                            yield found(match, file_type)
+            else:
+                yield found(item, None)
+
+    @staticmethod
+    def _walk(root: str, recursive: bool, exclude, accept):
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if recursive and not (exclude and FileDiscovery._matches(entry.path, exclude)):
+                                    stack.append(entry.path)
+                            elif entry.is_file():
+                                file_type = accept(entry.path)
+                                if file_type is not None:
+                                    yield entry.path, file_type
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"Cannot read directory {directory}: {e}")
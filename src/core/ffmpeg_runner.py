@@ -0,0 +1,190 @@
+import os
+import asyncio
+
+from src.core.async_process import AsyncProcess
+from src.core.stream_io import StreamIO
+from src.core.progress import ConversionProgress
+
+class FFmpegRunner:
+    """
+    Runs ffmpeg with its machine-readable progress stream (-progress pipe:1)
+    and turns each progress block into a ConversionProgress.
+    run_async() is the asyncio form; run() blocks until ffmpeg exits.
+    """
+    BASE_CMD = ["ffmpeg", "-y", "-hide_banner", "-nostats", "-progress", "pipe:1"]
+
+    # Formats whose muxer goes back to patch the header or writes an index at the end:
+    # written to a pipe they come out incomplete, so stream outputs go through a temporary file
+    SEEKABLE_FORMATS = {"mp4", "mov", "m4a", "avi", "mkv", "webm", "wav", "flac"}
+    # -f names for stream outputs whose extension isn't the muxer's name
+    MUXERS = {"mkv": "matroska", "aac": "adts", "m4a": "ipod", "ts": "mpegts", "opus": "ogg"}
+
+    @staticmethod
+    def thread_args(threads: int = None) -> list:
+        """
+        -threads for the position it is placed at (before -i: decoder, before an output: encoder).
+        """
+        return ["-threads", str(threads)] if threads else []
+
+    @staticmethod
+    def pipe_output(fmt: str) -> list:
+        """
+        Output arguments writing fmt to stdout, or None if fmt needs a seekable output.
+        Also None outside POSIX: progress then can't move to another pipe (no pass_fds).
+        """
+        if fmt in FFmpegRunner.SEEKABLE_FORMATS or os.name != "posix":
+            return None
+        return ["-f", FFmpegRunner.MUXERS.get(fmt, fmt), "pipe:1"]
+
+    @staticmethod
+    async def run_to(args: list, output, fmt: str, progress_cb=None, source=None):
+        """
+        run_async() writing to output: a path, or a stream fed from ffmpeg's stdout.
+        fmt: The output's format; one needing a seekable output goes through a temporary file.
+        Returns (returncode, stderr_tail).
+        """
+        if StreamIO.is_path(output):
+            return await FFmpegRunner.run_async(args + [output], progress_cb, source=source)
+
+        pipe_args = FFmpegRunner.pipe_output(fmt)
+        if pipe_args:
+            return await FFmpegRunner.run_async(args + pipe_args, progress_cb, source=source, sink=output)
+
+        temp_path = StreamIO.temp_output(fmt)
+        try:
+            returncode, stderr = await FFmpegRunner.run_async(args + [temp_path], progress_cb, source=source)
+            if returncode == 0:
+                await StreamIO.deliver(temp_path, output)
+            return returncode, stderr
+        finally:
+            StreamIO.discard(temp_path)
+
+    @staticmethod
+    def run(args: list, p_holder: list = None, progress_cb=None, duration: float = None):
+        """
+        Blocking form of run_async().
+        p_holder: Optional list acting as a mutable pointer; holder[0].kill() stops ffmpeg.
+        Returns (returncode, stderr_tail); returncode is negative when ffmpeg was killed.
+        """
+        return AsyncProcess.run_sync(FFmpegRunner.run_async(args, progress_cb, duration), p_holder,
+                                     (AsyncProcess.KILLED, ""))
+
+    @staticmethod
+    async def run_async(args: list, progress_cb=None, duration: float = None, source=None, sink=None):
+        """
+        args: ffmpeg arguments after the common flags (inputs, options, outputs).
+        progress_cb: Optional callback(ConversionProgress).
+        duration: Input duration in seconds; read from ffmpeg's header when not given.
+        source: Optional stream (see StreamIO) for an input given as "pipe:0".
+        sink: Optional stream for an output given as "pipe:1"; progress then moves to another pipe (POSIX only).
+        Cancelling the awaiting task kills ffmpeg.
+        Returns (returncode, stderr_tail).
+        """
+        if sink is not None and os.name != "posix":
+            raise ValueError("ffmpeg can only write to a stream sink on POSIX; use run_to()")
+        cmd = FFmpegRunner.BASE_CMD + args
+        stdin, stdout = StreamIO.stdio(source, sink)
+        progress_pipe = None
+        if sink is None:
+            process = await AsyncProcess.start(cmd, stdin, asyncio.subprocess.PIPE)
+            progress_stream = process.stdout
+        else:
+            read_fd, write_fd = os.pipe()
+            try:
+                cmd[cmd.index("pipe:1")] = f"pipe:{write_fd}"
+                process = await AsyncProcess.start(cmd, stdin, stdout, pass_fds=(write_fd,))
+            except BaseException:
+                os.close(read_fd)
+                raise
+            finally:
+                os.close(write_fd)
+            progress_stream = asyncio.StreamReader()
+            progress_pipe, _ = await asyncio.get_running_loop().connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(progress_stream), os.fdopen(read_fd, "rb"))
+        transfers = StreamIO.transfers(process, source, sink)
+
+        header = {"duration": duration}
+
+        def on_header(line):
+            # Duration: 00:01:02.50, start: 0.000000, bitrate: 1234 kb/s
+            if header["duration"] is None and line.startswith("Duration:"):
+                header["duration"] = FFmpegRunner._parse_clock(line[len("Duration:"):].split(",")[0])
+
+        # -nostats leaves only the header and errors on stderr; drain it alongside so it can't block ffmpeg
+        stderr_task = asyncio.ensure_future(AsyncProcess.drain(process.stderr, on_header))
+        try:
+            block = {}
+            async for raw in progress_stream:
+                key, sep, value = raw.decode("utf-8", "replace").strip().partition("=")
+                if not sep:
+                    continue
+                if key != "progress":
+                    block[key] = value
+                    continue
+
+                if progress_cb:
+                    progress_cb(FFmpegRunner._parse_block(block, header["duration"], value == "end"))
+                block = {}
+
+            await asyncio.gather(*transfers)
+            await process.wait()
+            stderr_tail = await stderr_task
+        except BaseException:
+            stderr_task.cancel()
+            for task in transfers:
+                task.cancel()
+            await AsyncProcess.reap(process)
+            raise
+        finally:
+            if progress_pipe is not None:
+                progress_pipe.close()
+        return process.returncode, "\n".join(stderr_tail)
+
+    @staticmethod
+    def _parse_clock(text):
+        try:
+            h, m, s = text.strip().split(":")
+            return int(h) * 3600 + int(m) * 60 + float(s)
+        except ValueError:
+            # "N/A" for streams without a known duration
+            return None
+
+    @staticmethod
+    def _parse_number(text, suffix=""):
+        if text is None:
+            return None
+        text = text.strip()
+        if suffix and text.endswith(suffix):
+            text = text[:-len(suffix)]
+        try:
+            return float(text)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_block(block, duration, done):
+        out_time_us = FFmpegRunner._parse_number(block.get("out_time_us"))
+        out_time = out_time_us / 1_000_000 if out_time_us is not None and out_time_us >= 0 else None
+        speed = FFmpegRunner._parse_number(block.get("speed"), "x")
+        total_size = FFmpegRunner._parse_number(block.get("total_size"))
+
+        percent = None
+        eta = None
+        if duration:
+            if done:
+                percent = 100
+            elif out_time is not None:
+                percent = max(0, min(100, int(out_time / duration * 100)))
+                if speed:
+                    eta = max(0.0, (duration - out_time) / speed)
+
+        return ConversionProgress(
+            percent=percent,
+            out_time=out_time,
+            fps=FFmpegRunner._parse_number(block.get("fps")),
+            speed=speed,
+            total_size=int(total_size) if total_size is not None else None,
+            bitrate=FFmpegRunner._parse_number(block.get("bitrate"), "kbits/s"),
+            eta=eta,
+            done=done
+        )
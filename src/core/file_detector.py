@@ -1,4 +1,5 @@
 import os
+from collections import deque
 from enum import Enum, auto
 
 class FileType(Enum):
@@ -14,8 +15,36 @@ class FileDetector:
     PDF_EXTS = {'.pdf'}
     AUDIO_EXTS = {'.mp3', '.wav', '.flac', '.ogg', '.aac', '.m4a', '.wma'}
 
+    # Content sniffing: when enabled, detect() trusts the file's magic bytes over its extension
+    sniff_content = os.environ.get("FILECONVERTER_SNIFF", "") in ("1", "true", "yes")
+    HEADER_SIZE = 512
+    # Upper bound for the one extra read used to find an MP4 'moov' box that starts in the header
+    MP4_MOOV_READ = 64 * 1024
+
+    FORMAT_TYPES = {
+        'jpeg': FileType.IMAGE, 'png': FileType.IMAGE, 'gif': FileType.IMAGE, 'webp': FileType.IMAGE,
+        'bmp': FileType.IMAGE, 'tiff': FileType.IMAGE,
+        'pdf': FileType.PDF,
+        'mp4': FileType.VIDEO, 'mov': FileType.VIDEO, 'mkv': FileType.VIDEO, 'webm': FileType.VIDEO,
+        'avi': FileType.VIDEO, 'mpegts': FileType.VIDEO, 'mpeg': FileType.VIDEO, 'flv': FileType.VIDEO,
+        'ogv': FileType.VIDEO,
+        'm4a': FileType.AUDIO, 'mp3': FileType.AUDIO, 'aac': FileType.AUDIO, 'wav': FileType.AUDIO,
+        'flac': FileType.AUDIO, 'ogg': FileType.AUDIO,
+    }
+
     @staticmethod
-    def detect(file_path: str) -> FileType:
+    def detect(file_path: str, sniff: bool = None) -> FileType:
+        """
+        Detects the file type from its extension, or from its content when sniffing is enabled.
+        sniff: Override FileDetector.sniff_content for this call.
+        """
+        if sniff is None:
+            sniff = FileDetector.sniff_content
+        if sniff:
+            file_type = FileDetector.sniff(file_path)
+            if file_type != FileType.UNKNOWN:
+                return file_type
+
         _, ext = os.path.splitext(file_path)
         ext = ext.lower()
 
@@ -29,3 +58,131 @@ class FileDetector:
             return FileType.AUDIO
         
         return FileType.UNKNOWN
+
+    @staticmethod
+    def detect_many(paths, sniff: bool = True, workers: int = 8):
+        """
+        Detects many files, yielding (path, FileType) in input order.
+        Header reads overlap on a small thread pool, which matters on network mounts.
+        paths may be a generator; only a small window of it is read ahead.
+        """
+        if not sniff:
+            for path in paths:
+                yield path, FileDetector.detect(path, sniff=False)
+            return
+
+        # Imported here: FileDetector sits on the CLI startup path and most calls never batch
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            window = deque()
+            for path in paths:
+                window.append((path, executor.submit(FileDetector.detect, path, True)))
+                if len(window) >= workers * 4:
+                    path, future = window.popleft()
+                    yield path, future.result()
+            while window:
+                path, future = window.popleft()
+                yield path, future.result()
+
+    @staticmethod
+    def sniff(file_path: str) -> FileType:
+        """
+        Identifies the file type from its first bytes. Returns FileType.UNKNOWN if unrecognised.
+        """
+        fmt = FileDetector.sniff_format(file_path)
+        if fmt == 'asf':
+            # WMA and WMV share one container; the header does not say which
+            ext = os.path.splitext(file_path)[1].lower()
+            return FileType.AUDIO if ext in FileDetector.AUDIO_EXTS else FileType.VIDEO
+        return FileDetector.FORMAT_TYPES.get(fmt, FileType.UNKNOWN)
+
+    @staticmethod
+    def sniff_format(file_path: str):
+        """
+        Returns the real container/format name ('png', 'mp4', 'm4a', 'mkv', ...) or None.
+        Reads HEADER_SIZE bytes (plus the MP4 'moov' box when it starts inside them).
+        """
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError:
+            return None
+
+        try:
+            header = os.read(fd, FileDetector.HEADER_SIZE)
+            if header[4:8] == b'ftyp':
+                return FileDetector._sniff_iso_media(fd, header)
+            return FileDetector._sniff_header(header)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _sniff_header(h: bytes):
+        if h.startswith(b'\x89PNG\r\n\x1a\n'):
+            return 'png'
+        if h.startswith(b'\xff\xd8\xff'):
+            return 'jpeg'
+        if h[:6] in (b'GIF87a', b'GIF89a'):
+            return 'gif'
+        if h.startswith(b'RIFF'):
+            return {b'WEBP': 'webp', b'WAVE': 'wav', b'AVI ': 'avi'}.get(h[8:12])
+        if h.startswith(b'BM'):
+            return 'bmp'
+        if h[:4] in (b'II*\x00', b'MM\x00*'):
+            return 'tiff'
+        # PDF readers accept junk before the header, so look a little further in
+        if b'%PDF-' in h[:1024]:
+            return 'pdf'
+        if h.startswith(b'\x1a\x45\xdf\xa3'):
+            return 'webm' if b'webm' in h[:64] else 'mkv'
+        if h.startswith(b'fLaC'):
+            return 'flac'
+        if h.startswith(b'OggS'):
+            return 'ogv' if b'\x80theora' in h else 'ogg'
+        if h.startswith(b'ID3'):
+            return 'mp3'
+        if h.startswith(b'FLV'):
+            return 'flv'
+        if h.startswith(b'\x30\x26\xb2\x75\x8e\x66\xcf\x11'):
+            return 'asf'
+        if h.startswith(b'\x00\x00\x01\xba'):
+            return 'mpeg'
+        if len(h) > 188 and h[0] == 0x47 and h[188] == 0x47:
+            return 'mpegts'
+        if len(h) >= 2 and h[0] == 0xff:
+            # 12-bit frame sync; layer bits 00 mean AAC (ADTS), 01 mean MPEG layer III
+            if (h[1] & 0xf6) == 0xf0:
+                return 'aac'
+            if (h[1] & 0xe0) == 0xe0 and (h[1] >> 1) & 0x3 == 0x1:
+                return 'mp3'
+        return None
+
+    @staticmethod
+    def _sniff_iso_media(fd: int, header: bytes):
+        brand = header[8:12]
+        if brand in (b'M4A ', b'M4B ', b'M4P ', b'F4A '):
+            return 'm4a'
+        fmt = 'mov' if brand == b'qt  ' else 'mp4'
+
+        # Brands don't tell audio-only MP4s apart; the track handlers in 'moov' do.
+        # Only look when moov directly follows ftyp (the usual "faststart" layout).
+        ftyp_size = int.from_bytes(header[0:4], 'big')
+        if ftyp_size + 8 > len(header) or header[ftyp_size + 4:ftyp_size + 8] != b'moov':
+            return fmt
+        moov_size = int.from_bytes(header[ftyp_size:ftyp_size + 4], 'big')
+        end = min(ftyp_size + moov_size, FileDetector.MP4_MOOV_READ)
+        if end > len(header):
+            header += os.read(fd, end - len(header))
+
+        handlers = set()
+        pos = header.find(b'hdlr')
+        while pos != -1:
+            # hdlr box: version/flags (4 bytes), pre_defined (4 bytes), handler_type (4 bytes)
+            handlers.add(header[pos + 12:pos + 16])
+            pos = header.find(b'hdlr', pos + 4)
+
+        if b'soun' in handlers and b'vide' not in handlers:
+            return 'm4a'
+        return fmt
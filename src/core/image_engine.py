@@ -1,15 +1,19 @@
-import subprocess
 import os
 
+from src.core.async_process import AsyncProcess
+from src.core.stream_io import StreamIO
+
 class ImageEngine:
+    ENGINE = "imagemagick"
+    # Upper bound on images handled by one batched ImageMagick process
+    BATCH_SIZE = 50
+
     @staticmethod
-    def convert(input_path: str, output_path: str, preset: dict, process_holder: list = None) -> bool:
+    def _build_operations(preset: dict) -> list:
         """
-        Executes ImageMagick convert command.
-        process_holder: Optional list acting as a mutable pointer to store the Popen object.
+        Returns the ImageMagick operators for a preset (everything between input and output).
         """
-        cmd = ["convert", input_path]
-
+        ops = []
         action = preset.get("action")
         
         if action == "resize":
@@ -18,31 +22,59 @@ class ImageEngine:
             
             if width and height:
                 # Force dimensions with ! to match user intent of "output should be the same I give"
-                cmd.extend(["-resize", f"{width}x{height}!"])
+                ops.extend(["-resize", f"{width}x{height}!"])
             elif width:
-                cmd.extend(["-resize", f"{width}x"])
+                ops.extend(["-resize", f"{width}x"])
             elif height:
-                cmd.extend(["-resize", f"x{height}"])
+                ops.extend(["-resize", f"x{height}"])
+        
+        return ops
+
+    @staticmethod
+    def _thread_args(threads: int = None) -> list:
+        # ImageMagick's OpenMP otherwise uses every core in each of the concurrent processes
+        return ["-limit", "thread", str(threads)] if threads else []
+
+    @staticmethod
+    def convert(input_path, output_path, preset: dict, process_holder: list = None, threads: int = None) -> bool:
+        """
+        Blocking form of convert_async().
+        process_holder: Optional list acting as a mutable pointer; holder[0].kill() stops ImageMagick.
+        """
+        return AsyncProcess.run_sync(ImageEngine.convert_async(input_path, output_path, preset, threads), process_holder)
+
+    @staticmethod
+    async def convert_async(input_path, output_path, preset: dict, threads: int = None) -> bool:
+        """
+        Executes ImageMagick convert command. Cancelling the awaiting task kills it.
+        input_path, output_path: Paths, or streams (see StreamIO) read from stdin / written to stdout;
+        a stream output is written in the preset's format, else the input's.
+        threads: Optional cap on ImageMagick's worker threads.
+        """
+        source = None if StreamIO.is_path(input_path) else input_path
+        sink = None if StreamIO.is_path(output_path) else output_path
+        if sink is not None:
+            # Every ImageMagick coder can write to stdout; it needs to be told which one
+            fmt = StreamIO.output_format(input_path, output_path, preset)
+            if not fmt:
+                print("ImageMagick Error: a stream output needs a preset with a format")
+                return False
+
+        cmd = ["convert"] + ImageEngine._thread_args(threads) + ["-" if source is not None else input_path]
+        cmd.extend(ImageEngine._build_operations(preset))
         
         # Add output path at the end
-        cmd.append(output_path)
+        cmd.append(f"{fmt}:-" if sink is not None else output_path)
         
         try:
             # Check if output directory exists, create if not
-            # Check if output directory exists, create if not
-            out_dir = os.path.dirname(output_path)
+            out_dir = os.path.dirname(output_path) if sink is None else None
             if out_dir and not os.path.exists(out_dir):
                 os.makedirs(out_dir)
 
-            # Run command with Popen
-            process = subprocess.Popen(cmd, stderr=subprocess.PIPE, text=True)
-            
-            if process_holder is not None:
-                process_holder[0] = process
-                
-            _, stderr = process.communicate()
+            returncode, stderr = await AsyncProcess.run(cmd, source, sink)
             
-            if process.returncode != 0:
+            if returncode != 0:
                 print(f"ImageMagick Error: {stderr}")
                 return False
                 
@@ -51,3 +83,70 @@ class ImageEngine:
         except Exception as e:
             print(f"Exception during conversion: {e}")
             return False
+
+    @staticmethod
+    def convert_batch(pairs: list, preset: dict, process_holder: list = None, threads: int = None) -> list:
+        """
+        Blocking form of convert_batch_async().
+        process_holder: Optional list acting as a mutable pointer; holder[0].kill() stops ImageMagick.
+        """
+        return AsyncProcess.run_sync(ImageEngine.convert_batch_async(pairs, preset, threads), process_holder,
+                                     [False] * len(pairs))
+
+    @staticmethod
+    async def convert_batch_async(pairs: list, preset: dict, threads: int = None) -> list:
+        """
+        Converts many images with the same preset in a single ImageMagick process.
+        pairs: list of (input_path, output_path) tuples.
+        threads: Optional cap on ImageMagick's worker threads.
+        Returns a list of bools, one per pair. Inputs the batch could not produce are
+        retried one by one with convert_async() so each failure is reported on its own.
+        """
+        if len(pairs) == 1:
+            input_path, output_path = pairs[0]
+            return [await ImageEngine.convert_async(input_path, output_path, preset, threads)]
+
+        ops = ImageEngine._build_operations(preset)
+
+        # convert in1 <ops> -write out1 -delete 0--1 in2 <ops> -write out2 -delete 0--1 ... null:
+        # Deleting the whole list after each write keeps multi-frame inputs from leaking into the next image.
+        cmd = ["convert"] + ImageEngine._thread_args(threads)
+        for input_path, output_path in pairs:
+            cmd.append(input_path)
+            cmd.extend(ops)
+            cmd.extend(["-write", output_path, "-delete", "0--1"])
+        cmd.append("null:")
+
+        returncode = None
+        try:
+            for _, output_path in pairs:
+                out_dir = os.path.dirname(output_path)
+                if out_dir and not os.path.exists(out_dir):
+                    os.makedirs(out_dir)
+
+            returncode, stderr = await AsyncProcess.run(cmd)
+
+            if returncode != 0:
+                print(f"ImageMagick Batch Error: {stderr}")
+
+        except Exception as e:
+            print(f"Exception during batch conversion: {e}")
+
+        # Killed batches are not retried
+        if returncode is not None and returncode < 0:
+            return [ImageEngine._has_output(output_path) for _, output_path in pairs]
+
+        results = []
+        for input_path, output_path in pairs:
+            if ImageEngine._has_output(output_path):
+                results.append(True)
+            else:
+                results.append(await ImageEngine.convert_async(input_path, output_path, preset, threads))
+        return results
+
+    @staticmethod
+    def _has_output(output_path: str) -> bool:
+        try:
+            return os.path.getsize(output_path) > 0
+        except OSError:
+            return False
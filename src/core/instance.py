@@ -0,0 +1,130 @@
+import os
+import json
+import stat
+import socket
+
+class SingleInstance:
+    """
+    Lets --quick-convert calls hand their files to an already running instance
+    over a local UNIX socket instead of starting another interpreter, QApplication
+    and ProgressWindow. This side is Qt-free so a hand-off costs almost nothing;
+    the listening side lives in src/ui/instance_server.py.
+
+    A lock file serialises "try to connect, else start listening" so two calls
+    started at the same moment can't both become the server. The call that becomes
+    the server binds the socket before starting Qt and drops the lock straight away:
+    calls arriving meanwhile connect and wait for the window instead of queueing on the lock.
+    Socket and lock live in $XDG_RUNTIME_DIR, else in a private (0700) directory under /tmp.
+    """
+    TIMEOUT = 5 # seconds
+    STARTUP_TIMEOUT = 30 # seconds a connected call waits for a starting instance to answer
+
+    def __init__(self):
+        self._lock_fd = None
+        self._listener = None # Socket bound by a failed hand_off(), until take_listener()
+
+    @staticmethod
+    def supported() -> bool:
+        # QLocalServer uses named pipes on Windows; only UNIX sockets are handled here
+        return os.name == "posix" and hasattr(socket, "AF_UNIX") and SingleInstance.socket_path() is not None
+
+    @staticmethod
+    def socket_path() -> str:
+        """
+        Returns None if no directory only this user can write to is available.
+        """
+        runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+        if runtime_dir and os.path.isdir(runtime_dir):
+            return os.path.join(runtime_dir, "fileconverter-quick-convert.sock")
+
+        private_dir = os.path.join("/tmp", f"fileconverter-{os.getuid()}")
+        try:
+            os.mkdir(private_dir, 0o700)
+        except FileExistsError:
+            pass
+        except OSError as e:
+            print(f"Could not create {private_dir}: {e}")
+            return None
+        # Someone else may have created it first (or planted a symlink) to catch our socket and lock
+        info = os.lstat(private_dir)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            print(f"Not using {private_dir}: not a private directory of this user")
+            return None
+        return os.path.join(private_dir, "quick-convert.sock")
+
+    def hand_off(self, preset_name: str, paths: list, custom_config: dict = None) -> bool:
+        """
+        Sends the job to a running instance. Returns True if it was accepted.
+        On False the caller should become the instance: listen on take_listener()
+        (or, if that is None, on the socket path) and then call release().
+        """
+        if not SingleInstance.supported():
+            return False
+
+        import fcntl
+        self._lock_fd = os.open(SingleInstance.socket_path() + ".lock",
+                                os.O_CREAT | os.O_RDWR | os.O_NOFOLLOW | os.O_CLOEXEC, 0o600)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+
+        request = {
+            "preset": preset_name,
+            # The running instance has its own working directory
+            "paths": [os.path.abspath(path) for path in paths],
+            "custom_config": custom_config,
+        }
+        if SingleInstance._send(request):
+            self.release()
+            return True
+
+        try:
+            self._listener = SingleInstance._bind()
+        except OSError:
+            return False # The lock stays held until the Qt server listens by path
+        self.release()
+        return False
+
+    @staticmethod
+    def _bind():
+        path = SingleInstance.socket_path()
+        # Holding the lock after a failed connect means any socket file left there is stale
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(path)
+            sock.listen(64)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def take_listener(self):
+        """
+        The descriptor of the socket bound by a failed hand_off(), for the server to adopt; None if there is none.
+        """
+        if self._listener is None:
+            return None
+        listener, self._listener = self._listener, None
+        return listener.detach()
+
+    @staticmethod
+    def _send(request: dict) -> bool:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(SingleInstance.TIMEOUT)
+                sock.connect(SingleInstance.socket_path())
+                # The instance may have bound the socket and still be starting Qt
+                sock.settimeout(SingleInstance.STARTUP_TIMEOUT)
+                sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+                reply = sock.makefile("rb").readline()
+                return reply.strip() == b"ok"
+        except OSError:
+            # No instance running (or a stale socket left by a crashed one)
+            return False
+
+    def release(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd) # Closing drops the flock
+            self._lock_fd = None
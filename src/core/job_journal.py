@@ -0,0 +1,263 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+
+class JobJournal:
+    """
+    Persistent SQLite record of every job in a batch: queued, running, done or failed,
+    with its output path. Each state change is committed as it happens, so after a crash
+    or kill the batch can be resumed: finished jobs are skipped, and jobs that were
+    running lose their half-written output and run again under the same name.
+
+    Jobs are tracked through job['journal_id']; paths are stored absolute.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or JobJournal.default_path()
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._started = set() # journal ids already marked running by callbacks()
+        self._db = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        with self._lock, self._db:
+            # WAL with synchronous=NORMAL keeps a commit per state change cheap and survives process crashes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS batches ("
+                "id INTEGER PRIMARY KEY, source TEXT NOT NULL, args TEXT, pid INTEGER, created REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY, batch INTEGER NOT NULL, path TEXT NOT NULL, preset_name TEXT, "
+                "custom_config TEXT, output_path TEXT, state TEXT NOT NULL, message TEXT, updated REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch, state)")
+
+    @staticmethod
+    def default_path() -> str:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        return os.path.join(base, "fileconverter", "journal.sqlite")
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the process-wide journal, or None if FILECONVERTER_JOURNAL=0 or it cannot be opened.
+        FILECONVERTER_JOURNAL_PATH overrides its location.
+        """
+        if os.environ.get("FILECONVERTER_JOURNAL", "1") in ("0", "false", "no"):
+            return None
+        with cls._shared_lock:
+            if cls._shared is None:
+                try:
+                    cls._shared = JobJournal(os.environ.get("FILECONVERTER_JOURNAL_PATH"))
+                except Exception as e:
+                    print(f"Job journal unavailable: {e}")
+                    cls._shared = False
+            return cls._shared or None
+
+    def start_batch(self, source: str, args: dict = None) -> int:
+        """
+        Starts a new batch owned by this process and returns its id.
+        source: "cli" or "gui". args: Optional JSON-able settings needed to resume it (e.g. CLI arguments).
+        Batches with nothing left to do are dropped once the process that owned them is gone;
+        a live one may still be adding jobs (the CLI queues them as discovery finds files).
+        """
+        with self._lock, self._db:
+            idle = self._db.execute(
+                "SELECT id, pid FROM batches WHERE id NOT IN (SELECT DISTINCT batch FROM jobs WHERE state IN (?, ?))",
+                (JobJournal.QUEUED, JobJournal.RUNNING)).fetchall()
+            done = [(batch_id,) for batch_id, pid in idle
+                    if not pid or (pid != os.getpid() and not JobJournal._process_alive(pid))]
+            if done:
+                self._db.executemany("DELETE FROM batches WHERE id = ?", done)
+                self._db.execute("DELETE FROM jobs WHERE batch NOT IN (SELECT id FROM batches)")
+            cursor = self._db.execute("INSERT INTO batches (source, args, pid, created) VALUES (?, ?, ?, ?)",
+                                      (source, json.dumps(args) if args is not None else None, os.getpid(), time.time()))
+            return cursor.lastrowid
+
+    def interrupted_batch(self, source: str = None):
+        """
+        Returns the newest batch with unfinished jobs whose process is gone, as
+        { 'id', 'source', 'args', 'remaining' }, or None.
+        source: Optional filter ("cli" or "gui").
+        """
+        query = ("SELECT b.id, b.source, b.args, b.pid, COUNT(*) FROM batches b JOIN jobs j ON j.batch = b.id "
+                 "WHERE j.state IN (?, ?)")
+        params = [JobJournal.QUEUED, JobJournal.RUNNING]
+        if source:
+            query += " AND b.source = ?"
+            params.append(source)
+        query += " GROUP BY b.id ORDER BY b.id DESC"
+
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+
+        for batch_id, batch_source, args, pid, remaining in rows:
+            if pid and pid != os.getpid() and JobJournal._process_alive(pid):
+                continue # Still being worked on by another window or CLI run
+            return {'id': batch_id, 'source': batch_source,
+                    'args': json.loads(args) if args else None, 'remaining': remaining}
+        return None
+
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        if os.name == "nt":
+            return JobJournal._windows_process_alive(pid)
+
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        except OSError:
+            return False
+
+        # A killed process whose parent hasn't reaped it yet still answers signal 0
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+        except (OSError, IndexError):
+            return True
+
+    @staticmethod
+    def _windows_process_alive(pid: int) -> bool:
+        # os.kill(pid, 0) would terminate the process on Windows; ask for its exit code instead
+        import ctypes
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return ctypes.GetLastError() == 5 # ERROR_ACCESS_DENIED: exists, owned by someone else
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return True
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+
+    def resume_batch(self, batch_id: int) -> list:
+        """
+        Takes over an interrupted batch: deletes the outputs of jobs that were running
+        (they are half-written) and the empty name placeholders of queued ones,
+        and puts the running jobs back in the queue.
+        Returns a row per job of the batch, in the order they were added:
+        { 'id', 'path', 'preset_name', 'custom_config', 'output_path', 'state' }.
+        """
+        with self._lock, self._db:
+            self._db.execute("UPDATE batches SET pid = ? WHERE id = ?", (os.getpid(), batch_id))
+            unfinished = self._db.execute("SELECT output_path, state FROM jobs WHERE batch = ? AND state IN (?, ?)",
+                                          (batch_id, JobJournal.QUEUED, JobJournal.RUNNING)).fetchall()
+            for output_path, state in unfinished:
+                if not output_path:
+                    continue
+                try:
+                    if state == JobJournal.RUNNING or os.path.getsize(output_path) == 0:
+                        os.remove(output_path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Could not remove partial output {output_path}: {e}")
+            self._db.execute("UPDATE jobs SET state = ?, updated = ? WHERE batch = ? AND state = ?",
+                             (JobJournal.QUEUED, time.time(), batch_id, JobJournal.RUNNING))
+            rows = self._db.execute(
+                "SELECT id, path, preset_name, custom_config, output_path, state FROM jobs WHERE batch = ? ORDER BY id",
+                (batch_id,)).fetchall()
+
+        return [{
+            'id': job_id, 'path': path, 'preset_name': preset_name,
+            'custom_config': json.loads(custom_config) if custom_config else None,
+            'output_path': output_path, 'state': state,
+        } for job_id, path, preset_name, custom_config, output_path, state in rows]
+
+    def discard_batch(self, batch_id: int):
+        """
+        Forgets a batch, e.g. one the user cancelled, so it isn't offered for resuming.
+        """
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM jobs WHERE batch = ?", (batch_id,))
+            self._db.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+
+    def add(self, batch_id: int, jobs):
+        """
+        Records jobs as queued in one transaction and sets job['journal_id'] on each.
+        jobs: dicts with 'path', 'preset_name' (or a 'plan'), optional 'custom_config' and 'output_path'.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            for job in jobs:
+                preset_name = job['plan'].name if 'plan' in job else job.get('preset_name')
+                output_path = job.get('output_path')
+                custom_config = job.get('custom_config')
+                cursor = self._db.execute(
+                    "INSERT INTO jobs (batch, path, preset_name, custom_config, output_path, state, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (batch_id, os.path.abspath(job['path']), preset_name,
+                     json.dumps(custom_config) if custom_config else None,
+                     os.path.abspath(output_path) if output_path else None, JobJournal.QUEUED, now))
+                job['journal_id'] = cursor.lastrowid
+
+    def set_output(self, job: dict):
+        """
+        Records the output path chosen for a journaled job.
+        """
+        if job.get('journal_id') is None:
+            return
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET output_path = ? WHERE id = ?",
+                             (os.path.abspath(job['output_path']), job['journal_id']))
+
+    def mark_running(self, job: dict):
+        self._set_state(job, JobJournal.RUNNING)
+
+    def mark_finished(self, job: dict, success: bool, message: str = ""):
+        # Cancelled jobs never ran to the end; they stay unfinished so a resume picks them up
+        if success:
+            state = JobJournal.DONE
+        else:
+            state = JobJournal.QUEUED if message == "Cancelled" else JobJournal.FAILED
+        self._set_state(job, state, message)
+
+    def _set_state(self, job: dict, state: str, message: str = None):
+        if job.get('journal_id') is None:
+            return
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET state = ?, message = ?, updated = ? WHERE id = ?",
+                             (state, message, time.time(), job['journal_id']))
+
+    def callbacks(self, progress_cb=None, finished_cb=None):
+        """
+        Wraps scheduler callbacks so journaled jobs are marked running on their first
+        progress report (the scheduler sends one when a job starts) and done or failed when they finish.
+        Returns (progress_cb, finished_cb).
+        """
+        def on_progress(job, progress):
+            journal_id = job.get('journal_id')
+            if journal_id is not None and journal_id not in self._started:
+                self._started.add(journal_id)
+                self.mark_running(job)
+            if progress_cb:
+                progress_cb(job, progress)
+
+        def on_finished(job, success, message):
+            self._started.discard(job.get('journal_id'))
+            self.mark_finished(job, success, message)
+            if finished_cb:
+                finished_cb(job, success, message)
+
+        return on_progress, on_finished
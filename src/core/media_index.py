@@ -0,0 +1,141 @@
+import os
+import json
+import sqlite3
+import threading
+
+from src.core.file_detector import FileDetector, FileType
+
+class MediaIndex:
+    """
+    Persistent SQLite index of normalised ffprobe results.
+
+    Rows are keyed on the absolute path and are only trusted while the file's
+    size, mtime and inode still match, so unchanged files never need ffprobe again.
+    Resolution, duration and kind are stored in columns for library-wide queries.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or MediaIndex.default_path()
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        with self._lock, self._db:
+            # WAL lets the GUI and CLI read the index while the other one writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, dir TEXT NOT NULL, "
+                "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL, "
+                "kind TEXT, width INTEGER, height INTEGER, duration REAL, info TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS files_height ON files (kind, height)")
+
+    @staticmethod
+    def default_path() -> str:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        return os.path.join(base, "fileconverter", "media_index.sqlite")
+
+    def lookup(self, file_path: str, st: os.stat_result = None):
+        """
+        Returns the indexed info dict if the file is unchanged since it was indexed, else None.
+        """
+        path = os.path.abspath(file_path)
+        if st is None:
+            st = os.stat(path)
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, inode, info FROM files WHERE path = ?", (path,)
+            ).fetchone()
+
+        if row and row[:3] == (st.st_size, st.st_mtime_ns, st.st_ino):
+            return json.loads(row[3])
+        return None
+
+    def store(self, file_path: str, info: dict, st: os.stat_result = None):
+        path = os.path.abspath(file_path)
+        if st is None:
+            st = os.stat(path)
+
+        width, height = None, None
+        for stream in info.get("streams", []):
+            if stream.get("type") == "video" and stream.get("height"):
+                width, height = stream.get("width"), stream.get("height")
+                break
+
+        try:
+            duration = float(info.get("duration"))
+        except (TypeError, ValueError):
+            duration = None
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, os.path.dirname(path), st.st_size, st.st_mtime_ns, st.st_ino,
+                 MediaIndex._kind(path, info), width, height, duration, json.dumps(info))
+            )
+
+    @staticmethod
+    def _kind(path: str, info: dict) -> str:
+        file_type = FileDetector.detect(path)
+        if file_type != FileType.UNKNOWN:
+            return file_type.name.lower()
+
+        stream_types = {stream.get("type") for stream in info.get("streams", [])}
+        if "video" in stream_types:
+            return "video"
+        if "audio" in stream_types:
+            return "audio"
+        return "unknown"
+
+    @staticmethod
+    def _prefix_range(directory: str):
+        # [prefix, end) covers every path below directory and uses the primary key index
+        prefix = os.path.join(os.path.abspath(directory), "")
+        return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    def _where(self, kind=None, min_height=None, under=None):
+        clauses, params = [], []
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if min_height:
+            clauses.append("height >= ?")
+            params.append(min_height)
+        if under:
+            start, end = MediaIndex._prefix_range(under)
+            clauses.append("path >= ? AND path < ?")
+            params.extend([start, end])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, kind: str = None, min_height: int = None, under: str = None) -> list:
+        """
+        Returns (path, kind, width, height, duration) rows matching every given filter.
+        """
+        where, params = self._where(kind, min_height, under)
+        with self._lock:
+            return self._db.execute(
+                f"SELECT path, kind, width, height, duration FROM files{where} ORDER BY path", params
+            ).fetchall()
+
+    def summary(self, kind: str = None, min_height: int = None, under: str = None) -> dict:
+        where, params = self._where(kind, min_height, under)
+        with self._lock:
+            count, duration, size = self._db.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(size), 0) FROM files{where}", params
+            ).fetchone()
+        return {"files": count, "duration": duration, "size_bytes": size}
+
+    def prune(self) -> int:
+        """
+        Drops rows for files that no longer exist. Returns the number removed.
+        """
+        with self._lock:
+            paths = [row[0] for row in self._db.execute("SELECT path FROM files")]
+        missing = [(path,) for path in paths if not os.path.exists(path)]
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM files WHERE path = ?", missing)
+        return len(missing)
@@ -1,16 +1,65 @@
 import subprocess
 import json
 import os
+import threading
+
+from src.core.media_index import MediaIndex
 
 class MediaInfoExtractor:
+    _index = None
+    _index_lock = threading.Lock()
+
+    @classmethod
+    def get_index(cls):
+        """
+        Returns the shared MediaIndex, or None if FILECONVERTER_MEDIA_INDEX=0 or it cannot be opened.
+        """
+        if os.environ.get("FILECONVERTER_MEDIA_INDEX", "1") == "0":
+            return None
+        with cls._index_lock:
+            if cls._index is None:
+                try:
+                    cls._index = MediaIndex()
+                except Exception as e:
+                    print(f"Media index unavailable: {e}")
+                    cls._index = False
+            return cls._index or None
+
     @staticmethod
-    def get_info(file_path: str) -> dict:
+    def get_info(file_path: str, use_index: bool = True) -> dict:
         """
         Extracts metadata from a file using ffprobe.
+        Unchanged files already in the media index are answered without running ffprobe.
         """
         if not os.path.exists(file_path):
             return {"error": "File not found"}
 
+        index = MediaInfoExtractor.get_index() if use_index else None
+        if index is None:
+            return MediaInfoExtractor._probe(file_path)
+
+        try:
+            st = os.stat(file_path)
+            info = index.lookup(file_path, st)
+            if info is not None:
+                # The row may have been stored under a different spelling of the path
+                info["file"] = os.path.basename(file_path)
+                info["path"] = file_path
+                return info
+        except Exception as e:
+            print(f"Media index lookup failed: {e}")
+            return MediaInfoExtractor._probe(file_path)
+
+        info = MediaInfoExtractor._probe(file_path)
+        if "error" not in info:
+            try:
+                index.store(file_path, info, st)
+            except Exception as e:
+                print(f"Media index update failed: {e}")
+        return info
+
+    @staticmethod
+    def _probe(file_path: str) -> dict:
         cmd = [
             "ffprobe",
             "-v", "quiet",
@@ -0,0 +1,153 @@
+import os
+import threading
+
+class OutputNames:
+    """
+    Hands out free output names ("x_converted.png", "x_converted(1).png", ...).
+
+    Each directory is listed once and the names in it are kept in memory, so picking a
+    name costs no stat calls however many duplicates exist. A picked name is claimed on
+    disk with O_CREAT | O_EXCL as an empty placeholder the engine then overwrites: two
+    threads or two processes can never be handed the same name, and names another
+    process created after the listing are found on the claim and skipped.
+
+    Placeholders of jobs that don't produce their output are removed by release()
+    or, for anything left at the end of a run, discard_unused(). Every name handed out
+    is remembered, so discovery still walking the same directories can skip them (issued()).
+    """
+
+    def __init__(self, placeholders: bool = True):
+        """
+        placeholders: Claim names on disk. Without them names are only reserved in memory (dry runs).
+        """
+        self.placeholders = placeholders
+        self._lock = threading.Lock()
+        self._listings = {} # directory -> names in it (listed once, plus names handed out since)
+        self._next = {} # base output path -> next "(n)" worth trying
+        self._claimed = set() # placeholders created by this index and not yet written or released
+        self._issued = set() # absolute paths of every name handed out
+
+    def _names(self, directory: str) -> set:
+        names = self._listings.get(directory)
+        if names is None:
+            try:
+                names = set(os.listdir(directory or "."))
+            except OSError:
+                names = set() # Not created yet; the engine makes the directory
+            self._listings[directory] = names
+        return names
+
+    def exists(self, path: str) -> bool:
+        """
+        Whether path existed when its directory was listed, or has been handed out since.
+        """
+        directory, name = os.path.split(path)
+        with self._lock:
+            return name in self._names(directory)
+
+    def reserve(self, base_path: str) -> str:
+        """
+        Returns base_path, or the first "(n)" variant of it that is free, and claims it.
+        """
+        directory, name = os.path.split(base_path)
+        with self._lock:
+            names = self._names(directory)
+            counter = self._next.get(base_path, 0)
+            path = base_path
+            while True:
+                if counter:
+                    stem, ext = os.path.splitext(base_path)
+                    path = f"{stem}({counter}){ext}"
+                    name = os.path.basename(path)
+                counter += 1
+                if name not in names and self._claim(path, name, names):
+                    break
+            if counter > 1:
+                self._next[base_path] = counter
+            if self.placeholders:
+                self._issued.add(os.path.abspath(path)) # Dry runs write nothing that discovery could find
+            return path
+
+    def claim(self, path: str) -> bool:
+        """
+        Claims an exact name (e.g. one recorded for a resumed job). Returns False if it is taken.
+        """
+        directory, name = os.path.split(path)
+        with self._lock:
+            names = self._names(directory)
+            if name in names or not self._claim(path, name, names):
+                return False
+            if self.placeholders:
+                self._issued.add(os.path.abspath(path))
+            return True
+
+    def issued(self, path: str) -> bool:
+        """
+        Whether path was handed out by this index (reserved or claimed), i.e. is one of this run's outputs.
+        """
+        with self._lock:
+            return os.path.abspath(path) in self._issued
+
+    def _claim(self, path: str, name: str, names: set) -> bool:
+        # Called with the lock held; the name is taken from now on whether or not the claim succeeds
+        names.add(name)
+        if not self.placeholders:
+            return True
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+        except FileExistsError:
+            return False # Created by someone else since the listing
+        except FileNotFoundError:
+            return True # Directory doesn't exist yet; nobody else can hold the name either
+        self._claimed.add(path)
+        return True
+
+    def written(self, path: str):
+        """
+        Marks a claimed name as holding a real output, so it is never cleaned up.
+        """
+        with self._lock:
+            self._claimed.discard(path)
+
+    def release(self, path: str):
+        """
+        Removes the placeholder of a job that did not produce its output.
+        Partial outputs (anything non-empty) are left alone, as before.
+        """
+        with self._lock:
+            if path not in self._claimed:
+                return
+            self._claimed.discard(path)
+        OutputNames._remove_if_empty(path)
+
+    def discard_unused(self):
+        """
+        Removes every placeholder still unwritten, e.g. of jobs dropped when a run was cancelled.
+        """
+        with self._lock:
+            claimed, self._claimed = self._claimed, set()
+        for path in claimed:
+            OutputNames._remove_if_empty(path)
+
+    @staticmethod
+    def _remove_if_empty(path: str):
+        try:
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+        except OSError:
+            pass
+
+    def callbacks(self, finished_cb=None):
+        """
+        Wraps a scheduler finished callback so each job's name is marked written on
+        success and its placeholder released otherwise.
+        """
+        def on_finished(job, success, message):
+            if success:
+                self.written(job['output_path'])
+            else:
+                self.release(job['output_path'])
+            if finished_cb:
+                finished_cb(job, success, message)
+
+        return on_finished
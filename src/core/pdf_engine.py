@@ -1,18 +1,31 @@
-import subprocess
 import os
+import shutil
+import asyncio
+import tempfile
+
+from src.core.async_process import AsyncProcess
+from src.core.stream_io import StreamIO
 
 class PdfEngine:
+    # Page-parallel compression (opt-in): FILECONVERTER_PDF_PARALLEL=1, --pdf-parallel or "parallel": true on a preset
+    parallel_pages = os.environ.get("FILECONVERTER_PDF_PARALLEL", "") in ("1", "true", "yes")
+    PARALLEL_MIN_PAGES = 100 # Smaller documents use the serial path
+    PARALLEL_MIN_RANGE = 25  # Fewest pages given to one Ghostscript process
+
+    # Position arguments of each outline destination type, in the order a destination array lists them
+    DESTINATION_ARGS = {
+        "/XYZ": ("/Left", "/Top", "/Zoom"),
+        "/FitH": ("/Top",),
+        "/FitBH": ("/Top",),
+        "/FitV": ("/Left",),
+        "/FitBV": ("/Left",),
+        "/FitR": ("/Left", "/Bottom", "/Right", "/Top"),
+    }
+
     @staticmethod
-    def compress(input_path: str, output_path: str, preset: dict, process_holder: list = None) -> bool:
-        """
-        Compresses PDF using Ghostscript.
-        process_holder: Optional list acting as a mutable pointer to store the Popen object.
-        """
-        # preset examples: { "action": "compress", "quality": "screen" }
-        quality = preset.get("quality", "ebook") # defaults to ebook (medium)
-        
+    def _gs_command(input_path: str, output_path: str, quality: str, first_page: int = None,
+                    last_page: int = None) -> list:
         # dPDFSETTINGS=/screen (72 dpi), /ebook (150 dpi), /printer (300 dpi), /prepress (color preserving)
-        
         cmd = [
             "gs",
             "-sDEVICE=pdfwrite",
@@ -21,32 +34,194 @@ class PdfEngine:
             "-dNOPAUSE",
             "-dQUIET",
             "-dBATCH",
-            f"-sOutputFile={output_path}",
-            input_path
         ]
-        
+        if first_page is not None:
+            cmd += [f"-dFirstPage={first_page}", f"-dLastPage={last_page}"]
+        cmd += [f"-sOutputFile={output_path}", input_path]
+        return cmd
+
+    @staticmethod
+    async def _run_gs(cmd: list, source=None) -> bool:
+        returncode, stderr = await AsyncProcess.run(cmd, source)
+
+        if returncode != 0:
+            print(f"Ghostscript Error: {stderr}")
+            return False
+
+        return True
+
+    @staticmethod
+    def compress(input_path, output_path, preset: dict, process_holder: list = None, threads: int = None) -> bool:
+        """
+        Blocking form of compress_async().
+        process_holder: Optional list acting as a mutable pointer; holder[0].kill() stops Ghostscript.
+        """
+        return AsyncProcess.run_sync(PdfEngine.compress_async(input_path, output_path, preset, threads), process_holder)
+
+    @staticmethod
+    async def compress_async(input_path, output_path, preset: dict, threads: int = None) -> bool:
+        """
+        Compresses PDF using Ghostscript. Cancelling the awaiting task kills it.
+        input_path, output_path: Paths, or streams (see StreamIO). Ghostscript reads a stream from
+        stdin; pdfwrite needs a seekable output, so a stream output is written to a temporary
+        file first. Stream inputs always take the serial path (splitting needs the file).
+        threads: Optional thread allocation, used as the number of page-range processes. pdfwrite itself is
+                 single-threaded (-dNumRenderingThreads only affects rasterising devices), so the serial path ignores it.
+        preset["parallel"]: Overrides PdfEngine.parallel_pages for this preset.
+        """
+        # preset examples: { "action": "compress", "quality": "screen" }
+        quality = preset.get("quality", "ebook") # defaults to ebook (medium)
+        source = None if StreamIO.is_path(input_path) else input_path
+        temp_path = None if StreamIO.is_path(output_path) else StreamIO.temp_output("pdf")
+
         try:
             # Check if output directory exists, create if not
-            out_dir = os.path.dirname(output_path)
+            out_dir = os.path.dirname(output_path) if temp_path is None else None
             if out_dir and not os.path.exists(out_dir):
                 os.makedirs(out_dir)
 
-            process = subprocess.Popen(cmd, stderr=subprocess.PIPE, text=True)
-
-            if process_holder is not None:
-                process_holder[0] = process
-
-            _, stderr = process.communicate()
-            
-            if process.returncode != 0:
-                print(f"Ghostscript Error: {stderr}")
+            page_count = 0
+            if source is None and preset.get("parallel", PdfEngine.parallel_pages):
+                # Reading the document structure blocks; keep it off the event loop
+                page_count = await asyncio.to_thread(PdfEngine._parallel_page_count, input_path, preset)
+            if page_count:
+                success = await PdfEngine._compress_parallel(input_path, temp_path or output_path, quality, page_count,
+                                                             threads)
+            else:
+                cmd = PdfEngine._gs_command("-" if source is not None else input_path, temp_path or output_path,
+                                            quality)
+                success = await PdfEngine._run_gs(cmd, source)
+            if not success:
                 return False
-                
+            if temp_path is not None:
+                await StreamIO.deliver(temp_path, output_path)
             return True
 
         except Exception as e:
             print(f"Exception during PDF compression: {e}")
             return False
+        finally:
+            if temp_path is not None:
+                StreamIO.discard(temp_path)
+
+    @staticmethod
+    def _parallel_page_count(input_path: str, preset: dict) -> int:
+        """
+        Returns the page count if this document should be compressed page-parallel, else 0.
+        """
+        if not preset.get("parallel", PdfEngine.parallel_pages):
+            return 0
+
+        try:
+            # pypdf is only needed to split/merge; without it every document takes the serial path
+            from pypdf import PdfReader
+        except ImportError:
+            print("Page-parallel PDF compression needs pypdf; using the serial path.")
+            return 0
+
+        try:
+            reader = PdfReader(input_path)
+            if reader.is_encrypted:
+                return 0
+            page_count = len(reader.pages)
+            catalog = reader.trailer["/Root"]
+            # Merging the parts keeps only pages, bookmarks and document info
+            kept_out = [key for key in ("/AcroForm", "/PageLabels", "/Dests") if key in catalog]
+            if "/Names" in catalog and "/Dests" in catalog["/Names"]:
+                kept_out.append("named destinations")
+        except Exception as e:
+            print(f"Could not read PDF structure ({e}); using the serial path.")
+            return 0
+
+        if page_count < PdfEngine.PARALLEL_MIN_PAGES:
+            return 0
+        if kept_out:
+            print(f"PDF has {', '.join(kept_out)}, which a page-parallel merge would drop; using the serial path.")
+            return 0
+        return page_count
+
+    @staticmethod
+    def _page_ranges(page_count: int, workers: int) -> list:
+        count = max(1, min(workers, page_count // PdfEngine.PARALLEL_MIN_RANGE))
+        size, extra = divmod(page_count, count)
+        ranges, first = [], 1
+        for i in range(count):
+            last = first + size - 1 + (1 if i < extra else 0)
+            ranges.append((first, last))
+            first = last + 1
+        return ranges
+
+    @staticmethod
+    async def _compress_parallel(input_path: str, output_path: str, quality: str, page_count: int,
+                                 threads: int = None) -> bool:
+        """
+        Compresses page ranges in separate Ghostscript processes with the serial path's settings,
+        then merges the parts and restores the original's bookmarks and document info.
+        Every part embeds its own copy of shared fonts and images, so a merge that comes out
+        larger than the input is dropped for the serial path.
+        Cancelling the task kills every Ghostscript process of the job.
+        """
+        ranges = PdfEngine._page_ranges(page_count, threads or os.cpu_count() or 1)
+
+        # Parts live next to the output so the final rename stays on one filesystem
+        parts_dir = tempfile.mkdtemp(prefix=".pdfparts-", dir=os.path.dirname(output_path) or ".")
+        try:
+            part_paths = [os.path.join(parts_dir, f"part{i:04d}.pdf") for i in range(len(ranges))]
+            # Failures come back as results, so no part is still being written when the parts dir goes
+            results = await asyncio.gather(
+                *(PdfEngine._run_gs(PdfEngine._gs_command(input_path, part_path, quality, *page_range))
+                  for part_path, page_range in zip(part_paths, ranges)),
+                return_exceptions=True)
+
+            if not all(result is True for result in results):
+                return False
+
+            merged_path = os.path.join(parts_dir, "merged.pdf")
+            await asyncio.to_thread(PdfEngine._merge_parts, input_path, part_paths, merged_path)
+            if os.path.getsize(merged_path) > os.path.getsize(input_path):
+                print("Page-parallel PDF came out larger than the input (resources repeated per part); "
+                      "using the serial path.")
+                return await PdfEngine._run_gs(PdfEngine._gs_command(input_path, output_path, quality))
+            os.replace(merged_path, output_path)
+            return True
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+
+    @staticmethod
+    def _merge_parts(original_path: str, part_paths: list, output_path: str):
+        from pypdf import PdfReader, PdfWriter
+
+        original = PdfReader(original_path)
+        writer = PdfWriter()
+        for part_path in part_paths:
+            # Bookmarks in the parts are partial; the full tree is rebuilt from the original below
+            writer.append(part_path, import_outline=False)
+
+        if original.metadata:
+            writer.add_metadata({key: value for key, value in original.metadata.items()})
+        PdfEngine._copy_outline(original, writer, original.outline)
+
+        with open(output_path, "wb") as f:
+            writer.write(f)
+
+    @staticmethod
+    def _copy_outline(reader, writer, items, parent=None):
+        # pypdf outlines are lists of destinations; a nested list holds the children of the item before it
+        from pypdf.generic import Fit
+
+        last_item = None
+        for item in items:
+            if isinstance(item, list):
+                if last_item is not None:
+                    PdfEngine._copy_outline(reader, writer, item, last_item)
+                continue
+
+            page_number = reader.get_destination_page_number(item)
+            if page_number is None or page_number < 0:
+                page_number = 0 # Bookmarks without a page (e.g. links) point at the first page
+            # Keep where on the page the bookmark lands and at what zoom, not just the page
+            fit = Fit(item.typ, [item.get(key) for key in PdfEngine.DESTINATION_ARGS.get(item.typ, ())])
+            last_item = writer.add_outline_item(item.title, page_number, parent=parent, fit=fit)
 
     @staticmethod
     def convert(input_path: str, output_path: str, preset: dict) -> bool:
@@ -2,9 +2,11 @@ import json
 import os
 import sys
 from src.core.file_detector import FileType
+from src.core.preset_plan import PresetPlan
 
 class PresetManager:
     _presets = None # Changed to None to indicate not loaded yet
+    _plans = {} # FileType -> { name: PresetPlan }, compiled on first use
 
     @staticmethod
     def _load_presets_internal():
@@ -56,3 +58,15 @@ class PresetManager:
             
         type_str = file_type.name  # IMAGE, VIDEO, PDF
         return cls._presets.get(type_str, {})
+
+    @classmethod
+    def get_plans(cls, file_type: FileType) -> dict:
+        """
+        Returns { name: PresetPlan } for a file type. Each preset is validated and compiled once.
+        """
+        plans = cls._plans.get(file_type)
+        if plans is None:
+            plans = {name: PresetPlan.compile(name, file_type, preset)
+                     for name, preset in cls.get_presets(file_type).items()}
+            cls._plans[file_type] = plans
+        return plans
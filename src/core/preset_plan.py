@@ -0,0 +1,121 @@
+import os
+import json
+
+from src.core.file_detector import FileType
+
+class PresetPlan:
+    """
+    A preset validated and compiled once: the engine that runs it, the tool's command line
+    with the input and output left open, and how its outputs are named.
+    Plans are immutable and shared by every job using the preset; invalid presets
+    still get a plan, with error set, so callers can report why they can't be used.
+    """
+    __slots__ = ("name", "file_type", "preset", "key", "engine", "output_ext", "argv", "error")
+
+    OUTPUT_SUFFIX = "_converted"
+
+    # Actions each file type's engine implements
+    ACTIONS = {
+        FileType.IMAGE: ("convert", "resize"),
+        FileType.VIDEO: ("convert", "resize"),
+        FileType.AUDIO: ("convert", "resize"),
+        FileType.PDF: ("compress",),
+    }
+    ENGINES = {
+        FileType.IMAGE: "imagemagick",
+        FileType.VIDEO: "ffmpeg",
+        FileType.AUDIO: "ffmpeg",
+        FileType.PDF: "ghostscript",
+    }
+
+    # Placeholders in argv; NUL can't occur in a path, so substituting them is unambiguous
+    INPUT = "\0input\0"
+    OUTPUT = "\0output\0"
+
+    def __init__(self, name, file_type, preset, engine=None, output_ext=None, argv=(), error=None):
+        set_slot = super().__setattr__
+        set_slot("name", name)
+        set_slot("file_type", file_type)
+        set_slot("preset", preset) # The preset dict handed to the engines; treat as read-only
+        set_slot("key", json.dumps(preset, sort_keys=True)) # Equal for presets with the same settings
+        set_slot("engine", engine)
+        set_slot("output_ext", output_ext) # None keeps the input's extension
+        set_slot("argv", tuple(argv))
+        set_slot("error", error)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PresetPlan is immutable")
+
+    def __repr__(self):
+        return f"PresetPlan({self.name!r}, {self.file_type.name}, {self.engine or self.error!r})"
+
+    @staticmethod
+    def compile(name: str, file_type: FileType, preset: dict) -> "PresetPlan":
+        """
+        Validates a preset for a file type and builds its plan.
+        """
+        preset = dict(preset)
+        error = PresetPlan._validate(file_type, preset)
+        if error:
+            return PresetPlan(name, file_type, preset, error=error)
+
+        output_ext = "." + preset["format"] if "format" in preset else None
+        return PresetPlan(name, file_type, preset, PresetPlan.ENGINES[file_type], output_ext,
+                          PresetPlan._argv(file_type, preset))
+
+    @staticmethod
+    def _validate(file_type: FileType, preset: dict):
+        action = preset.get("action")
+        if action == "custom":
+            return "Custom preset needs a configuration"
+        if file_type not in PresetPlan.ACTIONS:
+            return f"Unsupported file type {file_type.name}"
+        if action not in PresetPlan.ACTIONS[file_type]:
+            return f"Action not supported for {file_type.name}" if action else "Preset has no action"
+
+        fmt = preset.get("format")
+        if fmt is not None and (not isinstance(fmt, str) or not fmt.isalnum()):
+            return f"Invalid format {fmt!r}"
+        for key in ("width", "height"):
+            value = preset.get(key)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+                return f"Invalid {key} {value!r}"
+        return None
+
+    @staticmethod
+    def _argv(file_type: FileType, preset: dict) -> list:
+        """
+        The tool's command line for a plain run of this preset. Per-run additions (thread limits,
+        stream-copy maps, segment/page-parallel splits) are decided by the engines at run time.
+        """
+        if file_type == FileType.IMAGE:
+            from src.core.image_engine import ImageEngine
+            return ["convert", PresetPlan.INPUT] + ImageEngine._build_operations(preset) + [PresetPlan.OUTPUT]
+
+        if file_type == FileType.PDF:
+            from src.core.pdf_engine import PdfEngine
+            return PdfEngine._gs_command(PresetPlan.INPUT, PresetPlan.OUTPUT, preset.get("quality", "ebook"))
+
+        from src.core.ffmpeg_runner import FFmpegRunner
+        argv = FFmpegRunner.BASE_CMD + ["-i", PresetPlan.INPUT]
+        if file_type == FileType.VIDEO:
+            from src.core.video_engine import VideoEngine
+            scale = VideoEngine._scale_filter(preset)
+            if scale:
+                argv += ["-vf", scale]
+        return argv + [PresetPlan.OUTPUT]
+
+    def output_path(self, input_path: str, names) -> str:
+        """
+        Reserves "<name>_converted<ext>" next to the input, or the first free "(1)", "(2)", ...
+        variant of it. names: The OutputNames index handing out names for this run.
+        """
+        name, ext = os.path.splitext(input_path)
+        return names.reserve(f"{name}{PresetPlan.OUTPUT_SUFFIX}{self.output_ext or ext}")
+
+    def command(self, input_path: str, output_path: str) -> list:
+        """
+        The plan's command line for one job.
+        """
+        return [arg.replace(PresetPlan.INPUT, input_path).replace(PresetPlan.OUTPUT, output_path) if "\0" in arg else arg
+                for arg in self.argv]
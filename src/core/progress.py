@@ -0,0 +1,127 @@
+import os
+import threading
+
+class ConversionProgress:
+    """
+    Snapshot of a running conversion, passed to progress callbacks.
+    Fields are None when the tool does not report them (e.g. percent for inputs without a duration).
+    """
+    __slots__ = ("percent", "out_time", "fps", "speed", "total_size", "bitrate", "eta", "done")
+
+    def __init__(self, percent=None, out_time=None, fps=None, speed=None,
+                 total_size=None, bitrate=None, eta=None, done=False):
+        self.percent = percent        # int 0-100
+        self.out_time = out_time      # seconds of output written
+        self.fps = fps                # frames per second
+        self.speed = speed            # multiple of realtime (2.0 = twice as fast as playback)
+        self.total_size = total_size  # bytes written so far
+        self.bitrate = bitrate        # kbit/s
+        self.eta = eta                # seconds remaining
+        self.done = done
+
+    @staticmethod
+    def format_time(seconds) -> str:
+        seconds = int(seconds)
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+    def details(self) -> str:
+        """
+        Short human readable summary of everything except the percentage.
+        """
+        parts = []
+        if self.out_time is not None:
+            parts.append(ConversionProgress.format_time(self.out_time))
+        if self.fps:
+            parts.append(f"{self.fps:.0f} fps")
+        if self.speed:
+            parts.append(f"{self.speed:.2f}x")
+        if self.total_size:
+            parts.append(f"{self.total_size / 1024 ** 2:.1f} MB")
+        if self.eta is not None:
+            parts.append(f"ETA {ConversionProgress.format_time(self.eta)}")
+        return ", ".join(parts)
+
+    def __str__(self):
+        percent = f"{self.percent}%" if self.percent is not None else "--%"
+        details = self.details()
+        return f"{percent} ({details})" if details else percent
+
+    def __repr__(self):
+        return f"ConversionProgress({self})"
+
+class ProgressThrottle:
+    """
+    Sits between the scheduler and a UI: keeps only the latest progress per job and
+    delivers it at most once per refresh interval from a background thread, so many
+    parallel jobs can't flood the Qt event loop or a terminal.
+
+    Final progress (done=True) and finished callbacks are never throttled. Anything
+    still pending for a job is dropped before its finished callback runs, and delivery
+    happens under one lock, so a stale "Running" update never lands after a final status.
+    """
+    DEFAULT_INTERVAL_MS = 250
+    interval_ms = None # Set by --progress-interval; otherwise FILECONVERTER_PROGRESS_INTERVAL
+
+    @classmethod
+    def default_interval(cls) -> float:
+        """
+        Refresh interval in seconds shared by the GUI and CLI. 0 disables throttling.
+        """
+        interval_ms = cls.interval_ms
+        if interval_ms is None:
+            try:
+                interval_ms = float(os.environ.get("FILECONVERTER_PROGRESS_INTERVAL", cls.DEFAULT_INTERVAL_MS))
+            except ValueError:
+                interval_ms = cls.DEFAULT_INTERVAL_MS
+        return max(0.0, interval_ms / 1000)
+
+    def __init__(self, progress_cb, finished_cb=None, interval: float = None):
+        """
+        progress_cb: Called as progress_cb(job, ConversionProgress) with the latest value per job.
+        finished_cb: Optional; called as finished_cb(job, success, message) right away.
+        interval: Seconds between deliveries (defaults to default_interval()).
+        """
+        self.progress_cb = progress_cb
+        self.finished_cb = finished_cb
+        self.interval = ProgressThrottle.default_interval() if interval is None else interval
+
+        self._lock = threading.Lock()
+        self._pending = {} # id(job) -> (job, ConversionProgress)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def progress(self, job, progress):
+        if progress.done or self.interval <= 0:
+            with self._lock:
+                self._pending.pop(id(job), None)
+                self.progress_cb(job, progress)
+            return
+
+        with self._lock:
+            self._pending[id(job)] = (job, progress)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def finished(self, job, success, message):
+        with self._lock:
+            self._pending.pop(id(job), None)
+            if self.finished_cb:
+                self.finished_cb(job, success, message)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for job, progress in pending.values():
+                self.progress_cb(job, progress)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            self._pending.clear()
@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+
+class QtImageEngine:
+    """
+    In-process image conversion with QImageReader/QImageWriter for the common
+    small-image case (resize, JPG/PNG/WEBP), saving an ImageMagick process per file.
+    Jobs run on the scheduler's image thread pool; Qt releases the GIL while decoding,
+    scaling and encoding. Anything it can't handle is left to ImageEngine.
+
+    Enabled when PySide6 is already loaded (the GUI), so CLI runs stay Qt-free unless
+    asked for with --qt-images or FILECONVERTER_QT_IMAGES=1. FILECONVERTER_QT_IMAGES=0 disables it.
+    """
+    ENGINE = "qt"
+    OUTPUT_FORMATS = {"jpg": "jpeg", "jpeg": "jpeg", "png": "png", "webp": "webp"}
+    MAX_INPUT_SIZE = 20 * 1024 ** 2 # Bigger inputs go to ImageMagick
+    JPEG_QUALITY = 92 # ImageMagick's default when the input's quality is unknown
+
+    enabled = None # None: decide from FILECONVERTER_QT_IMAGES and whether PySide6 is loaded
+    _formats = None
+    _formats_lock = threading.Lock()
+
+    @classmethod
+    def available(cls) -> bool:
+        enabled = cls.enabled
+        if enabled is None:
+            setting = os.environ.get("FILECONVERTER_QT_IMAGES", "")
+            if setting in ("0", "false", "no"):
+                return False
+            enabled = setting in ("1", "true", "yes") or "PySide6.QtGui" in sys.modules
+        return enabled and cls._supported_formats() is not None
+
+    @classmethod
+    def _supported_formats(cls):
+        """
+        Returns (readable, writable) format name sets, or None if QtGui can't be imported.
+        """
+        with cls._formats_lock:
+            if cls._formats is None:
+                try:
+                    from PySide6.QtGui import QImageReader, QImageWriter
+                    readable = {bytes(f).decode().lower() for f in QImageReader.supportedImageFormats()}
+                    writable = {bytes(f).decode().lower() for f in QImageWriter.supportedImageFormats()}
+                    cls._formats = (readable, writable)
+                except ImportError:
+                    cls._formats = False
+            return cls._formats or None
+
+    @staticmethod
+    def version() -> str:
+        """
+        Identifies the Qt build doing the work (its codecs decide the output), e.g. for cache keys.
+        """
+        try:
+            import PySide6
+            from PySide6.QtCore import qVersion
+        except ImportError:
+            return "Qt unavailable"
+        return f"Qt {qVersion()} (PySide6 {PySide6.__version__})"
+
+    @classmethod
+    def can_handle(cls, job: dict) -> bool:
+        """
+        Cheap check (extension, action, size) whether this job should try the in-process path.
+        """
+        if not cls.available():
+            return False
+
+        preset = job['preset']
+        if preset.get("action") not in ("convert", "resize"):
+            return False
+
+        readable, writable = cls._supported_formats()
+        in_ext = os.path.splitext(job['path'])[1].lower().lstrip(".")
+        out_format = cls.OUTPUT_FORMATS.get(os.path.splitext(job['output_path'])[1].lower().lstrip("."))
+        if in_ext not in readable or out_format not in writable:
+            return False
+
+        try:
+            return os.path.getsize(job['path']) <= cls.MAX_INPUT_SIZE
+        except OSError:
+            return False
+
+    @staticmethod
+    def _target_size(size, preset: dict):
+        """
+        Returns the (width, height) ImageMagick's -resize would produce for this preset, or None.
+        """
+        if preset.get("action") != "resize":
+            return None
+
+        width = preset.get("width")
+        height = preset.get("height")
+        src_w, src_h = size.width(), size.height()
+        if width and height:
+            return width, height # Exact, like "WxH!"
+        elif width:
+            return width, max(1, round(src_h * width / src_w))
+        elif height:
+            return max(1, round(src_w * height / src_h)), height
+        return None
+
+    @staticmethod
+    def convert(input_path: str, output_path: str, preset: dict) -> bool:
+        """
+        Converts one image in-process. Returns False when Qt can't do it the way ImageMagick would
+        (animations, unreadable input, write errors) so the caller can fall back to ImageEngine.
+        """
+        from PySide6.QtCore import Qt, QSize
+        from PySide6.QtGui import QImage, QImageReader, QImageWriter
+
+        reader = QImageReader(input_path)
+        reader.setAutoTransform(False) # ImageMagick's convert doesn't apply EXIF orientation either
+        if not reader.canRead() or (reader.supportsAnimation() and reader.imageCount() > 1):
+            return False
+
+        size = reader.size()
+        target = QtImageEngine._target_size(size, preset) if size.isValid() else None
+        if target and target[0] < size.width() and target[1] < size.height():
+            # Decoders like JPEG can skip most of the work when asked for a smaller image up front
+            reader.setScaledSize(QSize(*target))
+
+        image = reader.read()
+        if image.isNull():
+            return False
+
+        if not size.isValid():
+            # Some decoders only know the size once the image is decoded
+            target = QtImageEngine._target_size(image.size(), preset)
+        if target and (image.width(), image.height()) != target:
+            image = image.scaled(target[0], target[1], Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+        out_format = QtImageEngine.OUTPUT_FORMATS[os.path.splitext(output_path)[1].lower().lstrip(".")]
+        if out_format == "jpeg" and image.hasAlphaChannel():
+            image = image.convertToFormat(QImage.Format_RGB32)
+
+        out_dir = os.path.dirname(output_path)
+        if out_dir and not os.path.exists(out_dir):
+            os.makedirs(out_dir, exist_ok=True)
+
+        writer = QImageWriter(output_path, out_format.encode())
+        if out_format == "jpeg":
+            writer.setQuality(QtImageEngine.JPEG_QUALITY)
+        if not writer.write(image):
+            print(f"Qt Image Error: {writer.errorString()}")
+            return False
+        return True
@@ -0,0 +1,474 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.core.file_detector import FileType
+from src.core.image_engine import ImageEngine
+from src.core.qt_image_engine import QtImageEngine
+from src.core.video_engine import VideoEngine
+from src.core.audio_engine import AudioEngine
+from src.core.pdf_engine import PdfEngine
+from src.core.progress import ConversionProgress
+from src.core.thread_budget import ThreadBudget
+
+class JobScheduler:
+    """
+    Runs conversion jobs concurrently with a separate pool of slots per engine,
+    so many light ImageMagick jobs can run next to a few heavy ffmpeg encodes.
+
+    A job is a dict { 'path': str, 'output_path': str, 'file_type': FileType, 'preset': dict }
+    plus an optional 'id' that tells jobs apart when several presets share an input
+    and an optional 'plan', the compiled PresetPlan the preset came from.
+    Every running job gets its own process holder so stop() can kill all of them,
+    and a share of a ThreadBudget recorded as job['threads'] and passed to its tool.
+    """
+    MAX_GROUP_OUTPUTS = 8 # Outputs written by one ffmpeg process at most
+
+    @staticmethod
+    def default_slots() -> dict:
+        cores = os.cpu_count() or 1
+        return {
+            FileType.IMAGE: cores,
+            FileType.VIDEO: max(1, cores // 4),
+            FileType.AUDIO: max(1, cores // 2),
+            FileType.PDF: max(1, cores // 2),
+        }
+
+    def __init__(self, slots: dict = None, max_jobs: int = None, cache=None):
+        """
+        slots: Optional { FileType: int } overriding the default concurrency per engine.
+        max_jobs: Optional cap on the number of jobs running at once across all engines.
+        cache: Optional ConversionCache consulted before and filled after each conversion.
+        """
+        self.slots = JobScheduler.default_slots()
+        if slots:
+            self.slots.update(slots)
+
+        self.cache = cache
+        self.is_running = True
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._job_limit = threading.BoundedSemaphore(max_jobs) if max_jobs else None
+        self._budget = ThreadBudget()
+        self._outstanding = {file_type: 0 for file_type in self.slots} # Tasks queued or running per engine
+        self._feeding = 0 # run() calls still reading their jobs iterable
+        self._process_holders = []
+        self._job_holders = {} # id(job) -> process holder of jobs running on their own
+        self._cancelled = {} # id(job) -> job cancelled with cancel(); the reference keeps the id from being reused
+        self._executors = {}
+        for file_type, count in self.slots.items():
+            self._executors[file_type] = ThreadPoolExecutor(
+                max_workers=max(1, count),
+                thread_name_prefix=f"convert-{file_type.name.lower()}"
+            )
+
+    @staticmethod
+    def convert_job(job: dict, process_holder: list = None, progress_cb=None):
+        """
+        Dispatches a single job to its engine. Blocks until the conversion ends.
+        Returns (success, error_msg).
+        """
+        input_path = job['path']
+        output_path = job['output_path']
+        preset_data = job['preset']
+        file_type = job['file_type']
+        threads = job.get('threads') # None leaves threading to the tool
+
+        if file_type == FileType.IMAGE:
+            # Small common cases are converted in-process; ImageMagick covers the rest and any Qt failure
+            if QtImageEngine.can_handle(job) and QtImageEngine.convert(input_path, output_path, preset_data):
+                job['engine'] = QtImageEngine.ENGINE # The cache keys the output on the engine that made it
+                return True, ""
+            job['engine'] = ImageEngine.ENGINE
+            success = ImageEngine.convert(input_path, output_path, preset_data, process_holder, threads)
+            return success, "" if success else "ImageMagick failed"
+        elif file_type == FileType.VIDEO:
+            # VideoEngine uses 'ffmpeg -i ...' which also handles audio extraction (mp3/wav presets)
+            success = VideoEngine.convert(input_path, output_path, preset_data, process_holder, progress_cb, threads)
+            return success, "" if success else "FFmpeg failed"
+        elif file_type == FileType.AUDIO:
+            success = AudioEngine.convert(input_path, output_path, preset_data, process_holder, progress_cb, threads)
+            return success, "" if success else "FFmpeg Audio failed"
+        elif file_type == FileType.PDF:
+            if preset_data.get("action") == "compress":
+                success = PdfEngine.compress(input_path, output_path, preset_data, process_holder, threads)
+                return success, "" if success else "Ghostscript compression failed"
+            return False, "Action not supported for PDF"
+
+        # Placeholder for other engines
+        return True, "Not implemented yet"
+
+    @staticmethod
+    def convert_group(jobs: list, process_holder: list = None, progress_cb=None) -> list:
+        """
+        Converts video or audio jobs that share one input in a single ffmpeg process.
+        Returns (success, error_msg) per job.
+        """
+        input_path = jobs[0]['path']
+        outputs = [(job['output_path'], job['preset']) for job in jobs]
+        threads = jobs[0].get('threads')
+        if jobs[0]['file_type'] == FileType.VIDEO:
+            results = VideoEngine.convert_multi(input_path, outputs, process_holder, progress_cb, threads)
+            error_msg = "FFmpeg failed"
+        else:
+            results = AudioEngine.convert_multi(input_path, outputs, process_holder, progress_cb, threads)
+            error_msg = "FFmpeg Audio failed"
+        return [(success, "" if success else error_msg) for success in results]
+
+    def submit(self, job: dict, progress_cb=None, finished_cb=None):
+        """
+        Queues a job on its engine's pool and returns the Future.
+        progress_cb: Optional callback(job, ConversionProgress).
+        finished_cb: Optional callback(job, success, message) fired once per job.
+        """
+        file_type = job['file_type'] if job['file_type'] in self._executors else FileType.IMAGE
+        self._count_outstanding(file_type, 1)
+        return self._executors[file_type].submit(self._run_job, job, progress_cb, finished_cb)
+
+    def submit_image_batch(self, jobs: list, progress_cb=None, finished_cb=None):
+        """
+        Queues image jobs sharing one preset to run in a single ImageMagick process.
+        finished_cb still fires once per job.
+        """
+        self._count_outstanding(FileType.IMAGE, 1)
+        return self._executors[FileType.IMAGE].submit(self._run_batch, jobs, progress_cb, finished_cb)
+
+    def submit_group(self, jobs: list, progress_cb=None, finished_cb=None):
+        """
+        Queues video or audio jobs sharing one input to be decoded once by a single ffmpeg process.
+        finished_cb still fires once per job.
+        """
+        self._count_outstanding(jobs[0]['file_type'], 1)
+        return self._executors[jobs[0]['file_type']].submit(self._run_group, jobs, progress_cb, finished_cb)
+
+    def run(self, jobs, progress_cb=None, finished_cb=None):
+        """
+        Submits every job and blocks until all of them have finished or been cancelled.
+        jobs may be any iterable, including a generator that is still discovering files:
+        it is consumed lazily and only a bounded number of jobs is queued at a time.
+        Image jobs that share a preset are grouped into batched ImageMagick runs, and
+        consecutive video/audio jobs on the same input into one multi-output ffmpeg run.
+        """
+        image_slots = max(1, self.slots.get(FileType.IMAGE, 1))
+        max_pending = 4 * sum(max(1, n) for n in self.slots.values())
+        pending = set()
+        image_groups = {}
+        image_batches = [0] # Image batches submitted but not finished yet
+        media_group = [] # Consecutive ffmpeg jobs on the same input, not submitted yet
+        lock = threading.Lock()
+
+        def image_batch_done(_):
+            with lock:
+                image_batches[0] -= 1
+
+        def submit_images(group):
+            with lock:
+                image_batches[0] += 1
+            future = self.submit_image_batch(group, progress_cb, finished_cb)
+            future.add_done_callback(image_batch_done)
+            pending.add(future)
+
+        def submit_media(group):
+            if len(group) == 1:
+                pending.add(self.submit(group[0], progress_cb, finished_cb))
+            else:
+                pending.add(self.submit_group(group, progress_cb, finished_cb))
+
+        with self._lock:
+            self._feeding += 1
+        try:
+            for job in jobs:
+                if not self.is_running:
+                    break
+
+                if media_group and (job['path'] != media_group[0]['path'] or job['file_type'] != media_group[0]['file_type']
+                                    or len(media_group) >= JobScheduler.MAX_GROUP_OUTPUTS):
+                    submit_media(media_group)
+                    media_group = []
+
+                if job['file_type'] in (FileType.VIDEO, FileType.AUDIO):
+                    media_group.append(job)
+                elif job['file_type'] == FileType.IMAGE and QtImageEngine.can_handle(job):
+                    # No process to start, so nothing to gain from batching: one pool task per image
+                    pending.add(self.submit(job, progress_cb, finished_cb))
+                elif job['file_type'] == FileType.IMAGE:
+                    key = job['plan'].key if 'plan' in job else json.dumps(job['preset'], sort_keys=True)
+                    group = image_groups.setdefault(key, [])
+                    group.append(job)
+                    # Start right away while image slots are idle; batch up while they are busy
+                    with lock:
+                        idle = image_batches[0] < image_slots
+                    if idle or len(group) >= ImageEngine.BATCH_SIZE:
+                        submit_images(image_groups.pop(key))
+                else:
+                    pending.add(self.submit(job, progress_cb, finished_cb))
+
+                if len(pending) >= max_pending:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+        finally:
+            # Everything left to submit is known now; thread shares can stop reserving room for more
+            with self._lock:
+                self._feeding -= 1
+
+        if media_group:
+            submit_media(media_group)
+        for group in image_groups.values():
+            for chunk in self._chunk_image_jobs(group):
+                submit_images(chunk)
+
+        wait(pending)
+
+    def _chunk_image_jobs(self, jobs):
+        # Spread a group over every image slot before making any chunk bigger
+        slots = max(1, self.slots.get(FileType.IMAGE, 1))
+        size = min(ImageEngine.BATCH_SIZE, max(1, -(-len(jobs) // slots)))
+        for i in range(0, len(jobs), size):
+            yield jobs[i:i + size]
+
+    def _count_outstanding(self, file_type, delta):
+        with self._lock:
+            self._outstanding[file_type] += delta
+
+    def _thread_share(self) -> int:
+        """
+        Threads one task should ask for: the cores split over the tasks that can run at once.
+        """
+        with self._lock:
+            # While jobs are still being read, expect one more per busy engine: a lone first job
+            # must not take every core just because the next one hasn't been discovered yet
+            expected = 1 if self._feeding else 0
+            concurrent = sum(min(count + expected, max(1, self.slots[file_type]))
+                             for file_type, count in self._outstanding.items() if count)
+        if self.max_jobs:
+            concurrent = min(concurrent, self.max_jobs)
+        return -(-self._budget.total // max(1, concurrent))
+
+    def _run_with_budget(self, execute, jobs, progress_cb, finished_cb):
+        file_type = jobs[0]['file_type'] if jobs[0]['file_type'] in self._executors else FileType.IMAGE
+        try:
+            if self._job_limit is None:
+                return self._execute_with_threads(execute, jobs, progress_cb, finished_cb)
+            with self._job_limit:
+                return self._execute_with_threads(execute, jobs, progress_cb, finished_cb)
+        finally:
+            self._count_outstanding(file_type, -1)
+
+    def _execute_with_threads(self, execute, jobs, progress_cb, finished_cb):
+        # In-process Qt conversions use one thread; everything else asks for a fair share of the cores
+        single_qt_image = len(jobs) == 1 and jobs[0]['file_type'] == FileType.IMAGE and QtImageEngine.can_handle(jobs[0])
+        threads = self._budget.acquire(1 if single_qt_image else self._thread_share())
+        for job in jobs:
+            job['threads'] = threads
+        try:
+            return execute(jobs, progress_cb, finished_cb)
+        finally:
+            self._budget.release(threads)
+
+    def _run_job(self, job, progress_cb, finished_cb):
+        return self._run_with_budget(lambda jobs, p, f: self._execute(jobs[0], p, f), [job], progress_cb, finished_cb)
+
+    def _run_batch(self, jobs, progress_cb, finished_cb):
+        return self._run_with_budget(self._execute_batch, jobs, progress_cb, finished_cb)
+
+    def _run_group(self, jobs, progress_cb, finished_cb):
+        return self._run_with_budget(self._execute_group, jobs, progress_cb, finished_cb)
+
+    def _execute_group(self, jobs, progress_cb, finished_cb):
+        if not self.is_running:
+            if finished_cb:
+                for job in jobs:
+                    finished_cb(job, False, "Cancelled")
+            return False
+
+        process_holder = [None]
+        with self._lock:
+            self._process_holders.append(process_holder)
+
+        if progress_cb:
+            for job in jobs:
+                progress_cb(job, ConversionProgress(percent=0))
+
+        cached = set()
+        if self.cache is not None:
+            cached = {id(job) for job in jobs if self.cache.fetch(job)}
+        pending = [job for job in jobs if id(job) not in cached]
+
+        # All outputs advance together: one ffmpeg progress stream feeds every job in the group
+        def report_group(p):
+            for job in pending:
+                progress_cb(job, p)
+        group_progress_cb = report_group if progress_cb else None
+
+        results = {}
+        try:
+            if len(pending) == 1:
+                results[id(pending[0])] = JobScheduler.convert_job(pending[0], process_holder, group_progress_cb)
+            elif pending:
+                for job, result in zip(pending, JobScheduler.convert_group(pending, process_holder, group_progress_cb)):
+                    results[id(job)] = result
+            for job in pending:
+                if results[id(job)][0] and self.cache is not None and self.is_running:
+                    self.cache.store(job)
+        except Exception as e:
+            print(f"Exception during grouped conversion: {e}")
+            results = {id(job): (False, str(e)) for job in pending}
+        finally:
+            with self._lock:
+                self._process_holders.remove(process_holder)
+
+        all_succeeded = True
+        for job in jobs:
+            success, message = results.get(id(job), (id(job) in cached, ""))
+            if not self.is_running:
+                success, message = False, "Cancelled"
+            elif success:
+                message = "Completed (cached)" if id(job) in cached else "Completed"
+                if progress_cb:
+                    progress_cb(job, ConversionProgress(percent=100, done=True))
+
+            all_succeeded = all_succeeded and success
+            if finished_cb:
+                finished_cb(job, success, message)
+        return all_succeeded
+
+    def _execute_batch(self, jobs, progress_cb, finished_cb):
+        if not self.is_running:
+            if finished_cb:
+                for job in jobs:
+                    finished_cb(job, False, "Cancelled")
+            return False
+
+        process_holder = [None]
+        with self._lock:
+            self._process_holders.append(process_holder)
+
+        if progress_cb:
+            for job in jobs:
+                progress_cb(job, ConversionProgress(percent=0))
+
+        cached = set()
+        if self.cache is not None:
+            cached = {id(job) for job in jobs if self.cache.fetch(job)}
+        pending = [job for job in jobs if id(job) not in cached]
+
+        results = {}
+        try:
+            if pending:
+                pairs = [(job['path'], job['output_path']) for job in pending]
+                results_batch = ImageEngine.convert_batch(pairs, jobs[0]['preset'], process_holder, jobs[0].get('threads'))
+                for job, success in zip(pending, results_batch):
+                    results[id(job)] = success
+                    if success and self.cache is not None and self.is_running:
+                        self.cache.store(job)
+        except Exception as e:
+            print(f"Exception during batch conversion: {e}")
+        finally:
+            with self._lock:
+                self._process_holders.remove(process_holder)
+
+        all_succeeded = True
+        for job in jobs:
+            success = id(job) in cached or results.get(id(job), False)
+            if not self.is_running:
+                success, message = False, "Cancelled"
+            elif success:
+                message = "Completed (cached)" if id(job) in cached else "Completed"
+                if progress_cb:
+                    progress_cb(job, ConversionProgress(percent=100, done=True))
+            else:
+                message = "ImageMagick failed"
+
+            all_succeeded = all_succeeded and success
+            if finished_cb:
+                finished_cb(job, success, message)
+        return all_succeeded
+
+    def _execute(self, job, progress_cb, finished_cb):
+        if not self.is_running or self._cancelled.get(id(job)) is job:
+            self._forget_cancelled(job)
+            if finished_cb:
+                finished_cb(job, False, "Cancelled")
+            return False
+
+        process_holder = [None]
+        with self._lock:
+            self._process_holders.append(process_holder)
+            self._job_holders[id(job)] = process_holder
+
+        job_progress_cb = None
+        if progress_cb:
+            job_progress_cb = lambda p: progress_cb(job, p)
+            # Notify start
+            progress_cb(job, ConversionProgress(percent=0))
+
+        cached = False
+        try:
+            cached = self.cache is not None and self.cache.fetch(job)
+            if cached:
+                success, error_msg = True, ""
+            else:
+                success, error_msg = JobScheduler.convert_job(job, process_holder, job_progress_cb)
+                if success and self.cache is not None and self.is_running:
+                    self.cache.store(job)
+        except Exception as e:
+            success, error_msg = False, str(e)
+        finally:
+            with self._lock:
+                self._process_holders.remove(process_holder)
+                del self._job_holders[id(job)]
+
+        # Check if stopped during process
+        if not self.is_running or self._forget_cancelled(job):
+            success, error_msg = False, "Cancelled"
+        elif success and progress_cb:
+            progress_cb(job, ConversionProgress(percent=100, done=True))
+
+        if success:
+            message = "Completed (cached)" if cached else "Completed"
+        else:
+            message = error_msg
+        if finished_cb:
+            finished_cb(job, success, message)
+        return success
+
+    def cancel(self, job: dict):
+        """
+        Cancels one job queued with submit(): it is skipped if it hasn't started and its process
+        is killed if it has. Its finished callback reports "Cancelled".
+        Jobs in image batches and ffmpeg groups share a process and are only stopped by stop().
+        """
+        with self._lock:
+            self._cancelled[id(job)] = job
+            holder = self._job_holders.get(id(job))
+        if holder and holder[0]:
+            try:
+                holder[0].kill()
+            except Exception as e:
+                print(f"Error killing process: {e}")
+
+    def _forget_cancelled(self, job) -> bool:
+        with self._lock:
+            if self._cancelled.get(id(job)) is job:
+                del self._cancelled[id(job)]
+                return True
+            return False
+
+    def stop(self):
+        """
+        Cancels pending jobs and kills every running process.
+        """
+        self.is_running = False
+        with self._lock:
+            holders = list(self._process_holders)
+
+        for holder in holders:
+            if holder[0]:
+                try:
+                    holder[0].kill()
+                except Exception as e:
+                    print(f"Error killing process: {e}")
+
+    def shutdown(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
@@ -0,0 +1,156 @@
+import os
+import shutil
+import asyncio
+import tempfile
+
+class StreamIO:
+    """
+    Lets the engines take a stream wherever they take a path, so data held in memory or
+    arriving over a socket needs no temporary file. A source may be a file descriptor,
+    a readable binary file object or bytes; a sink a file descriptor or a writable binary
+    file object. The tool reads its stdin and writes its stdout: file descriptors are
+    handed to it as they are, anything else is copied through a pipe by the event loop.
+
+    Output formats a tool can only write to a seekable file (headers patched or an index
+    written at the end, e.g. MP4 or PDF) go to a temporary file that is copied to the
+    sink once the tool has finished.
+    """
+    CHUNK_SIZE = 256 * 1024
+
+    @staticmethod
+    def is_path(target) -> bool:
+        return isinstance(target, (str, os.PathLike))
+
+    @staticmethod
+    def fileno(stream):
+        """
+        The file descriptor behind a stream (an int, or a file object backed by one),
+        or None for in-memory streams, which are copied through a pipe instead.
+        """
+        if isinstance(stream, int):
+            return stream
+        if isinstance(stream, (bytes, bytearray, memoryview)):
+            return None
+        try:
+            return stream.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    @staticmethod
+    def stdio(source=None, sink=None):
+        """
+        (stdin, stdout) for asyncio.create_subprocess_exec: a stream's own descriptor, a pipe
+        for in-memory streams, or None (inherited) where no stream is given.
+        """
+        # The tool uses a file object's descriptor directly, so its buffer must agree with the descriptor's position
+        stdin = stdout = None
+        if source is not None:
+            fd = StreamIO.fileno(source)
+            if fd is not None and getattr(source, "seekable", lambda: False)():
+                os.lseek(fd, source.tell(), os.SEEK_SET)
+            stdin = asyncio.subprocess.PIPE if fd is None else fd
+        if sink is not None:
+            fd = StreamIO.fileno(sink)
+            if fd is not None and hasattr(sink, "flush"):
+                sink.flush()
+            stdout = asyncio.subprocess.PIPE if fd is None else fd
+        return stdin, stdout
+
+    @staticmethod
+    def transfers(process, source=None, sink=None) -> list:
+        """
+        Starts the copies between in-memory streams and the tool's pipes. Returns the tasks.
+        """
+        tasks = []
+        if process.stdin is not None and source is not None:
+            tasks.append(asyncio.ensure_future(StreamIO._feed(process.stdin, source)))
+        if process.stdout is not None and sink is not None:
+            tasks.append(asyncio.ensure_future(StreamIO._drain(process.stdout, sink)))
+        return tasks
+
+    @staticmethod
+    async def _feed(stdin, source):
+        try:
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                stdin.write(source)
+                await stdin.drain()
+            else:
+                while True:
+                    chunk = source.read(StreamIO.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    stdin.write(chunk)
+                    await stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass # The tool stopped reading (e.g. it failed); its return code tells why
+        finally:
+            stdin.close()
+
+    @staticmethod
+    async def _drain(stdout, sink):
+        while True:
+            chunk = await stdout.read(StreamIO.CHUNK_SIZE)
+            if not chunk:
+                break
+            sink.write(chunk)
+
+    @staticmethod
+    def output_format(input_path, output_path, preset: dict):
+        """
+        The format written to an output: its extension, or for a stream the preset's
+        format (falling back to the input's extension). None when it can't be told.
+        """
+        target = output_path if StreamIO.is_path(output_path) else input_path
+        fmt = preset.get("format")
+        if fmt is None or StreamIO.is_path(output_path):
+            fmt = os.path.splitext(target)[1].lstrip(".") if StreamIO.is_path(target) else None
+        return fmt.lower() if fmt else None
+
+    @staticmethod
+    def temp_output(fmt: str) -> str:
+        """
+        A temporary file for an output that has to be seekable. Remove it with discard().
+        """
+        fd, path = tempfile.mkstemp(prefix="fileconverter-", suffix=f".{fmt}")
+        os.close(fd)
+        return path
+
+    @staticmethod
+    async def deliver(path: str, sink):
+        """
+        Copies a finished temporary output to its sink.
+        """
+        await asyncio.to_thread(StreamIO._copy_file, path, sink)
+
+    @staticmethod
+    def _copy_file(path: str, sink):
+        with open(path, "rb") as f:
+            fd = StreamIO.fileno(sink)
+            if fd is None:
+                shutil.copyfileobj(f, sink, StreamIO.CHUNK_SIZE)
+                return
+            if hasattr(sink, "flush"):
+                sink.flush()
+            # Kernel-side copy where the platform supports it for this kind of descriptor
+            offset, size = 0, os.fstat(f.fileno()).st_size
+            try:
+                if not hasattr(os, "sendfile"):
+                    raise OSError("no sendfile") # Windows
+                while offset < size:
+                    sent = os.sendfile(fd, f.fileno(), offset, size - offset)
+                    if not sent:
+                        break
+                    offset += sent
+            except OSError:
+                f.seek(offset)
+                for chunk in iter(lambda: f.read(StreamIO.CHUNK_SIZE), b""):
+                    view = memoryview(chunk)
+                    while view:
+                        view = view[os.write(fd, view):]
+
+    @staticmethod
+    def discard(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,28 @@
+import os
+import threading
+
+class ThreadBudget:
+    """
+    Hands out the machine's cores to running jobs so that concurrent ffmpeg,
+    ImageMagick and Ghostscript processes together use about one thread per core
+    instead of each assuming the whole machine is theirs.
+    Every job gets at least one thread, even when the budget is spent.
+    """
+
+    def __init__(self, total: int = None):
+        self.total = total or os.cpu_count() or 1
+        self.allocated = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, want: int) -> int:
+        """
+        Reserves up to want threads (at least 1) and returns how many were granted.
+        """
+        with self._lock:
+            threads = max(1, min(want, self.total - self.allocated))
+            self.allocated += threads
+            return threads
+
+    def release(self, threads: int):
+        with self._lock:
+            self.allocated -= threads
@@ -1,91 +1,206 @@
-import subprocess
 import os
+import shutil
+import asyncio
+import tempfile
+
+from src.core.async_process import AsyncProcess
+from src.core.ffmpeg_runner import FFmpegRunner
+from src.core.media_info import MediaInfoExtractor
+from src.core.progress import ConversionProgress
+from src.core.stream_io import StreamIO
 
 class VideoEngine:
+    # Segment-parallel encoding (opt-in): FILECONVERTER_VIDEO_SEGMENTS=1, --video-segments or "segmented": true on a preset
+    segment_parallel = os.environ.get("FILECONVERTER_VIDEO_SEGMENTS", "") in ("1", "true", "yes")
+    SEGMENT_MIN_DURATION = 600 # seconds; shorter inputs are encoded in one process
+    SEGMENT_MIN_LENGTH = 60    # seconds; shortest segment worth its own process
+
+    # Codecs each video container can hold as-is (None = anything goes).
+    # Streams already in one of these are copied instead of re-encoded.
+    CONTAINER_CODECS = {
+        "mp4": {
+            "video": {"h264", "hevc", "av1", "vp9", "mpeg4"},
+            "audio": {"aac", "mp3", "ac3", "eac3", "opus", "alac", "flac"},
+            "subtitle": {"mov_text"},
+        },
+        "mov": {
+            "video": {"h264", "hevc", "mpeg4", "prores", "mjpeg"},
+            "audio": {"aac", "mp3", "ac3", "alac", "pcm_s16le", "pcm_s24le"},
+            "subtitle": {"mov_text"},
+        },
+        "webm": {
+            "video": {"vp8", "vp9", "av1"},
+            "audio": {"vorbis", "opus"},
+            "subtitle": {"webvtt"},
+        },
+        "avi": {
+            "video": {"mpeg4", "h264", "mjpeg", "msmpeg4v3"},
+            "audio": {"mp3", "ac3", "pcm_s16le"},
+        },
+        "mkv": None,
+    }
+
+    @staticmethod
+    def _select_streams(info: dict):
+        """
+        Returns (video, audio) stream infos using ffmpeg's default picks:
+        largest video, audio with most channels. Either may be None.
+        """
+        videos = [s for s in info.get("streams", []) if s.get("type") == "video"]
+        audios = [s for s in info.get("streams", []) if s.get("type") == "audio"]
+        video = max(videos, key=lambda s: (s.get("width") or 0) * (s.get("height") or 0)) if videos else None
+        audio = max(audios, key=lambda s: s.get("channels") or 0) if audios else None
+        return video, audio
+
+    @staticmethod
+    def _can_copy(stream: dict, container: str, mode) -> bool:
+        if mode is False or container not in VideoEngine.CONTAINER_CODECS:
+            return False
+        accepted = VideoEngine.CONTAINER_CODECS[container]
+        return mode is True or accepted is None or stream.get("codec") in accepted.get(stream["type"], ())
+
+    @staticmethod
+    async def _get_info(input_path: str) -> dict:
+        # ffprobe (or the media index) blocks; keep it off the event loop
+        return await asyncio.to_thread(MediaInfoExtractor.get_info, input_path)
+
+    @staticmethod
+    def _container(output_path: str) -> str:
+        return os.path.splitext(output_path)[1].lower().lstrip(".")
+
+    @staticmethod
+    def _needs_info(container: str, preset: dict) -> bool:
+        """
+        Whether stream copy or the segment plan have to look at the input's streams.
+        """
+        if preset.get("segmented", VideoEngine.segment_parallel):
+            return True
+        return preset.get("stream_copy", "auto") is not False and container in VideoEngine.CONTAINER_CODECS
+
+    @staticmethod
+    def _stream_args(container: str, preset: dict, video_filtered: bool, info: dict) -> list:
+        """
+        Returns -map/-c options that copy every stream the target container accepts,
+        leaving the rest to ffmpeg's default encoder for that container.
+        Streams besides the main video and audio (more audio tracks, subtitles, attachments)
+        are kept and copied where the container takes them as they are.
+        preset["stream_copy"]: "auto" (default), True to copy whenever no filter applies, False to always re-encode.
+        info: The input's MediaInfoExtractor info (None when not needed).
+        Returns [] (ffmpeg's default stream selection and encoding) when copying does not apply,
+        or when a subtitle would need converting (the default mapping converts the first one).
+        """
+        mode = preset.get("stream_copy", "auto")
+        if mode is False or container not in VideoEngine.CONTAINER_CODECS:
+            return []
+
+        if info is None or "error" in info:
+            return []
+
+        selected = [stream for stream in VideoEngine._select_streams(info) if stream]
+        chosen = {stream['index'] for stream in selected}
+        extras = []
+        for stream in info.get("streams", []):
+            if stream['index'] in chosen:
+                continue
+            if VideoEngine._can_copy(stream, container, mode):
+                extras.append(stream)
+            elif stream["type"] == "subtitle":
+                return []
+            # Anything else (data tracks, attachments outside Matroska) isn't kept by ffmpeg's default mapping either
+
+        args = []
+        copied = False
+        for out_index, stream in enumerate(selected):
+            args.extend(["-map", f"0:{stream['index']}"])
+            if stream["type"] == "video" and video_filtered:
+                continue
+            if VideoEngine._can_copy(stream, container, mode):
+                args.extend([f"-c:{out_index}", "copy"])
+                copied = True
+
+        if not copied:
+            return []
+        for out_index, stream in enumerate(extras, len(selected)):
+            args.extend(["-map", f"0:{stream['index']}", f"-c:{out_index}", "copy"])
+        return args
+
     @staticmethod
-    def convert(input_path: str, output_path: str, preset: dict, p_holder: list = None, progress_cb=None) -> bool:
-        """
-        Executes FFmpeg command based on preset.
-        p_holder: Optional list acting as a mutable pointer to store the Popen object.
-        progress_cb: Optional callback(int) for progress percentage.
-        """
-        cmd = ["ffmpeg", "-y", "-i", input_path] 
-
-        # We need to see progress info, so removed "-loglevel error"
-        # But we still want to hide banner
-        cmd.extend(["-hide_banner"])
-
-        action = preset.get("action")
-        
-        if action == "resize":
-            width = preset.get("width")
-            height = preset.get("height")
-            
-            if width and height:
-                # User specified both, force exact dimensions
-                # Note: This may change aspect ratio, but adheres to user request of "same as I give"
-                cmd.extend(["-vf", f"scale={width}:{height}"])
-            elif width:
-                cmd.extend(["-vf", f"scale={width}:-2"])
-            elif height:
-                cmd.extend(["-vf", f"scale=-2:{height}"])
-        
-        cmd.append(output_path)
-        
+    def _scale_filter(preset: dict):
+        """
+        Returns the scale filter for a resize preset, or None.
+        """
+        if preset.get("action") != "resize":
+            return None
+
+        width = preset.get("width")
+        height = preset.get("height")
+        if width and height:
+            # User specified both, force exact dimensions
+            # Note: This may change aspect ratio, but adheres to user request of "same as I give"
+            return f"scale={width}:{height}"
+        elif width:
+            return f"scale={width}:-2"
+        elif height:
+            return f"scale=-2:{height}"
+        return None
+
+    @staticmethod
+    def convert(input_path, output_path, preset: dict, p_holder: list = None, progress_cb=None,
+                threads: int = None) -> bool:
+        """
+        Blocking form of convert_async().
+        p_holder: Optional list acting as a mutable pointer; holder[0].kill() stops ffmpeg.
+        """
+        return AsyncProcess.run_sync(VideoEngine.convert_async(input_path, output_path, preset, progress_cb, threads),
+                                     p_holder)
+
+    @staticmethod
+    async def convert_async(input_path, output_path, preset: dict, progress_cb=None,
+                            threads: int = None) -> bool:
+        """
+        Executes FFmpeg command based on preset. Cancelling the awaiting task kills ffmpeg.
+        Streams whose codec the target container already accepts are copied, not re-encoded.
+        input_path, output_path: Paths, or streams (see StreamIO) read from stdin / written to stdout;
+        a stream output is written in the preset's format, else the input's. A stream input
+        can't be probed, so it is always re-encoded in one process.
+        progress_cb: Optional callback(ConversionProgress) fed from ffmpeg's -progress stream.
+        threads: Optional cap on ffmpeg's encoder/filter threads (default: ffmpeg's auto).
+        """
+        scale = VideoEngine._scale_filter(preset)
+        filter_args = ["-vf", scale] if scale else []
+        video_filtered = bool(filter_args)
+
+        source = None if StreamIO.is_path(input_path) else input_path
+        to_path = StreamIO.is_path(output_path)
+        container = StreamIO.output_format(input_path, output_path, preset)
+        if not container and not to_path:
+            print("FFmpeg Error: a stream output needs a preset with a format")
+            return False
+
         try:
             # Check if output directory exists, create if not
-            out_dir = os.path.dirname(output_path)
+            out_dir = os.path.dirname(output_path) if to_path else None
             if out_dir and not os.path.exists(out_dir):
                 os.makedirs(out_dir)
 
-            process = subprocess.Popen(cmd, stderr=subprocess.PIPE, universal_newlines=True)
-
-            if p_holder is not None:
-                p_holder[0] = process
-
-            total_duration = None
-            
-            # Read stderr line by line
-            while True:
-                line = process.stderr.readline()
-                if not line:
-                    break
-                    
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Parse Duration: 00:00:00.00
-                if "Duration:" in line and total_duration is None:
-                    try:
-                        time_str = line.split("Duration:")[1].split(",")[0].strip()
-                        h, m, s = time_str.split(':')
-                        total_duration = float(h) * 3600 + float(m) * 60 + float(s)
-                    except:
-                        pass
-                
-                # Parse time=00:00:00.00
-                if "time=" in line and total_duration:
-                    try:
-                        # Example: frame=... time=00:00:10.50 bitrate=...
-                        # Find 'time='
-                        parts = line.split()
-                        for p in parts:
-                            if p.startswith("time="):
-                                t_str = p.split("=")[1]
-                                h, m, s = t_str.split(':')
-                                current_time = float(h) * 3600 + float(m) * 60 + float(s)
-                                percent = int((current_time / total_duration) * 100)
-                                if progress_cb:
-                                    progress_cb(percent)
-                                break
-                    except:
-                        pass
-
-            process.wait()
-            
-            if process.returncode != 0:
-                # End of stream 
+            info = None
+            if source is None and VideoEngine._needs_info(container, preset):
+                info = await VideoEngine._get_info(input_path)
+            # Segments are joined next to the output, so only a file output is split
+            plan = VideoEngine._segment_plan(container, preset, video_filtered, info) if to_path else None
+            if plan:
+                return await VideoEngine._convert_segmented(input_path, output_path, preset, filter_args, plan,
+                                                            progress_cb, threads)
+
+            args = FFmpegRunner.thread_args(threads) + ["-i", "pipe:0" if source is not None else input_path]
+            args.extend(filter_args)
+            args.extend(VideoEngine._stream_args(container, preset, video_filtered, info))
+            args.extend(FFmpegRunner.thread_args(threads))
+
+            returncode, stderr = await FFmpegRunner.run_to(args, output_path, container, progress_cb, source)
+
+            if returncode != 0:
+                print(f"FFmpeg Error: {stderr}")
                 return False
                 
             return True
@@ -93,3 +208,229 @@ class VideoEngine:
         except Exception as e:
             print(f"Exception during video conversion: {e}")
             return False
+
+    @staticmethod
+    def convert_multi(input_path: str, outputs: list, p_holder: list = None, progress_cb=None, threads: int = None) -> list:
+        """
+        Blocking form of convert_multi_async().
+        p_holder: Optional list acting as a mutable pointer; holder[0].kill() stops ffmpeg.
+        """
+        return AsyncProcess.run_sync(VideoEngine.convert_multi_async(input_path, outputs, progress_cb, threads),
+                                     p_holder, [False] * len(outputs))
+
+    @staticmethod
+    async def convert_multi_async(input_path: str, outputs: list, progress_cb=None, threads: int = None) -> list:
+        """
+        Writes several outputs of one input from a single ffmpeg process, so the source is
+        read and decoded once. Resized outputs share one decode through a split filter graph.
+        outputs: [(output_path, preset)]. Returns one success flag per output.
+        Outputs the combined run did not write are retried on their own (unless the run was killed).
+        """
+        info = await VideoEngine._get_info(input_path)
+        video, audio = VideoEngine._select_streams(info) if "error" not in info else (None, None)
+
+        # Segment-parallel outputs keep their own path; the rest share the decode
+        solo = {i for i, (output_path, preset) in enumerate(outputs)
+                if video is None or VideoEngine._segment_plan(VideoEngine._container(output_path), preset,
+                                                              bool(VideoEngine._scale_filter(preset)), info)}
+        shared = [i for i in range(len(outputs)) if i not in solo]
+        results = [False] * len(outputs)
+
+        if len(shared) > 1:
+            results_shared = await VideoEngine._convert_shared(input_path, [outputs[i] for i in shared], info,
+                                                               progress_cb, threads)
+            for i, success in zip(shared, results_shared):
+                results[i] = success
+        else:
+            solo.update(shared)
+
+        for i in sorted(solo):
+            output_path, preset = outputs[i]
+            results[i] = await VideoEngine.convert_async(input_path, output_path, preset, progress_cb, threads)
+        return results
+
+    @staticmethod
+    async def _convert_shared(input_path: str, outputs: list, info: dict, progress_cb=None, threads: int = None) -> list:
+        video, audio = VideoEngine._select_streams(info)
+        scales = [VideoEngine._scale_filter(preset) for _, preset in outputs]
+        scaled = [i for i, scale in enumerate(scales) if scale]
+
+        args = FFmpegRunner.thread_args(threads) + ["-i", input_path]
+        if scaled:
+            # [0:v]split=2[s0][s1];[s0]scale=-2:1080[v0];[s1]scale=-2:720[v1]
+            graph = f"[0:{video['index']}]split={len(scaled)}" + "".join(f"[s{i}]" for i in scaled)
+            graph += "".join(f";[s{i}]{scales[i]}[v{i}]" for i in scaled)
+            args.extend(["-filter_complex", graph])
+            if threads:
+                args.extend(["-filter_complex_threads", str(threads)])
+
+        for i, (output_path, preset) in enumerate(outputs):
+            out_dir = os.path.dirname(output_path)
+            if out_dir and not os.path.exists(out_dir):
+                os.makedirs(out_dir)
+            container = VideoEngine._container(output_path)
+
+            if i in scaled:
+                args.extend(["-map", f"[v{i}]"])
+                if audio is not None:
+                    args.extend(["-map", f"0:{audio['index']}"])
+                    if VideoEngine._can_copy(audio, container, preset.get("stream_copy", "auto")):
+                        args.extend(["-c:a", "copy"])
+            else:
+                args.extend(VideoEngine._stream_args(container, preset, False, info))
+            # The outputs' encoders run side by side, so they split the allocation
+            args.extend(FFmpegRunner.thread_args(max(1, threads // len(outputs)) if threads else None))
+            args.append(output_path)
+
+        try:
+            returncode, stderr = await FFmpegRunner.run_async(args, progress_cb)
+        except Exception as e:
+            print(f"Exception during video conversion: {e}")
+            returncode, stderr = 1, ""
+
+        if returncode < 0:
+            return [False] * len(outputs) # Killed (cancelled); don't start the retries
+        if returncode != 0:
+            print(f"FFmpeg Error (multiple outputs), retrying each output: {stderr}")
+
+        # Outputs the combined run did not write are retried on their own
+        return [(returncode == 0 and VideoEngine._has_output(output_path))
+                or await VideoEngine.convert_async(input_path, output_path, preset, progress_cb, threads)
+                for output_path, preset in outputs]
+
+    @staticmethod
+    def _has_output(output_path: str) -> bool:
+        try:
+            return os.path.getsize(output_path) > 0
+        except OSError:
+            return False
+
+    @staticmethod
+    def _segment_plan(container: str, preset: dict, video_filtered: bool, info: dict):
+        """
+        Returns (duration, video stream, audio stream) if the input should be encoded in parallel segments, else None.
+        preset["segmented"]: Overrides VideoEngine.segment_parallel for this preset.
+        info: The input's MediaInfoExtractor info.
+        """
+        if not preset.get("segmented", VideoEngine.segment_parallel) or info is None:
+            return None
+
+        try:
+            duration = float(info.get("duration"))
+        except (TypeError, ValueError):
+            return None
+        if duration < VideoEngine.SEGMENT_MIN_DURATION:
+            return None
+
+        video, audio = VideoEngine._select_streams(info)
+        if video is None:
+            return None
+
+        if not video_filtered and VideoEngine._can_copy(video, container, preset.get("stream_copy", "auto")):
+            return None # A remux is already fast; nothing to parallelise
+        return duration, video, audio
+
+    @staticmethod
+    async def _convert_segmented(input_path: str, output_path: str, preset: dict, filter_args: list, plan: tuple,
+                                 progress_cb=None, threads: int = None) -> bool:
+        """
+        Cuts the video stream at keyframes (stream copy), encodes the segments in parallel
+        ffmpeg processes with the same options as a single pass, then joins them with the
+        concat demuxer (stream copy) and adds the audio from the original input.
+        Cancelling the task kills every ffmpeg process of the job.
+        """
+        duration, video, audio = plan
+        cores = threads or os.cpu_count() or 1 # Segments share the job's thread allocation
+        workers = max(1, min(cores, int(duration // VideoEngine.SEGMENT_MIN_LENGTH)))
+        # About two segments per worker evens out segments that encode slower than others
+        segment_time = max(VideoEngine.SEGMENT_MIN_LENGTH, duration / (workers * 2))
+        ext = os.path.splitext(output_path)[1]
+
+        # Segments live next to the output so the final join writes to the same filesystem
+        # (absolute, because the concat demuxer resolves list entries relative to the list file)
+        work_dir = tempfile.mkdtemp(prefix=".videoparts-", dir=os.path.dirname(os.path.abspath(output_path)))
+        try:
+            split_args = ["-i", input_path, "-map", f"0:{video['index']}", "-c", "copy",
+                          "-f", "segment", "-segment_time", f"{segment_time:.3f}", "-reset_timestamps", "1",
+                          os.path.join(work_dir, "source%05d.mkv")]
+            returncode, stderr = await FFmpegRunner.run_async(split_args)
+            if returncode != 0:
+                print(f"FFmpeg Error (split): {stderr}")
+                return False
+
+            sources = sorted(name for name in os.listdir(work_dir) if name.startswith("source"))
+            encoded = [os.path.join(work_dir, f"encoded{i:05d}{ext}") for i in range(len(sources))]
+            threads = max(1, cores // min(workers, len(sources)))
+
+            segment_progress = {}
+            slots = asyncio.Semaphore(workers)
+
+            def report(index, progress):
+                if not progress_cb:
+                    return
+                segment_progress[index] = progress
+                progress_cb(VideoEngine._aggregate_progress(segment_progress.values(), duration))
+
+            async def encode(index):
+                args = (["-i", os.path.join(work_dir, sources[index])] + filter_args
+                        + ["-an", "-threads", str(threads), encoded[index]])
+                async with slots:
+                    returncode, stderr = await FFmpegRunner.run_async(args, lambda p: report(index, p))
+                if returncode != 0:
+                    print(f"FFmpeg Error (segment {index}): {stderr}")
+                return returncode == 0
+
+            # Failures come back as results, so no segment is still running when the work dir goes
+            results = await asyncio.gather(*(encode(index) for index in range(len(sources))), return_exceptions=True)
+            if not all(result is True for result in results):
+                return False
+
+            list_path = os.path.join(work_dir, "segments.txt")
+            with open(list_path, "w") as f:
+                for path in encoded:
+                    escaped = path.replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+
+            join_args = ["-f", "concat", "-safe", "0", "-i", list_path, "-i", input_path,
+                         "-map", "0:v:0", "-c:v", "copy"]
+            if audio is not None:
+                join_args.extend(["-map", f"1:{audio['index']}"])
+                container = ext.lower().lstrip(".")
+                if VideoEngine._can_copy(audio, container, preset.get("stream_copy", "auto")):
+                    join_args.extend(["-c:a", "copy"])
+            join_args.append(output_path)
+
+            returncode, stderr = await FFmpegRunner.run_async(join_args)
+            if returncode != 0:
+                print(f"FFmpeg Error (join): {stderr}")
+                return False
+            return True
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def _aggregate_progress(segments, duration: float) -> ConversionProgress:
+        """
+        Combines the latest progress of every segment into one for the whole input.
+        """
+        out_time = 0.0
+        fps = 0.0
+        speed = 0.0
+        total_size = 0
+        for progress in segments:
+            out_time += progress.out_time or 0.0
+            total_size += progress.total_size or 0
+            if not progress.done:
+                # Segments encode side by side, so their rates add up
+                fps += progress.fps or 0.0
+                speed += progress.speed or 0.0
+
+        eta = max(0.0, (duration - out_time) / speed) if speed else None
+        return ConversionProgress(
+            percent=max(0, min(99, int(out_time / duration * 100))), # 100 once joined
+            out_time=out_time,
+            fps=fps or None,
+            speed=speed or None,
+            total_size=total_size or None,
+            eta=eta,
+        )
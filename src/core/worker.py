@@ -1,137 +1,117 @@
 from PySide6.QtCore import QThread, Signal
-import os
-from src.core.file_detector import FileType, FileDetector
-from src.core.image_engine import ImageEngine
-from src.core.video_engine import VideoEngine
-from src.core.audio_engine import AudioEngine
-from src.core.pdf_engine import PdfEngine
+from src.core.file_detector import FileDetector
 from src.core.preset_manager import PresetManager
+from src.core.preset_plan import PresetPlan
+from src.core.output_names import OutputNames
+from src.core.scheduler import JobScheduler
+from src.core.conversion_cache import ConversionCache
+from src.core.progress import ProgressThrottle
 
 class ConversionWorker(QThread):
-    progress_signal = Signal(str, int)  # file_path, progress (0-100)
-    finished_signal = Signal(str, str, bool, str)  # file_path, output_path, success, message
+    progress_signal = Signal(int, object)  # job id, ConversionProgress
+    finished_signal = Signal(int, str, bool, str)  # job id, output_path, success, message
     all_finished_signal = Signal()
 
-    def __init__(self, job_list):
+    def __init__(self, job_list, slots=None, cache=None, scheduler=None, journal=None):
         """
-        job_list: list of dicts { 'path': str, 'preset_name': str }
+        job_list: iterable of dicts { 'path': str, 'preset_name': str, 'id': int } (may be a generator).
+                  The id identifies the job in signals, since one path may be queued with several presets;
+                  jobs without one are numbered in order.
+        slots: Optional { FileType: int } concurrency override passed to the JobScheduler.
+        cache: Optional ConversionCache; defaults to the one enabled by FILECONVERTER_CACHE=1.
+        scheduler: Optional JobScheduler shared with other workers; its owner shuts it down.
+        journal: Optional JobJournal recording the progress of jobs that carry a 'journal_id'.
+                 Resumed jobs may also carry the 'output_path' they were given before.
         """
         super().__init__()
         self.job_list = job_list
         self.is_running = True
-        self.current_process_holder = [None] # Mutable list to store current Popen object
+        self.journal = journal
+        self.owns_scheduler = scheduler is None
+        if scheduler is None:
+            if cache is None:
+                cache = ConversionCache.from_env()
+            scheduler = JobScheduler(slots, cache=cache)
+        self.scheduler = scheduler
 
     def run(self):
-        total_files = len(self.job_list)
-        
-        for index, job in enumerate(self.job_list):
+        # Cross-thread signals are coalesced per job and capped to the refresh interval
+        throttle = ProgressThrottle(self._on_progress, self._on_finished)
+        # Names are claimed on disk, so parallel workers and other instances never pick the same one
+        names = OutputNames()
+        progress_cb, finished_cb = throttle.progress, names.callbacks(throttle.finished)
+        if self.journal is not None:
+            progress_cb, finished_cb = self.journal.callbacks(progress_cb, finished_cb)
+        try:
+            # Jobs are resolved lazily so the scheduler can start on the first ones right away
+            self.scheduler.run(self._resolve_jobs(names), progress_cb, finished_cb)
+        finally:
+            throttle.close()
+            names.discard_unused()
+        if self.owns_scheduler:
+            self.scheduler.shutdown()
+
+        self.all_finished_signal.emit()
+
+    def _resolve_jobs(self, names):
+        """
+        Turns queued { 'path', 'preset_name' } entries into scheduler jobs, reporting invalid ones.
+        names: OutputNames reserving each job's output name.
+        """
+        custom_plans = {} # id(custom_config) -> PresetPlan; one dialog's config is shared by many jobs
+
+        for number, job in enumerate(self.job_list):
             if not self.is_running:
                 break
                 
+            job_id = job.get('id', number)
             input_path = job['path']
-            preset_name = job['preset_name']
-            
+
+            # Detected once: it picks both the preset table and the engine
+            file_type = FileDetector.detect(input_path)
+
             if 'custom_config' in job:
                 # Use custom config directly
-                preset_data = job['custom_config']
+                config = job['custom_config']
+                plan = custom_plans.get(id(config))
+                if plan is None:
+                    plan = custom_plans[id(config)] = PresetPlan.compile(job['preset_name'], file_type, config)
             else:
                 # Lookup by name
-                file_type = FileDetector.detect(input_path)
-                presets = PresetManager.get_presets(file_type)
-                preset_data = presets.get(preset_name)
+                plan = PresetManager.get_plans(file_type).get(job['preset_name'])
 
-            if not preset_data:
-                self.finished_signal.emit(input_path, "", False, "Invalid Preset")
+            error = "Invalid Preset" if plan is None else plan.error
+            if error:
+                if self.journal is not None:
+                    self.journal.mark_finished(job, False, error)
+                self.finished_signal.emit(job_id, "", False, error)
                 continue
-            
-            # Ensure file type is detected (needed for engine dispatch)
-            file_type = FileDetector.detect(input_path)
 
-            # Generate Output Path
-            input_dir = os.path.dirname(input_path)
-            filename = os.path.basename(input_path)
-            name, ext = os.path.splitext(filename)
-            
-            # Determine new extension if format change
-            if "format" in preset_data:
-                new_ext = "." + preset_data["format"]
-            elif preset_data.get("action") == "convert" and "format" in preset_data:
-                new_ext = "." + preset_data["format"]
-            else:
-                new_ext = ext
-                
-            output_path = os.path.join(input_dir, f"{name}_converted{new_ext}")
-            
-            # Handle duplicates: append (1), (2), etc.
-            counter = 1
-            base_output_path = output_path
-            while os.path.exists(output_path):
-                name_no_ext, ext_part = os.path.splitext(base_output_path)
-                output_path = f"{name_no_ext}({counter}){ext_part}"
-                counter += 1
-
-            # Notify start
-            self.progress_signal.emit(input_path, 0)
-            
-            success = False
-            error_msg = ""
-            
-            # Reset process holder for this job
-            self.current_process_holder[0] = None
-
-            if file_type == FileType.IMAGE:
-                success = ImageEngine.convert(input_path, output_path, preset_data, self.current_process_holder)
-                if not success:
-                    error_msg = "ImageMagick failed"
-            elif file_type == FileType.VIDEO:
-                # Video conversion or extraction
-                # If target format is audio (mp3, wav), we use AudioEngine logic? 
-                # Actually FFmpeg (VideoEngine) can handle it, but using AudioEngine might be cleaner/more specialized?
-                # VideoEngine uses 'ffmpeg -i ...' which works for extraction too.
-                # But let's check: VideoEngine is wired to use 'video' presets mostly.
-                # If we use VideoEngine for extraction, it should work fine if preset format is mp3.
-                
-                # However, we must also support FileType.AUDIO inputs now.
-                
-                progress_cb = lambda p: self.progress_signal.emit(input_path, p)
-                success = VideoEngine.convert(input_path, output_path, preset_data, self.current_process_holder, progress_cb)
-                if not success:
-                    error_msg = "FFmpeg failed"
-            elif file_type == FileType.AUDIO:
-                progress_cb = lambda p: self.progress_signal.emit(input_path, p)
-                success = AudioEngine.convert(input_path, output_path, preset_data, self.current_process_holder, progress_cb)
-                if not success:
-                    error_msg = "FFmpeg Audio failed"
-            elif file_type == FileType.PDF:
-                if preset_data.get("action") == "compress":
-                    success = PdfEngine.compress(input_path, output_path, preset_data, self.current_process_holder)
-                    if not success:
-                        error_msg = "Ghostscript compression failed"
-                else:
-                     error_msg = "Action not supported for PDF"
-            else:
-                # Placeholder for other engines
-                success = True # Mock success for non-implemented types
-                error_msg = "Not implemented yet"
+            # Resumed jobs keep their earlier name; its partial output was removed on resume
+            output_path = job.get('output_path')
+            if not (output_path and names.claim(output_path)):
+                output_path = plan.output_path(input_path, names)
 
-            # Check if stopped during process
-            if not self.is_running:
-                self.finished_signal.emit(input_path, output_path, False, "Cancelled")
-                continue
+            resolved = {
+                'id': job_id,
+                'path': input_path,
+                'output_path': output_path,
+                'file_type': file_type,
+                'preset': plan.preset,
+                'plan': plan
+            }
+            if self.journal is not None and 'journal_id' in job:
+                resolved['journal_id'] = job['journal_id']
+                self.journal.set_output(resolved)
+            yield resolved
 
-            if success:
-                self.progress_signal.emit(input_path, 100)
-                self.finished_signal.emit(input_path, output_path, True, "Completed")
-            else:
-                self.finished_signal.emit(input_path, output_path, False, error_msg)
+    def _on_progress(self, job, progress):
+        self.progress_signal.emit(job['id'], progress)
 
-        self.all_finished_signal.emit()
+    def _on_finished(self, job, success, message):
+        self.finished_signal.emit(job['id'], job['output_path'], success, message)
 
     def stop(self):
         self.is_running = False
-        # Kill current process if it exists
-        if self.current_process_holder[0]:
-            try:
-                self.current_process_holder[0].kill()
-            except Exception as e:
-                print(f"Error killing process: {e}")
+        # Kill every running process, not just the most recent one
+        self.scheduler.stop()
@@ -6,77 +6,63 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.insert(0, project_root)
 
-from PySide6.QtWidgets import QApplication
-from src.ui.mainwindow import MainWindow
-from src.ui.progresswindow import ProgressWindow
-from src.core.file_detector import FileDetector
-from src.core.preset_manager import PresetManager
-from src.ui.custom_dialog import CustomPresetDialog
-from src.core.media_info import MediaInfoExtractor
-from src.ui.mediainfo_window import MediaInfoWindow
-import src.cli as cli_module
+# Nothing Qt-related is imported at module level: CLI calls (--list-presets, --preset, ...)
+# must not pay for PySide6. GUI modules are imported only once a window is going to be shown.
+GUI_COMMANDS = ["--quick-convert", "--media-info"]
+
+def is_cli_call(argv) -> bool:
+    """
+    Plain file arguments open the main window and GUI_COMMANDS open their dialogs;
+    anything else with an option (--list-presets, --preset, --cache-info, -h, ...) is a CLI call.
+    """
+    if len(argv) < 2 or argv[1] in GUI_COMMANDS:
+        return False
+    return any(arg.startswith("-") for arg in argv[1:])
 
 def main():
     # Check for CLI-specific arguments first
-    cli_flags = ["--list-presets", "--install-integration", "--remove-integration", "--preset", "-h", "--help"]
-    # Check if any argument matches or looks like a CLI operation
-    # Note: --quick-convert is a GUI operation
-    if len(sys.argv) > 1:
-        if sys.argv[1] in ["--list-presets", "--install-integration", "--remove-integration"] or "--preset" in sys.argv:
-             cli_module.main()
-             return
+    if is_cli_call(sys.argv):
+        import src.cli as cli_module
+        sys.exit(cli_module.main())
 
-             cli_module.main()
-             return
+    instance = None
+    if len(sys.argv) > 2 and sys.argv[1] == "--quick-convert":
+        from src.core.instance import SingleInstance
+        instance = SingleInstance()
+        # Most quick-convert calls come from a file manager one after another: hand the
+        # files to the window that is already open before paying for Qt at all.
+        # Custom... needs its dialog first, so it hands off from quick_convert().
+        if sys.argv[2] != "Custom..." and instance.hand_off(sys.argv[2], sys.argv[3:]):
+            sys.exit(0)
 
+    from PySide6.QtWidgets import QApplication
     app = QApplication(sys.argv)
     
     # Handle Media Info arg
     if len(sys.argv) > 1 and sys.argv[1] == "--media-info" and len(sys.argv) > 2:
-        file_path = sys.argv[2]
-        info = MediaInfoExtractor.get_info(file_path)
-        window = MediaInfoWindow(info)
-        window.exec()
+        show_media_info(sys.argv[2])
         sys.exit(0)
 
     if len(sys.argv) > 1 and sys.argv[1] == "--quick-convert":
         if len(sys.argv) < 3:
             print("Usage: main.py --quick-convert <preset_name> <file1> [file2 ...]")
             sys.exit(1)
-            
-        preset_name = sys.argv[2]
-        files = sys.argv[3:]
-        
-        custom_config = None
-        
-        # Handle Custom Preset Interactivity
-        if preset_name == "Custom..." and len(files) > 0:
-            # We need to detect file type of the first file to show correct options
-            first_file = files[0]
-            if os.path.exists(first_file):
-                file_type = FileDetector.detect(first_file)
-                dialog = CustomPresetDialog(file_type.name)
-                if dialog.exec():
-                    custom_config = dialog.get_config()
-                else:
-                    # User cancelled
-                    sys.exit(0)
-        
-        # Quick Convert Mode: Direct to ProgressWindow
-        progress_window = ProgressWindow(auto_start=True)
-        for path in files:
-            if os.path.isfile(path):
-                 progress_window.add_file(os.path.basename(path), preset_name, path, custom_config)
-        
-        progress_window.show_window()
+
+        # Keep a reference so the window isn't garbage collected
+        progress_window = quick_convert(sys.argv[2], sys.argv[3:], instance)
+        if progress_window is None:
+            sys.exit(0)
         
     else:
         # Standard GUI Mode
+        from src.core.discovery import FileDiscovery
+        from src.ui.mainwindow import MainWindow
+
         window = MainWindow()
         
         if len(sys.argv) > 1:
             # Load files from arguments
-            file_paths = sys.argv[1:]
+            file_paths = FileDiscovery.iter_files(sys.argv[1:])
             for path in file_paths:
                 if os.path.isfile(path):
                     window.add_file(path)
@@ -85,5 +71,70 @@ def main():
 
     sys.exit(app.exec())
 
+def show_media_info(file_path):
+    from src.core.media_info import MediaInfoExtractor
+    from src.ui.mediainfo_window import MediaInfoWindow
+
+    info = MediaInfoExtractor.get_info(file_path)
+    window = MediaInfoWindow(info)
+    window.exec()
+
+def expand_files(paths):
+    from src.core.discovery import FileDiscovery
+
+    # Selected folders are expanded recursively into the files they contain
+    return [path for path in FileDiscovery.iter_files(paths) if os.path.isfile(path)]
+
+def queue_files(progress_window, preset_name, files, custom_config=None):
+    for path in files:
+        progress_window.add_file(os.path.basename(path), preset_name, path, custom_config)
+
+def quick_convert(preset_name, paths, instance=None):
+    """
+    Opens a ProgressWindow converting paths with preset_name.
+    instance: Optional SingleInstance; the window then also accepts files from later quick-convert calls.
+    Returns the window, or None if the user cancelled the custom preset dialog
+    or the files were handed to an already running instance.
+    """
+    from src.core.file_detector import FileDetector
+    from src.ui.custom_dialog import CustomPresetDialog
+    from src.ui.progresswindow import ProgressWindow
+
+    files = expand_files(paths)
+    
+    custom_config = None
+    
+    # Handle Custom Preset Interactivity
+    if preset_name == "Custom..." and len(files) > 0:
+        # We need to detect file type of the first file to show correct options
+        first_file = files[0]
+        file_type = FileDetector.detect(first_file)
+        dialog = CustomPresetDialog(file_type.name)
+        if dialog.exec():
+            custom_config = dialog.get_config()
+        else:
+            # User cancelled
+            return None
+
+        if instance and instance.hand_off(preset_name, files, custom_config):
+            return None
+    
+    # Quick Convert Mode: Direct to ProgressWindow
+    progress_window = ProgressWindow(auto_start=True)
+    queue_files(progress_window, preset_name, files, custom_config)
+    progress_window.show_window()
+
+    if instance and instance.supported():
+        from src.ui.instance_server import InstanceServer
+
+        # Become the instance later calls hand their files to
+        server = InstanceServer(progress_window)
+        if server.listen(instance.take_listener()):
+            server.request_received.connect(
+                lambda name, request_paths, config: queue_files(progress_window, name, expand_files(request_paths), config))
+        instance.release()
+
+    return progress_window
+
 if __name__ == "__main__":
     main()
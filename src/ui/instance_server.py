@@ -0,0 +1,71 @@
+import json
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtNetwork import QLocalServer
+
+from src.core.instance import SingleInstance
+
+class InstanceServer(QObject):
+    """
+    Accepts quick-convert requests from later invocations (see SingleInstance)
+    and emits them so they can be queued in this instance's ProgressWindow.
+    """
+    request_received = Signal(str, list, object)  # preset_name, paths, custom_config
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.on_new_connection)
+        self.buffers = {}
+
+    def listen(self, descriptor: int = None) -> bool:
+        """
+        descriptor: A socket already bound by SingleInstance.take_listener(); else the socket path is bound here.
+        """
+        path = SingleInstance.socket_path()
+        if descriptor is not None:
+            if self.server.listen(descriptor):
+                return True
+            print(f"Could not listen on {path}: {self.server.errorString()}")
+            return False
+        # Whoever holds the SingleInstance lock and failed to connect owns the name; clear stale sockets
+        QLocalServer.removeServer(path)
+        if not self.server.listen(path):
+            print(f"Could not listen on {path}: {self.server.errorString()}")
+            return False
+        return True
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            self.buffers[sock] = b""
+            sock.readyRead.connect(lambda s=sock: self.on_ready_read(s))
+            sock.disconnected.connect(lambda s=sock: self.on_disconnected(s))
+
+    def on_ready_read(self, sock):
+        self.buffers[sock] = self.buffers.get(sock, b"") + bytes(sock.readAll())
+        if b"\n" not in self.buffers[sock]:
+            return
+
+        line = self.buffers.pop(sock).split(b"\n", 1)[0]
+        try:
+            request = json.loads(line.decode("utf-8"))
+            preset_name = request["preset"]
+            paths = list(request["paths"])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Invalid quick-convert request: {e}")
+            sock.write(b"error\n")
+            sock.disconnectFromServer()
+            return
+
+        sock.write(b"ok\n")
+        sock.flush()
+        sock.disconnectFromServer()
+        self.request_received.emit(preset_name, paths, request.get("custom_config"))
+
+    def on_disconnected(self, sock):
+        self.buffers.pop(sock, None)
+        sock.deleteLater()
+
+    def close(self):
+        self.server.close()
@@ -1,11 +1,14 @@
 import os
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QListWidget, 
-                               QListWidgetItem, QPushButton, QLabel, QMessageBox, QMenu)
+                               QListWidgetItem, QPushButton, QLabel, QMessageBox, QMenu,
+                               QApplication)
 from PySide6.QtCore import Qt, QMimeData
 from PySide6.QtGui import QAction
 
 from src.core.file_detector import FileDetector, FileType
 from src.core.preset_manager import PresetManager
+from src.core.discovery import FileDiscovery
+from src.core.job_journal import JobJournal
 from src.ui.progresswindow import ProgressWindow
 from src.ui.custom_dialog import CustomPresetDialog
 
@@ -36,6 +39,18 @@ class MainWindow(QMainWindow):
         self.start_btn.clicked.connect(self.start_conversion)
         self.layout.addWidget(self.start_btn)
 
+        # Offered when a conversion window was closed by a crash or kill before it finished
+        self.resume_btn = QPushButton()
+        self.resume_btn.clicked.connect(self.resume_conversion)
+        self.resume_btn.setVisible(False)
+        self.layout.addWidget(self.resume_btn)
+
+        journal = JobJournal.shared()
+        self.interrupted = journal.interrupted_batch("gui") if journal else None
+        if self.interrupted:
+            self.resume_btn.setText(f"Resume Interrupted Conversion ({self.interrupted['remaining']} left)")
+            self.resume_btn.setVisible(True)
+
         # Keep reference to progress window
         self.progress_window = None
 
@@ -46,10 +61,14 @@ class MainWindow(QMainWindow):
             event.ignore()
 
     def dropEvent(self, event):
-        for url in event.mimeData().urls():
-            file_path = url.toLocalFile()
+        # Dropped folders are walked recursively; only recognised file types are added
+        paths = [url.toLocalFile() for url in event.mimeData().urls()]
+        for count, file_path in enumerate(FileDiscovery.iter_files(paths), 1):
             if os.path.isfile(file_path):
                 self.add_file(file_path)
+            # Keep the window responsive while large folders are walked
+            if count % 200 == 0:
+                QApplication.processEvents()
 
     def add_file(self, file_path):
         file_type = FileDetector.detect(file_path)
@@ -157,3 +176,9 @@ class MainWindow(QMainWindow):
                 print("Error: Item missing file path")
 
         self.progress_window.show_window()
+
+    def resume_conversion(self):
+        self.resume_btn.setVisible(False)
+        self.progress_window = ProgressWindow()
+        self.progress_window.resume_batch(self.interrupted['id'])
+        self.progress_window.show_window()
@@ -0,0 +1,173 @@
+from PySide6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionProgressBar
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QTimer
+
+# Row states, used for filtering and counting
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+SORT_ROLE = Qt.UserRole
+PROGRESS_ROLE = Qt.UserRole + 1
+
+class JobRow:
+    __slots__ = ("filename", "preset_name", "percent", "status", "state", "output_path")
+
+    def __init__(self, filename, preset_name, status="Pending", state=PENDING):
+        self.filename = filename
+        self.preset_name = preset_name
+        self.percent = 0 # None while the duration is unknown
+        self.status = status
+        self.state = state
+        self.output_path = None
+
+class JobTableModel(QAbstractTableModel):
+    """
+    One plain JobRow per file instead of widget items and a QProgressBar per row,
+    so memory and build time stay flat with very large batches.
+    Rows added in a burst are inserted into the view in one go on the next event loop pass.
+    """
+    HEADERS = ["Filename", "Preset", "Progress", "Status"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.pending_rows = [] # Added but not yet inserted into the view
+        self.row_by_job = {} # job id -> row index
+        self.counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0, CANCELLED: 0}
+        self.flush_scheduled = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(JobTableModel.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return JobTableModel.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return row.filename
+            if column == 1:
+                return row.preset_name
+            if column == 3:
+                return row.status
+        elif role == PROGRESS_ROLE and column == 2:
+            return row.percent
+        elif role == SORT_ROLE:
+            if column == 2:
+                return -1 if row.percent is None else row.percent
+            return (row.filename, row.preset_name, None, row.status)[column]
+        elif role == Qt.ToolTipRole and column in (0, 3):
+            return row.output_path or row.status
+        return None
+
+    def add_row(self, filename, preset_name, job_id=None, status="Pending", state=PENDING):
+        # Rows are only ever appended, so a row's position is known before it reaches the view
+        if job_id is not None:
+            self.row_by_job[job_id] = len(self.rows) + len(self.pending_rows)
+        self.counts[state] += 1
+        self.pending_rows.append(JobRow(filename, preset_name, status, state))
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def flush(self):
+        self.flush_scheduled = False
+        if not self.pending_rows:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(self.pending_rows) - 1)
+        self.rows.extend(self.pending_rows)
+        self.pending_rows = []
+        self.endInsertRows()
+
+    def _row(self, job_id):
+        row_index = self.row_by_job.get(job_id)
+        if row_index is None:
+            return None, None
+        if row_index >= len(self.rows):
+            # Not inserted yet; flush() shows it with whatever state it has by then
+            return self.pending_rows[row_index - len(self.rows)], None
+        return self.rows[row_index], row_index
+
+    def _set_state(self, row, state):
+        if row.state != state:
+            self.counts[row.state] -= 1
+            self.counts[state] += 1
+            row.state = state
+
+    def _changed(self, row_index):
+        if row_index is not None:
+            self.dataChanged.emit(self.index(row_index, 2), self.index(row_index, 3))
+
+    def update_progress(self, job_id, percent, status=None):
+        row, row_index = self._row(job_id)
+        if row is None:
+            return
+        row.percent = percent
+        if status is not None:
+            row.status = status
+            self._set_state(row, RUNNING)
+        self._changed(row_index)
+
+    def update_status(self, job_id, output_path, success, message):
+        row, row_index = self._row(job_id)
+        if row is None:
+            return
+        row.status = message
+        if success:
+            row.percent = 100
+            row.output_path = output_path or None
+            self._set_state(row, DONE)
+        else:
+            self._set_state(row, CANCELLED if message == "Cancelled" else FAILED)
+        self._changed(row_index)
+
+    def output_path(self, row_index):
+        return self.rows[row_index].output_path
+
+class StatusFilterProxy(QSortFilterProxyModel):
+    """
+    Sorts on SORT_ROLE and shows only rows in the selected states (all when empty).
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.states = set()
+        self.setSortRole(SORT_ROLE)
+
+    def set_states(self, states):
+        self.states = set(states)
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return not self.states or self.sourceModel().rows[source_row].state in self.states
+
+class ProgressBarDelegate(QStyledItemDelegate):
+    """
+    Paints a progress bar for PROGRESS_ROLE instead of hosting a QProgressBar widget per row.
+    """
+    def paint(self, painter, option, index):
+        percent = index.data(PROGRESS_ROLE)
+
+        bar = QStyleOptionProgressBar()
+        bar.rect = option.rect.adjusted(2, 2, -2, -2)
+        bar.state = option.state | QStyle.State_Horizontal
+        bar.minimum = 0
+        bar.maximum = 0 if percent is None else 100 # 0..0 draws the busy style for unknown durations
+        bar.progress = percent or 0
+        bar.text = "" if percent is None else f"{percent}%"
+        bar.textVisible = percent is not None
+
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ProgressBar, bar, painter, option.widget)
@@ -1,11 +1,15 @@
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTableWidget, 
-                               QTableWidgetItem, QPushButton, QHeaderView, 
-                               QProgressBar, QLabel, QHBoxLayout, QMenu)
-from PySide6.QtCore import Qt, QUrl
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTableView, QPushButton, QHeaderView,
+                               QLabel, QHBoxLayout, QMenu, QComboBox)
+from PySide6.QtCore import Qt, QUrl, QTimer
 from PySide6.QtGui import QAction, QDesktopServices
 import os
 
 from src.core.worker import ConversionWorker
+from src.core.scheduler import JobScheduler
+from src.core.conversion_cache import ConversionCache
+from src.core.job_journal import JobJournal
+from src.ui.progress_model import (JobTableModel, StatusFilterProxy, ProgressBarDelegate,
+                                   PENDING, RUNNING, DONE, FAILED, CANCELLED)
 
 class ProgressWindow(QWidget):
     def __init__(self, auto_start=True):
@@ -20,11 +24,33 @@ class ProgressWindow(QWidget):
         self.info_label = QLabel("Waiting to start...")
         self.layout.addWidget(self.info_label)
 
+        # Status filter
+        self.filter_combo = QComboBox()
+        self.filter_combo.addItem("All", [])
+        self.filter_combo.addItem("Pending", [PENDING])
+        self.filter_combo.addItem("Running", [RUNNING])
+        self.filter_combo.addItem("Failed", [FAILED, CANCELLED])
+        self.filter_combo.addItem("Finished", [DONE])
+        self.filter_combo.currentIndexChanged.connect(self.apply_filter)
+        self.layout.addWidget(self.filter_combo)
+
         # File List Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Filename", "Preset", "Progress", "Status"])
+        # Model/view with painted progress bars: no widgets per row, so large batches stay cheap
+        self.model = JobTableModel(self)
+        self.proxy = StatusFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setItemDelegateForColumn(2, ProgressBarDelegate(self.table))
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder) # Insertion order until a header is clicked
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        # Fixed row heights let the view skip measuring every row
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setVisible(False)
         self.table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.open_menu)
         self.layout.addWidget(self.table)
@@ -42,39 +68,54 @@ class ProgressWindow(QWidget):
         self.cancel_btn.clicked.connect(self.cancel_conversion)
         self.btn_layout.addWidget(self.cancel_btn)
         
-        self.worker = None
+        self.scheduler = None # Shared by every worker this window starts
+        self.workers = []
         self.jobs = []
-        self.file_row_map = {} # Maps filename to row index
-        self.outputs = {} # Maps row index to output path
+        self.queued_jobs = [] # Jobs added but not yet handed to a worker
+        self.started = False
+        self.start_scheduled = False
+        self.batch_finished = False
+        # Jobs are journaled as they are handed to a worker, so an interrupted window can be resumed
+        self.journal = JobJournal.shared()
+        self.journal_batch = None
 
     def add_file(self, filename: str, preset_name: str, full_path: str = None, custom_config: dict = None):
         if not full_path and os.path.isfile(filename):
              full_path = filename
              filename = os.path.basename(filename)
 
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        
-        self.table.setItem(row, 0, QTableWidgetItem(filename))
-        self.table.setItem(row, 1, QTableWidgetItem(preset_name))
-        
-        # Progress Bar
-        pbar = QProgressBar()
-        pbar.setRange(0, 100)
-        pbar.setValue(0)
-        self.table.setCellWidget(row, 2, pbar)
-        
-        self.table.setItem(row, 3, QTableWidgetItem("Pending"))
-        
         if full_path:
-            job = {'path': full_path, 'preset_name': preset_name}
+            # Rows are tracked by job id: the same file may be queued with several presets
+            job_id = len(self.jobs)
+            self.model.add_row(filename, preset_name, job_id)
+            job = {'id': job_id, 'path': full_path, 'preset_name': preset_name}
             if custom_config:
                 job['custom_config'] = custom_config
             self.jobs.append(job)
-            self.file_row_map[full_path] = row
+            self.queued_jobs.append(job)
+            # Files added while converting (e.g. handed over by another quick-convert call)
+            # join the running batch; coalesce a burst of add_file calls into one worker
+            if self.started and not self.start_scheduled:
+                self.start_scheduled = True
+                QTimer.singleShot(0, self.start_queued_jobs)
+            return job
         else:
             # Error state if no valid path
-            self.table.setItem(row, 3, QTableWidgetItem("Error: path missing"))
+            self.model.add_row(filename, preset_name, status="Error: path missing", state=FAILED)
+            return None
+
+    def resume_batch(self, batch_id: int):
+        """
+        Queues the unfinished jobs of an interrupted batch under their earlier output names.
+        Jobs that finished before the interruption are not shown again.
+        """
+        self.journal_batch = batch_id
+        for row in self.journal.resume_batch(batch_id):
+            if row['state'] != JobJournal.QUEUED:
+                continue
+            job = self.add_file(os.path.basename(row['path']), row['preset_name'], row['path'], row['custom_config'])
+            job['journal_id'] = row['id']
+            job['output_path'] = row['output_path']
 
     def show_window(self):
         self.show()
@@ -85,42 +126,91 @@ class ProgressWindow(QWidget):
 
     def start_worker(self):
         self.start_btn.setVisible(False)
-        self.info_label.setText("Conversion in progress...")
-        self.worker = ConversionWorker(self.jobs)
-        self.worker.progress_signal.connect(self.update_progress)
-        self.worker.finished_signal.connect(self.update_status)
-        self.worker.all_finished_signal.connect(self.on_all_finished)
-        self.worker.start()
-
-    def update_progress(self, file_path, progress):
-        row = self.file_row_map.get(file_path)
-        if row is not None:
-             pbar = self.table.cellWidget(row, 2)
-             if pbar:
-                 pbar.setValue(progress)
-
-    def update_status(self, file_path, output_path, success, message):
-        row = self.file_row_map.get(file_path)
-        if row is not None:
-             self.table.setItem(row, 3, QTableWidgetItem(message))
-             if success and output_path:
-                 self.outputs[row] = output_path
-            
+        self.started = True
+        if self.scheduler is None:
+            self.scheduler = JobScheduler(cache=ConversionCache.from_env())
+        self.start_queued_jobs()
+
+    def start_queued_jobs(self):
+        self.start_scheduled = False
+        if not self.queued_jobs:
+            return
+
+        self.update_info_label()
+        if self.batch_finished:
+            # Back to work after an earlier batch finished
+            self.batch_finished = False
+            self.cancel_btn.setText("Cancel All")
+            self.cancel_btn.clicked.disconnect()
+            self.cancel_btn.clicked.connect(self.cancel_conversion)
+
+        if self.journal is not None:
+            if self.journal_batch is None:
+                self.journal_batch = self.journal.start_batch("gui")
+            self.journal.add(self.journal_batch, [job for job in self.queued_jobs if 'journal_id' not in job])
+
+        # Queue every preset of a file back to back so the scheduler can decode it once for all of them
+        by_path = {}
+        for job in self.queued_jobs:
+            by_path.setdefault(job['path'], []).append(job)
+        worker = ConversionWorker([job for jobs in by_path.values() for job in jobs], scheduler=self.scheduler,
+                                  journal=self.journal)
+        self.queued_jobs = []
+        worker.progress_signal.connect(self.update_progress)
+        worker.finished_signal.connect(self.update_status)
+        worker.all_finished_signal.connect(self.on_all_finished)
+        self.workers.append(worker)
+        worker.start()
+
+    def update_progress(self, job_id, progress):
+        status = None
+        if not progress.done:
+            details = progress.details()
+            status = f"Running ({details})" if details else "Running"
+        self.model.update_progress(job_id, progress.percent, status)
+
+    def update_status(self, job_id, output_path, success, message):
+        self.model.update_status(job_id, output_path, success, message)
+        if not self.batch_finished:
+            self.update_info_label()
+
+    def update_info_label(self):
+        counts = self.model.counts
+        total = sum(counts.values())
+        finished = counts[DONE] + counts[FAILED] + counts[CANCELLED]
+        text = f"Conversion in progress... {finished} of {total} finished"
+        if counts[FAILED]:
+            text += f", {counts[FAILED]} failed"
+        self.info_label.setText(text)
+
+    def apply_filter(self):
+        self.proxy.set_states(self.filter_combo.currentData())
+
     def on_all_finished(self):
-        self.info_label.setText("All conversions finished.")
+        # Workers share the scheduler; the batch is done when the last one finishes
+        if self.queued_jobs or any(worker.isRunning() and worker is not self.sender() for worker in self.workers):
+            return
+        self.batch_finished = True
+        failed = self.model.counts[FAILED]
+        self.info_label.setText(f"All conversions finished ({failed} failed)." if failed else "All conversions finished.")
         self.cancel_btn.setText("Close")
         self.cancel_btn.clicked.disconnect()
         self.cancel_btn.clicked.connect(self.close)
 
     def cancel_conversion(self):
-        if self.worker:
-            self.worker.stop()
-            self.worker.wait()
+        for worker in self.workers:
+            worker.stop()
+        for worker in self.workers:
+            worker.wait()
+        if self.scheduler:
+            self.scheduler.shutdown()
+        if self.journal is not None and self.journal_batch is not None:
+            self.journal.discard_batch(self.journal_batch)
         self.close()
 
     def open_menu(self, position):
-        row = self.table.currentRow()
-        output_path = self.outputs.get(row)
+        index = self.table.indexAt(position)
+        output_path = self.model.output_path(self.proxy.mapToSource(index).row()) if index.isValid() else None
         
         menu = QMenu()
         if output_path and os.path.exists(output_path):
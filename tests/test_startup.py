@@ -0,0 +1,56 @@
+"""
+The CLI must never import Qt: --list-presets and plain conversions run
+without PySide6 loaded (see benchmarks/startup_budget.py for the timings).
+"""
+import os
+import sys
+import zlib
+import struct
+import subprocess
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+MAIN_PY = os.path.join(project_root, "src", "main.py")
+
+QT_MODULES = ("PySide6", "shiboken6")
+
+def write_png(path: str):
+    """Writes a 1x1 white PNG without needing any image tool."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(b"\x00\xff\xff\xff")))
+        f.write(chunk(b"IEND", b""))
+
+def qt_imports(args: list, env: dict) -> list:
+    result = subprocess.run([sys.executable, "-X", "importtime", MAIN_PY] + args,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=env)
+    imported = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:"):
+            module = line.rsplit("|", 1)[-1].strip()
+            if module.split(".")[0] in QT_MODULES:
+                imported.add(module)
+    return sorted(imported)
+
+@pytest.fixture
+def env(tmp_path):
+    env = dict(os.environ)
+    # Keep the user's cache, journal and media index out of it
+    env["XDG_CACHE_HOME"] = str(tmp_path / "cache")
+    env["FILECONVERTER_JOURNAL"] = "0"
+    env["FILECONVERTER_MEDIA_INDEX"] = "0"
+    return env
+
+def test_list_presets_does_not_import_qt(env):
+    assert qt_imports(["--list-presets"], env) == []
+
+def test_conversion_does_not_import_qt(env, tmp_path):
+    # Whether the conversion succeeds depends on ImageMagick being installed; the imports don't
+    image_path = str(tmp_path / "pixel.png")
+    write_png(image_path)
+    assert qt_imports(["--preset", "To JPG", image_path], env) == []